@@ -0,0 +1,92 @@
+from core.config import settings
+from http_client import create_http_client
+from benchmarks.corpus import consultant_year_strs, hhru_year_strs, page_path, save_page, save_golden, load_manifest, update_manifest, ORIGIN_CAPTURED
+from services.external_utils import parse_consultant_days_full, parse_hhru_days_full
+from datetime import datetime, timezone
+import argparse
+import asyncio
+import os
+
+async def _capture(force: bool, delay: float) -> None:
+    """Скачивает страницы источников в корпус
+
+    Args:
+        force (bool): Перезаписывать уже сохранённые страницы
+        delay (float): Пауза (сек.) между запросами, чтобы не нагружать источники
+    """
+
+    targets = [
+        ("consultant", year_str, f"{settings.CONSULTANT_CALENDAR_URL}/law/ref/calendar/proizvodstvennye/{year_str}/")
+        for year_str in consultant_year_strs()
+    ] + [
+        ("hhru", year_str, f"{settings.HHRU_CALENDAR_URL}/article/calendar{year_str}")
+        for year_str in hhru_year_strs()
+    ]
+    full_parsers = {"consultant": parse_consultant_days_full, "hhru": parse_hhru_days_full}
+    http_client = create_http_client()
+    try:
+        for source, year_str, url in targets:
+            captured = load_manifest().get(f"{source}/{year_str}", {}).get("origin") == ORIGIN_CAPTURED
+            if os.path.exists(page_path(source, year_str)) and captured and not force:
+                print(f"{source}/{year_str}: уже скачана")
+                continue
+            try:
+                response = await http_client.get(url, follow_redirects=True)
+                response.raise_for_status()
+            except Exception as e:
+                print(f"{source}/{year_str}: не удалось скачать {url}: {str(e)}")
+                continue
+            raw_days = full_parsers[source](response.text)
+            save_page(source, year_str, response.text)
+            save_golden(source, year_str, raw_days)
+            update_manifest(source, year_str, {
+                "origin": ORIGIN_CAPTURED,
+                "url": url,
+                "captured_at": datetime.now(timezone.utc).isoformat(),
+                "golden_checked": False
+            })
+            print(f"{source}/{year_str}: сохранена ({len(response.text)} символов, дней {len(raw_days)})")
+            await asyncio.sleep(delay)
+    finally:
+        await http_client.aclose()
+
+def _mark_checked(pages: list[str]) -> None:
+    """Отмечает эталоны скачанных страниц как проверенные вручную
+
+    Args:
+        pages (list[str]): Страницы вида источник:год
+    """
+
+    manifest = load_manifest()
+    for page in pages:
+        source, year_str = page.split(":", 1)
+        entry = manifest.get(f"{source}/{year_str}")
+        if entry is None or entry.get("origin") != ORIGIN_CAPTURED:
+            print(f"{source}/{year_str}: страница не скачана, отметка пропущена")
+            continue
+        update_manifest(source, year_str, {**entry, "golden_checked": True})
+        print(f"{source}/{year_str}: эталон отмечен как проверенный")
+
+def main() -> None:
+    """Наполнение корпуса сохранённых страниц
+
+    Скачивает страницы Консультанта (2017 - текущий год, а также редакции 2020b и 2024b) и hh.ru (2020 - текущий год)
+    и сохраняет их в benchmarks/fixtures вместе с эталонным результатом полного парсера, заменяя синтетические.
+    Происхождение страницы записывается в benchmarks/fixtures/manifest.json. Эталон нужно сверить глазами
+    с календарём на сайте источника: он фиксирует текущее поведение парсера. После сверки эталон отмечается флагом
+    --mark-checked consultant:2025 hhru:2025, только такие страницы тест считает проверенными настоящими страницами
+    Запуск из директории server: python -m benchmarks.capture_fixtures
+    """
+
+    parser = argparse.ArgumentParser(description="Наполнение корпуса сохранённых страниц")
+    parser.add_argument("--force", action="store_true", help="Перезаписать уже скачанные страницы")
+    parser.add_argument("--delay", type=float, default=1.0, help="Пауза (сек.) между запросами")
+    parser.add_argument("--mark-checked", nargs="+", metavar="SOURCE:YEAR", help="Отметить эталоны страниц как проверенные вручную")
+    args = parser.parse_args()
+    if args.mark_checked:
+        _mark_checked(args.mark_checked)
+        return
+    asyncio.run(_capture(args.force, args.delay))
+
+if __name__ == "__main__":
+    main()
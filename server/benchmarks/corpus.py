@@ -0,0 +1,168 @@
+from datetime import datetime
+from typing import Iterator, Optional
+import gzip
+import json
+import os
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+MANIFEST_PATH = os.path.join(FIXTURES_DIR, "manifest.json")
+ORIGIN_SYNTHETIC = "synthetic"
+ORIGIN_CAPTURED = "captured"
+
+def consultant_year_strs(last_year: Optional[int] = None) -> list[str]:
+    """Годы страниц Консультанта в корпусе
+
+    Кроме страниц всех лет с 2017, включает исправленные редакции "2020b" и "2024b",
+    которые запрашивает сервер
+
+    Args:
+        last_year (Optional[int]): Последний год, по умолчанию текущий
+
+    Returns:
+        list[str]: Годы страниц в формате строки
+    """
+
+    last_year = last_year or datetime.now().year
+    year_strs: list[str] = []
+    for year in range(2017, last_year + 1):
+        year_strs.append(str(year))
+        if year in (2020, 2024):
+            year_strs.append(f"{year}b")
+    return year_strs
+
+def hhru_year_strs(last_year: Optional[int] = None) -> list[str]:
+    """Годы страниц hh.ru в корпусе
+
+    Args:
+        last_year (Optional[int]): Последний год, по умолчанию текущий
+
+    Returns:
+        list[str]: Годы страниц в формате строки (hh.ru предоставляет календари только с 2020 года)
+    """
+
+    last_year = last_year or datetime.now().year
+    return [str(year) for year in range(2020, last_year + 1)]
+
+def page_path(source: str, year_str: str) -> str:
+    """Путь сохранённой страницы
+
+    Args:
+        source (str): Источник (consultant или hhru)
+        year_str (str): Год страницы в формате строки
+
+    Returns:
+        str: Путь сжатой gzip HTML-страницы
+    """
+
+    return os.path.join(FIXTURES_DIR, source, f"{year_str}.html.gz")
+
+def golden_path(source: str, year_str: str) -> str:
+    """Путь эталонного результата парсинга страницы
+
+    Args:
+        source (str): Источник (consultant или hhru)
+        year_str (str): Год страницы в формате строки
+
+    Returns:
+        str: Путь JSON-файла со списком дней вида [месяц, день, вид дня]
+    """
+
+    return os.path.join(FIXTURES_DIR, source, f"{year_str}.golden.json")
+
+def save_page(source: str, year_str: str, response_text: str) -> None:
+    """Сохраняет страницу в корпус
+
+    Args:
+        source (str): Источник (consultant или hhru)
+        year_str (str): Год страницы в формате строки
+        response_text (str): HTML-страница
+    """
+
+    path = page_path(source, year_str)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as raw_file, gzip.GzipFile(fileobj=raw_file, mode="wb", mtime=0) as page_file: #без времени в заголовке, чтобы пересохранение не меняло файл
+        page_file.write(response_text.encode("utf-8"))
+
+def load_page(source: str, year_str: str) -> str:
+    """Читает страницу из корпуса
+
+    Args:
+        source (str): Источник (consultant или hhru)
+        year_str (str): Год страницы в формате строки
+
+    Returns:
+        str: HTML-страница
+    """
+
+    with gzip.open(page_path(source, year_str), "rb") as page_file:
+        return page_file.read().decode("utf-8")
+
+def save_golden(source: str, year_str: str, raw_days: list[tuple[int, int, str]]) -> None:
+    """Сохраняет эталонный результат парсинга страницы
+
+    Args:
+        source (str): Источник (consultant или hhru)
+        year_str (str): Год страницы в формате строки
+        raw_days (list[tuple[int, int, str]]): Список дней вида (месяц, день, вид дня)
+    """
+
+    with open(golden_path(source, year_str), "w", encoding="utf-8") as golden_file:
+        json.dump([list(raw_day) for raw_day in raw_days], golden_file, ensure_ascii=False, indent=0)
+
+def load_golden(source: str, year_str: str) -> Optional[list[tuple[int, int, str]]]:
+    """Читает эталонный результат парсинга страницы
+
+    Args:
+        source (str): Источник (consultant или hhru)
+        year_str (str): Год страницы в формате строки
+
+    Returns:
+        Optional[list[tuple[int, int, str]]]: Список дней вида (месяц, день, вид дня), либо None, если эталона нет
+    """
+
+    path = golden_path(source, year_str)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as golden_file:
+        return [tuple(raw_day) for raw_day in json.load(golden_file)]
+
+def load_manifest() -> dict[str, dict]:
+    """Читает происхождение страниц корпуса
+
+    Returns:
+        dict[str, dict]: Запись вида {"origin": synthetic|captured, ...} по ключу "источник/год страницы".
+            У скачанных страниц также url, captured_at и golden_checked (эталон проверен вручную)
+    """
+
+    if not os.path.exists(MANIFEST_PATH):
+        return {}
+    with open(MANIFEST_PATH, "r", encoding="utf-8") as manifest_file:
+        return json.load(manifest_file)
+
+def update_manifest(source: str, year_str: str, entry: dict) -> None:
+    """Записывает происхождение страницы корпуса
+
+    Args:
+        source (str): Источник (consultant или hhru)
+        year_str (str): Год страницы в формате строки
+        entry (dict): Запись о происхождении страницы
+    """
+
+    manifest = load_manifest()
+    manifest[f"{source}/{year_str}"] = entry
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    with open(MANIFEST_PATH, "w", encoding="utf-8") as manifest_file:
+        json.dump(manifest, manifest_file, ensure_ascii=False, indent=2, sort_keys=True)
+        manifest_file.write("\n")
+
+def corpus_pages() -> Iterator[tuple[str, str]]:
+    """Перебирает сохранённые страницы корпуса
+
+    Returns:
+        Iterator[tuple[str, str]]: Пары (источник, год страницы в формате строки) для страниц, которые есть на диске
+    """
+
+    for source, year_strs in (("consultant", consultant_year_strs()), ("hhru", hhru_year_strs())):
+        for year_str in year_strs:
+            if os.path.exists(page_path(source, year_str)):
+                yield source, year_str
@@ -0,0 +1,84 @@
+from parse_pool import ParsePool, _parse_in_worker
+import argparse
+import asyncio
+import statistics
+import time
+
+TICK = 0.001
+
+async def _measure_lag(stop: asyncio.Event, lags: list[float]) -> None:
+    """Замеряет задержку event loop
+
+    Засыпает на TICK секунд и записывает, насколько позже запланированного event loop вернул управление
+
+    Args:
+        stop (asyncio.Event): Событие окончания замера
+        lags (list[float]): Список, в который записываются задержки (сек.)
+    """
+
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - started - TICK)
+
+async def _run(mode: str, pages: list[tuple[str, str]], rounds: int, pool_size: int) -> None:
+    """Парсит страницы в заданном режиме, замеряя задержку event loop
+
+    Args:
+        mode (str): Режим парсинга (inline - прямо в event loop, thread или process - в пуле)
+        pages (list[tuple[str, str]]): Список страниц вида (источник, HTML)
+        rounds (int): Кол-во проходов по страницам
+        pool_size (int): Кол-во воркеров пула
+    """
+
+    parse_pool = None
+    if mode != "inline":
+        parse_pool = ParsePool(mode, pool_size)
+        parse_pool.start()
+        await parse_pool.parse(*pages[0]) #прогрев воркеров
+    lags: list[float] = []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_measure_lag(stop, lags))
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for source, response_text in pages:
+            if parse_pool is None:
+                _parse_in_worker(source, response_text)
+                await asyncio.sleep(0)
+            else:
+                await parse_pool.parse(source, response_text)
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await ticker
+    if parse_pool is not None:
+        await parse_pool.stop()
+    lags.sort()
+    p99 = lags[min(len(lags) - 1, int(len(lags) * 0.99))]
+    print(
+        f"{mode:>8}: всего {elapsed:.3f} сек., задержка event loop "
+        f"median={statistics.median(lags) * 1000:.2f} мс, p99={p99 * 1000:.2f} мс, max={lags[-1] * 1000:.2f} мс"
+    )
+
+def main() -> None:
+    """Бенчмарк задержки event loop при парсинге HTML-страниц
+
+    Сравнивает задержку event loop при парсинге страниц прямо в нём и в пуле потоков/процессов
+    Запуск из директории server: python -m benchmarks.event_loop_lag consultant:page.html hhru:page.html
+    """
+
+    parser = argparse.ArgumentParser(description="Задержка event loop при парсинге HTML-страниц")
+    parser.add_argument("pages", nargs="+", help="Страницы вида источник:путь (consultant:2025.html)")
+    parser.add_argument("--rounds", type=int, default=5, help="Кол-во проходов по страницам")
+    parser.add_argument("--pool-size", type=int, default=2, help="Кол-во воркеров пула")
+    parser.add_argument("--modes", default="inline,thread,process", help="Режимы парсинга через запятую")
+    args = parser.parse_args()
+    pages: list[tuple[str, str]] = []
+    for page in args.pages:
+        source, path = page.split(":", 1)
+        with open(path, "r", encoding="utf-8") as page_file:
+            pages.append((source, page_file.read()))
+    for mode in args.modes.split(","):
+        asyncio.run(_run(mode, pages, args.rounds, args.pool_size))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+from typing import Optional
+import argparse
+import asyncio
+import time
+
+class FakeRedis:
+    """Локальная замена сервера Redis
+
+    Поддерживает подмножество протокола RESP2, которое использует общий кэш (shared_cache.py):
+    PING, AUTH, SELECT, GET, SET (с PX/EX), DEL, DBSIZE, FLUSHALL. Ключи хранятся в памяти процесса вместе
+    со временем истечения. Сервер запускается в том же event loop, что и проверяемый код, либо отдельным процессом
+
+    Args:
+        latency (float): Задержка (сек.) перед каждым ответом
+
+    Examples:
+        >>>fake_redis = FakeRedis()
+        >>>port = await fake_redis.start()
+    """
+
+    def __init__(self, latency: float = 0.0) -> None:
+        """Конструктор класса
+
+        Args:
+            self (Self@FakeRedis): Экземпляр класса
+            latency (float): Задержка (сек.) перед каждым ответом
+        """
+
+        self.latency = latency
+        self.data: dict[bytes, tuple[bytes, Optional[float]]] = {}
+        self.commands: dict[str, int] = {}
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._writers: set[asyncio.StreamWriter] = set()
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Запускает сервер
+
+        Args:
+            self (Self@FakeRedis): Экземпляр класса
+            host (str): Хост
+            port (int): Порт, 0 - любой свободный
+
+        Returns:
+            int: Порт сервера
+        """
+
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        """Останавливает сервер
+
+        Args:
+            self (Self@FakeRedis): Экземпляр класса
+        """
+
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._writers):
+                writer.close()
+            await self._server.wait_closed()
+
+    async def _read_command(self, reader: asyncio.StreamReader) -> Optional[list[bytes]]:
+        """Читает команду (массив bulk-строк)
+
+        Args:
+            self (Self@FakeRedis): Экземпляр класса
+            reader (asyncio.StreamReader): Поток чтения соединения
+
+        Returns:
+            Optional[list[bytes]]: Команда и её аргументы, None - соединение закрыто
+        """
+
+        line = await reader.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int((await reader.readline())[1:-2])
+            args.append((await reader.readexactly(length + 2))[:-2])
+        return args
+
+    def _get(self, key: bytes) -> Optional[bytes]:
+        """Значение ключа с учётом истечения
+
+        Args:
+            self (Self@FakeRedis): Экземпляр класса
+            key (bytes): Ключ
+
+        Returns:
+            Optional[bytes]: Значение, None - ключа нет или он истёк
+        """
+
+        entry = self.data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self.data[key]
+            return None
+        return value
+
+    def _execute(self, args: list[bytes]) -> bytes:
+        """Выполняет команду
+
+        Args:
+            self (Self@FakeRedis): Экземпляр класса
+            args (list[bytes]): Команда и её аргументы
+
+        Returns:
+            bytes: Ответ в формате RESP
+        """
+
+        name = args[0].decode().upper()
+        self.commands[name] = self.commands.get(name, 0) + 1
+        if name in ("PING", "AUTH", "SELECT"):
+            return b"+PONG\r\n" if name == "PING" else b"+OK\r\n"
+        if name == "GET":
+            value = self._get(args[1])
+            return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+        if name == "SET":
+            expires_at = None
+            options = [arg.decode().upper() for arg in args[3::2]]
+            for option, amount in zip(options, args[4::2]):
+                expires_at = time.monotonic() + (int(amount) / 1000 if option == "PX" else int(amount))
+            self.data[args[1]] = (args[2], expires_at)
+            return b"+OK\r\n"
+        if name == "DEL":
+            return b":%d\r\n" % sum(1 for key in args[1:] if self.data.pop(key, None) is not None)
+        if name == "DBSIZE":
+            return b":%d\r\n" % len(self.data)
+        if name == "FLUSHALL":
+            self.data.clear()
+            return b"+OK\r\n"
+        return b"-ERR unknown command '%s'\r\n" % args[0]
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """Обслуживает соединение
+
+        Args:
+            self (Self@FakeRedis): Экземпляр класса
+            reader (asyncio.StreamReader): Поток чтения соединения
+            writer (asyncio.StreamWriter): Поток записи соединения
+        """
+
+        self._writers.add(writer)
+        try:
+            while (args := await self._read_command(reader)) is not None:
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+                writer.write(self._execute(args))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+async def _serve(host: str, port: int, latency: float) -> None:
+    """Запускает замену Redis до остановки процесса
+
+    Args:
+        host (str): Хост
+        port (int): Порт
+        latency (float): Задержка (сек.) перед каждым ответом
+    """
+
+    fake_redis = FakeRedis(latency)
+    port = await fake_redis.start(host, port)
+    print(f"Замена Redis слушает {host}:{port}")
+    await asyncio.Event().wait()
+
+def main() -> None:
+    """Локальная замена Redis для общего кэша
+
+    Для проверки общего кэша сервер запускается с SHARED_CACHE_URL=redis://127.0.0.1:6380/0
+    Запуск из директории server: python -m benchmarks.fake_redis --port 6380
+    """
+
+    parser = argparse.ArgumentParser(description="Локальная замена Redis для общего кэша")
+    parser.add_argument("--host", default="127.0.0.1", help="Хост")
+    parser.add_argument("--port", type=int, default=6380, help="Порт")
+    parser.add_argument("--latency", type=float, default=0.0, help="Задержка (сек.) перед каждым ответом")
+    args = parser.parse_args()
+    asyncio.run(_serve(args.host, args.port, args.latency))
+
+if __name__ == "__main__":
+    main()
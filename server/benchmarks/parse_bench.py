@@ -0,0 +1,84 @@
+from benchmarks.corpus import corpus_pages, load_page, load_golden, save_golden
+from services.external_utils import parse_consultant_days, parse_consultant_days_fast, parse_consultant_days_full, parse_hhru_days, parse_hhru_days_fast, parse_hhru_days_full
+import argparse
+import statistics
+import sys
+import time
+import tracemalloc
+
+PARSERS = {
+    "consultant": {"prod": parse_consultant_days, "fast": parse_consultant_days_fast, "full": parse_consultant_days_full},
+    "hhru": {"prod": parse_hhru_days, "fast": parse_hhru_days_fast, "full": parse_hhru_days_full}
+}
+
+def _bench(parser, response_text: str, repeat: int) -> tuple[float, int]:
+    """Замеряет время и пиковую память парсинга страницы
+
+    Время замеряется без tracemalloc (он замедляет парсинг), пиковая память - отдельным проходом
+
+    Args:
+        parser (Callable[[str], list[tuple[int, int, str]]]): Парсер страницы
+        response_text (str): HTML-страница
+        repeat (int): Кол-во замеров времени
+
+    Returns:
+        tuple[float, int]: Медианное время парсинга (сек.) и пиковая память (байт)
+    """
+
+    timings: list[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parser(response_text)
+        timings.append(time.perf_counter() - started)
+    tracemalloc.start()
+    try:
+        parser(response_text)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return statistics.median(timings), peak
+
+def main() -> None:
+    """Бенчмарк парсеров на корпусе сохранённых страниц
+
+    Для каждой страницы корпуса печатает медианное время и пиковую память рабочего (prod, с учётом PARSE_FAST_PATH),
+    быстрого (fast) и полного (full) парсеров и сверяет результат рабочего парсера с эталоном
+    Завершается с кодом 1, если результат хотя бы одной страницы расходится с эталоном или эталона нет
+    Запуск из директории server: python -m benchmarks.parse_bench
+    """
+
+    parser = argparse.ArgumentParser(description="Бенчмарк парсеров на корпусе сохранённых страниц")
+    parser.add_argument("--repeat", type=int, default=5, help="Кол-во замеров времени на страницу")
+    parser.add_argument("--parsers", default="prod,fast,full", help="Парсеры через запятую (prod, fast, full)")
+    parser.add_argument("--update-golden", action="store_true", help="Перезаписать эталоны результатом рабочего парсера")
+    args = parser.parse_args()
+    pages = list(corpus_pages())
+    if not pages:
+        print("Корпус пуст, наполните его командой python -m benchmarks.capture_fixtures")
+        sys.exit(1)
+    failures = 0
+    for source, year_str in pages:
+        response_text = load_page(source, year_str)
+        raw_days = PARSERS[source]["prod"](response_text)
+        if args.update_golden:
+            save_golden(source, year_str, raw_days)
+            verdict = "эталон обновлён"
+        else:
+            golden = load_golden(source, year_str)
+            if golden is None:
+                failures += 1
+                verdict = "НЕТ ЭТАЛОНА"
+            elif golden != raw_days:
+                failures += 1
+                verdict = f"РАСХОЖДЕНИЕ С ЭТАЛОНОМ (дней {len(raw_days)}/{len(golden)})"
+            else:
+                verdict = "OK"
+        results = []
+        for name in args.parsers.split(","):
+            seconds, peak = _bench(PARSERS[source][name], response_text, args.repeat)
+            results.append(f"{name} {seconds * 1000:.1f} мс / {peak / 1024:.0f} КиБ")
+        print(f"{source}/{year_str}: {len(response_text) / 1024:.0f} КиБ, дней {len(raw_days)}, {', '.join(results)} - {verdict}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+from benchmarks.corpus import corpus_pages, load_page
+from services.external_utils import parse_consultant_days_fast, parse_consultant_days_full, parse_hhru_days_fast, parse_hhru_days_full
+import argparse
+import sys
+import time
+
+PARSERS = {
+    "consultant": (parse_consultant_days_fast, parse_consultant_days_full),
+    "hhru": (parse_hhru_days_fast, parse_hhru_days_full)
+}
+
+def _timed(parser, response_text: str) -> tuple[list[tuple[int, int, str]], float]:
+    """Парсит страницу, замеряя время
+
+    Args:
+        parser (Callable[[str], list[tuple[int, int, str]]]): Парсер страницы
+        response_text (str): HTML-страница
+
+    Returns:
+        tuple[list[tuple[int, int, str]], float]: Список дней и время парсинга (сек.)
+    """
+
+    started = time.perf_counter()
+    raw_days = parser(response_text)
+    return raw_days, time.perf_counter() - started
+
+def main() -> None:
+    """Сравнение быстрого и полного парсеров HTML-страниц
+
+    Парсит каждую страницу быстрым (фрагмент + SoupStrainer) и полным (BeautifulSoup всей страницы) путём
+    и сравнивает результаты. Без аргументов сравнивает все страницы корпуса (то же проверяет tests/test_parser_diff.py).
+    Завершается с кодом 1, если хотя бы на одной странице результаты различаются
+    Запуск из директории server: python -m benchmarks.parser_diff consultant:page.html hhru:page.html
+    """
+
+    parser = argparse.ArgumentParser(description="Сравнение быстрого и полного парсеров HTML-страниц")
+    parser.add_argument("pages", nargs="*", help="Страницы вида источник:путь (consultant:2025.html), по умолчанию страницы корпуса")
+    args = parser.parse_args()
+    pages: list[tuple[str, str, str]] = []
+    for page in args.pages:
+        source, path = page.split(":", 1)
+        with open(path, "r", encoding="utf-8") as page_file:
+            pages.append((source, path, page_file.read()))
+    if not args.pages:
+        pages = [(source, f"{source}/{year_str}", load_page(source, year_str)) for source, year_str in corpus_pages()]
+    mismatches = 0
+    for source, path, response_text in pages:
+        fast_parser, full_parser = PARSERS[source]
+        fast_days, fast_seconds = _timed(fast_parser, response_text)
+        full_days, full_seconds = _timed(full_parser, response_text)
+        if fast_days == full_days:
+            verdict = "OK"
+        else:
+            mismatches += 1
+            only_fast = sorted(set(fast_days) - set(full_days))[:5]
+            only_full = sorted(set(full_days) - set(fast_days))[:5]
+            verdict = f"РАЗЛИЧИЕ (только быстрый: {only_fast}, только полный: {only_full})"
+        print(
+            f"{path}: дней {len(fast_days)}/{len(full_days)}, "
+            f"быстрый {fast_seconds * 1000:.1f} мс, полный {full_seconds * 1000:.1f} мс - {verdict}"
+        )
+    sys.exit(1 if mismatches else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+from benchmarks.corpus import page_path, load_page
+from fastapi import FastAPI, HTTPException, Request, Response, status
+from fastapi.responses import RedirectResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import AsyncIterator
+import argparse
+import asyncio
+import hashlib
+import os
+import random
+import uvicorn
+
+class Faults(BaseModel):
+    """Неисправности источника
+
+    Attributes:
+        latency (float): Задержка (сек.) перед ответом
+        jitter (float): Случайная добавка (сек.) к задержке, от 0 до jitter
+        error_rate (float): Доля ответов с ошибкой
+        error_status (int): HTTP-статус ответа с ошибкой
+        drip_chunk (int): Размер (байт) порции тела при медленной отдаче, 0 - тело отдаётся сразу
+        drip_delay (float): Пауза (сек.) между порциями тела при медленной отдаче
+        redirects (int): Кол-во перенаправлений перед отдачей страницы
+    """
+
+    latency: float = Field(0.0, ge=0)
+    jitter: float = Field(0.0, ge=0)
+    error_rate: float = Field(0.0, ge=0, le=1)
+    error_status: int = Field(503, ge=400, le=599)
+    drip_chunk: int = Field(0, ge=0)
+    drip_delay: float = Field(0.0, ge=0)
+    redirects: int = Field(0, ge=0)
+
+app = FastAPI(title="Calendar sources stand-in")
+app.state.faults = {"consultant": Faults(), "hhru": Faults()}
+app.state.stats = {"consultant": {}, "hhru": {}}
+app.state.random = random.Random(0)
+
+def _count(source: str, outcome: str) -> None:
+    """Увеличивает счётчик исходов запросов к источнику
+
+    Args:
+        source (str): Источник (consultant или hhru)
+        outcome (str): Исход запроса
+    """
+
+    stats = app.state.stats[source]
+    stats[outcome] = stats.get(outcome, 0) + 1
+
+async def _drip(body: bytes, chunk: int, delay: float) -> AsyncIterator[bytes]:
+    """Медленно отдаёт тело ответа порциями
+
+    Args:
+        body (bytes): Тело ответа
+        chunk (int): Размер порции (байт)
+        delay (float): Пауза (сек.) между порциями
+
+    Returns:
+        AsyncIterator[bytes]: Порции тела ответа
+    """
+
+    for start in range(0, len(body), chunk):
+        yield body[start:start + chunk]
+        await asyncio.sleep(delay)
+
+async def _serve(request: Request, source: str, year_str: str) -> Response:
+    """Отдаёт сохранённую страницу источника с учётом неисправностей
+
+    Args:
+        request (Request): Текущий запрос
+        source (str): Источник (consultant или hhru)
+        year_str (str): Год страницы в формате строки
+
+    Returns:
+        Response: Страница, перенаправление, 304 или ответ с ошибкой
+    """
+
+    faults: Faults = app.state.faults[source]
+    hop = int(request.query_params.get("hop", "0"))
+    if hop < faults.redirects:
+        _count(source, "redirect")
+        return RedirectResponse(f"{request.url.path}?hop={hop + 1}", status_code=status.HTTP_302_FOUND)
+    delay = faults.latency + app.state.random.uniform(0, faults.jitter)
+    if delay:
+        await asyncio.sleep(delay)
+    if app.state.random.random() < faults.error_rate:
+        _count(source, "error")
+        return Response(status_code=faults.error_status)
+    if not os.path.exists(page_path(source, year_str)):
+        _count(source, "not_found")
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Страницы {source}/{year_str} нет в корпусе")
+    body = load_page(source, year_str).encode("utf-8")
+    etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+    if request.headers.get("if-none-match") == etag:
+        _count(source, "not_modified")
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    _count(source, "ok")
+    headers = {"ETag": etag}
+    if faults.drip_chunk:
+        return StreamingResponse(_drip(body, faults.drip_chunk, faults.drip_delay), media_type="text/html; charset=utf-8", headers=headers)
+    return Response(body, media_type="text/html; charset=utf-8", headers=headers)
+
+@app.get("/law/ref/calendar/proizvodstvennye/{year_str}/")
+async def consultant_calendar(request: Request, year_str: str) -> Response:
+    """Страница календаря Консультанта (адрес как у CONSULTANT_CALENDAR_URL)"""
+
+    return await _serve(request, "consultant", year_str)
+
+@app.get("/article/calendar{year_str}")
+async def hhru_calendar(request: Request, year_str: str) -> Response:
+    """Страница календаря hh.ru (адрес как у HHRU_CALENDAR_URL)"""
+
+    return await _serve(request, "hhru", year_str)
+
+@app.put("/_faults/{source}")
+async def set_faults(source: str, faults: Faults) -> dict:
+    """Задаёт неисправности источника во время работы"""
+
+    if source not in app.state.faults:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Неизвестный источник {source}")
+    app.state.faults[source] = faults
+    return faults.model_dump()
+
+@app.get("/_stats")
+async def get_stats() -> dict:
+    """Счётчики исходов запросов и текущие неисправности источников"""
+
+    return {
+        "stats": app.state.stats,
+        "faults": {source: faults.model_dump() for source, faults in app.state.faults.items()}
+    }
+
+def _parse_faults(value: str) -> tuple[str, Faults]:
+    """Разбирает неисправности источника из аргумента командной строки
+
+    Args:
+        value (str): Строка вида consultant:latency=0.5,error_rate=0.2
+
+    Returns:
+        tuple[str, Faults]: Источник и его неисправности
+    """
+
+    source, _, params = value.partition(":")
+    values = dict(param.split("=", 1) for param in params.split(",") if param)
+    return source, Faults(**values)
+
+def main() -> None:
+    """Локальная замена внешних источников
+
+    Отдаёт страницы корпуса benchmarks/fixtures по тем же адресам, что Консультант и hh.ru, с заданными
+    задержкой, долей ошибок, медленной отдачей тела и перенаправлениями. Для нагрузочного тестирования сервер
+    запускается с CONSULTANT_CALENDAR_URL и HHRU_CALENDAR_URL, указывающими на эту замену
+    Запуск из директории server: python -m benchmarks.stand_in --port 8081 --faults consultant:latency=0.5,error_rate=0.2
+    """
+
+    parser = argparse.ArgumentParser(description="Локальная замена внешних источников")
+    parser.add_argument("--host", default="127.0.0.1", help="Хост")
+    parser.add_argument("--port", type=int, default=8081, help="Порт")
+    parser.add_argument("--seed", type=int, default=0, help="Зерно генератора задержек и ошибок")
+    parser.add_argument("--faults", action="append", default=[], help="Неисправности источника вида consultant:latency=0.5,error_rate=0.2")
+    args = parser.parse_args()
+    app.state.random = random.Random(args.seed)
+    for value in args.faults:
+        source, faults = _parse_faults(value)
+        app.state.faults[source] = faults
+    uvicorn.run(app, host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
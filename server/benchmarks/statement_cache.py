@@ -0,0 +1,77 @@
+from model import CalendarDay
+from repo import _days_by_period_query
+from datetime import date, timedelta
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import asyncpg
+from sqlalchemy.sql.elements import ClauseElement
+from sqlalchemy.util import LRUCache
+from typing import Callable, Optional
+import argparse
+import statistics
+import time
+
+def _plain_query(date_start: date, date_end: date) -> ClauseElement:
+    """Запрос дней по периоду в прежнем виде (строится заново при каждом вызове)
+
+    Args:
+        date_start (date): Дата начала периода
+        date_end (date): Дата конца периода
+
+    Returns:
+        ClauseElement: Запрос дней периода
+    """
+
+    return select(CalendarDay).where(CalendarDay.date >= date_start, CalendarDay.date <= date_end).order_by(CalendarDay.date)
+
+def _bench(build: Callable[[date, date], ClauseElement], compiled_cache: Optional[LRUCache], requests: int, repeat: int) -> float:
+    """Замеряет подготовку запроса к отправке в БД
+
+    Каждый запрос строится для своего периода и подготавливается так же, как при выполнении движком:
+    построение ключа кэша и поиск в кэше скомпилированных запросов, компиляция при промахе или без кэша
+
+    Args:
+        build (Callable[[date, date], ClauseElement]): Построение запроса по периоду
+        compiled_cache (Optional[LRUCache]): Кэш скомпилированных запросов, None - компиляция при каждом запросе
+        requests (int): Кол-во запросов в замере
+        repeat (int): Кол-во замеров
+
+    Returns:
+        float: Медианное время (сек.) подготовки одного запроса
+    """
+
+    dialect = asyncpg.dialect()
+    periods = [(date(2017, 1, 1) + timedelta(days=i % 3000), date(2017, 1, 31) + timedelta(days=i % 3000)) for i in range(requests)]
+    timings: list[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for date_start, date_end in periods:
+            build(date_start, date_end)._compile_w_cache(dialect, compiled_cache=compiled_cache, column_keys=[])
+        timings.append((time.perf_counter() - started) / requests)
+    return statistics.median(timings)
+
+def main() -> None:
+    """Бенчмарк подготовки запроса дней по периоду
+
+    Печатает время подготовки одного запроса get_days_by_period без кэша скомпилированных запросов,
+    с кэшем для обычного запроса и с кэшем для лямбда-запроса, который использует репозиторий. БД не нужна:
+    замеряется только работа SQLAlchemy до отправки запроса
+    Запуск из директории server: python -m benchmarks.statement_cache
+    """
+
+    parser = argparse.ArgumentParser(description="Бенчмарк подготовки запроса дней по периоду")
+    parser.add_argument("--requests", type=int, default=2000, help="Кол-во запросов в замере")
+    parser.add_argument("--repeat", type=int, default=5, help="Кол-во замеров")
+    args = parser.parse_args()
+    variants = [
+        ("без кэша", _plain_query, None),
+        ("кэш, обычный запрос", _plain_query, LRUCache(500)),
+        ("кэш, лямбда-запрос", _days_by_period_query, LRUCache(500))
+    ]
+    baseline = None
+    for name, build, compiled_cache in variants:
+        seconds = _bench(build, compiled_cache, args.requests, args.repeat)
+        baseline = baseline or seconds
+        print(f"{name}: {seconds * 1e6:.1f} мкс на запрос ({baseline / seconds:.1f}x)")
+
+if __name__ == "__main__":
+    main()
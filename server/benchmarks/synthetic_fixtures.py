@@ -0,0 +1,202 @@
+from benchmarks.corpus import consultant_year_strs, hhru_year_strs, page_path, save_page, save_golden, load_manifest, update_manifest, ORIGIN_CAPTURED, ORIGIN_SYNTHETIC
+from core.consts import MONTHS, OFFICIAL_HOLIDAYS
+from services.external_utils import DAY_KIND_WORK, DAY_KIND_WEEKEND, DAY_KIND_DAY_OFF, DAY_KIND_HOLIDAY, DAY_KIND_PREHOLIDAY
+from datetime import date, timedelta
+import argparse
+import calendar
+import os
+
+MONTH_TITLES: list[str] = [month_name.capitalize() for month_name in MONTHS]
+EXTRA_DAYS_OFF: dict[str, list[tuple[date, date]]] = {
+    "2020b": [(date(2020, 3, 30), date(2020, 4, 30))], #нерабочие дни весны 2020 года
+    "2024b": [(date(2024, 4, 29), date(2024, 4, 30))] #перенос выходных на 29 и 30 апреля
+}
+NOISE_ARTICLES = 150
+UNRECOGNIZED_YEAR_STR = "unrecognized"
+UNRECOGNIZED_YEAR = 2025
+
+def _day_kinds(year_str: str) -> dict[date, str]:
+    """Модель календаря года: вид каждого дня
+
+    Выходные - суббота и воскресенье, праздники - OFFICIAL_HOLIDAYS, за каждый праздник в выходной
+    выходным становится один из последних рабочих дней декабря, рабочий день перед праздником - предпраздничный.
+    Исправленные редакции (2020b, 2024b) добавляют нерабочие дни EXTRA_DAYS_OFF
+
+    Args:
+        year_str (str): Год страницы в формате строки
+
+    Returns:
+        dict[date, str]: Вид дня DAY_KIND_* (для hh.ru DAY_KIND_WEEKEND соответствует DAY_KIND_DAY_OFF) по дате
+    """
+
+    year = int(year_str[:4])
+    first_day = date(year, 1, 1)
+    days = [first_day + timedelta(days=offset) for offset in range(366 if calendar.isleap(year) else 365)]
+    kinds = {day: DAY_KIND_WEEKEND if day.weekday() >= 5 else DAY_KIND_WORK for day in days}
+    transfers = 0
+    for day in days:
+        if (day.month, day.day) in OFFICIAL_HOLIDAYS:
+            if kinds[day] == DAY_KIND_WEEKEND:
+                transfers += 1
+            kinds[day] = DAY_KIND_HOLIDAY
+    for day in days[::-1]:
+        if transfers and day.month == 12 and kinds[day] == DAY_KIND_WORK:
+            kinds[day] = DAY_KIND_WEEKEND
+            transfers -= 1
+    for extra_start, extra_end in EXTRA_DAYS_OFF.get(year_str, []):
+        for offset in range((extra_end - extra_start).days + 1):
+            day = extra_start + timedelta(days=offset)
+            if kinds[day] == DAY_KIND_WORK:
+                kinds[day] = DAY_KIND_WEEKEND
+    for day in days[:-1]:
+        if kinds[day] == DAY_KIND_WORK and kinds[day + timedelta(days=1)] == DAY_KIND_HOLIDAY:
+            kinds[day] = DAY_KIND_PREHOLIDAY
+    return kinds
+
+def _noise(year: int, title: str) -> tuple[str, str]:
+    """Разметка страницы вокруг календаря
+
+    Шапка, навигация, скрипты, статьи и подвал нужны, чтобы страница была сопоставима по размеру
+    с настоящей, а таблицы и списки с похожими классами проверяли границы поиска календаря
+
+    Args:
+        year (int): Год календаря
+        title (str): Заголовок страницы
+
+    Returns:
+        tuple[str, str]: Разметка до и после календаря
+    """
+
+    head = [
+        "<!DOCTYPE html>",
+        f'<html lang="ru"><head><meta charset="utf-8"><title>{title} {year}</title>',
+        '<script>window.__STATE__ = {"calendar": "<table class=\\"cal\\">"};</script>',
+        '<link rel="stylesheet" href="/static/main.css"></head><body>',
+        '<header class="header"><ul class="menu">' + "".join(f'<li class="menu__item"><a href="/section/{i}">Раздел {i}</a></li>' for i in range(30)) + "</ul></header>",
+        f"<h1>{title} на {year} год</h1>",
+        '<table class="cal-legend"><tr><td class="weekend">Выходной</td><td class="preholiday">Предпраздничный</td></tr></table>'
+    ]
+    tail = [
+        "<section class=\"articles\">" + "".join(
+            f'<article class="article"><h2>Статья {i}</h2><p>Разъяснения к производственному календарю на {year} год, часть {i}. '
+            f'Нормы рабочего времени, переносы выходных дней и порядок оплаты работы в праздники.</p></article>'
+            for i in range(NOISE_ARTICLES)
+        ) + "</section>",
+        '<footer class="footer"><ul class="footer__links">' + "".join(f'<li><a href="/about/{i}">Ссылка {i}</a></li>' for i in range(20)) + "</ul>",
+        '<table class="footer__contacts"><tr><td>Контакты</td></tr></table></footer>',
+        "</body></html>"
+    ]
+    return "\n".join(head), "\n".join(tail)
+
+def consultant_page(year_str: str, table_class: str = '"cal"') -> tuple[str, list[tuple[int, int, str]]]:
+    """Синтетическая страница Консультанта и эталонный результат её парсинга
+
+    Args:
+        year_str (str): Год страницы в формате строки
+        table_class (str): Значение атрибута class таблиц месяцев вместе с кавычками
+
+    Returns:
+        tuple[str, list[tuple[int, int, str]]]: HTML-страница и список дней вида (месяц, день, вид дня)
+    """
+
+    year = int(year_str[:4])
+    kinds = _day_kinds(year_str)
+    cell_classes = {DAY_KIND_WORK: "", DAY_KIND_WEEKEND: ' class="weekend"', DAY_KIND_HOLIDAY: ' class="holiday weekend"', DAY_KIND_PREHOLIDAY: ' class="preholiday"'}
+    tables, raw_days = [], []
+    for month in range(1, 13):
+        first_weekday, day_count = calendar.monthrange(year, month)
+        cells = ['<td class="inactively"></td>'] * first_weekday
+        for day_number in range(1, day_count + 1):
+            kind = kinds[date(year, month, day_number)]
+            marker = "*" if kind == DAY_KIND_PREHOLIDAY else ""
+            cells.append(f"<td{cell_classes[kind]}>{day_number}{marker}</td>")
+            raw_days.append((month, day_number, kind))
+        cells += ['<td class="inactively"></td>'] * (-len(cells) % 7)
+        rows = "".join("<tr>" + "".join(cells[start:start + 7]) + "</tr>" for start in range(0, len(cells), 7))
+        tables.append(
+            f'<div class="col-md-3"><table class={table_class}><thead><tr><th class="month" colspan="7">{MONTH_TITLES[month - 1]}</th></tr>'
+            '<tr><th>Пн</th><th>Вт</th><th>Ср</th><th>Чт</th><th>Пт</th><th>Сб</th><th>Вс</th></tr></thead>'
+            f"<tbody>{rows}</tbody></table></div>"
+        )
+    head, tail = _noise(year, "Производственный календарь")
+    return "\n".join([head, '<div class="row">', *tables, "</div>", tail]), raw_days
+
+def hhru_page(year_str: str, list_class: str = '"calendar-list"') -> tuple[str, list[tuple[int, int, str]]]:
+    """Синтетическая страница hh.ru и эталонный результат её парсинга
+
+    Args:
+        year_str (str): Год страницы в формате строки
+        list_class (str): Значение атрибута class кварталов вместе с кавычками
+
+    Returns:
+        tuple[str, list[tuple[int, int, str]]]: HTML-страница и список дней вида (месяц, день, вид дня)
+    """
+
+    year = int(year_str[:4])
+    kinds = _day_kinds(year_str)
+    item_classes = {
+        DAY_KIND_WORK: "",
+        DAY_KIND_WEEKEND: " calendar-list__numbers__item_day-off",
+        DAY_KIND_HOLIDAY: " calendar-list__numbers__item_day-off",
+        DAY_KIND_PREHOLIDAY: " calendar-list__numbers__item_shortened"
+    }
+    raw_kinds = {DAY_KIND_WEEKEND: DAY_KIND_DAY_OFF}
+    quarters, raw_days = [], []
+    for quarter in range(4):
+        months = []
+        for month in range(quarter * 3 + 1, quarter * 3 + 4):
+            first_weekday, day_count = calendar.monthrange(year, month)
+            previous_day_count = calendar.monthrange(year - 1 if month == 1 else year, 12 if month == 1 else month - 1)[1]
+            items = [
+                f'<li class="calendar-list__numbers__item calendar-list__numbers__item_other">{previous_day_count - first_weekday + 1 + offset}</li>'
+                for offset in range(first_weekday)
+            ]
+            for day_number in range(1, day_count + 1):
+                kind = kinds[date(year, month, day_number)]
+                hint = '<div class="calendar-list__numbers__item-hint">Сокращённый день</div>' if kind == DAY_KIND_PREHOLIDAY else ""
+                items.append(f'<li class="calendar-list__numbers__item{item_classes[kind]}">{day_number}{hint}</li>')
+                raw_days.append((month, day_number, raw_kinds.get(kind, kind)))
+            months.append(
+                '<li class="calendar-list__item"><div class="calendar-list__item-body">'
+                f'<div class="calendar-list__item-title">{MONTH_TITLES[month - 1]}</div>'
+                f'<ul class="calendar-list__numbers">{"".join(items)}</ul></div></li>'
+            )
+        quarters.append(f'<div class="calendar-quarter"><h3>{quarter + 1} квартал</h3><ul class={list_class}>{"".join(months)}</ul></div>')
+    head, tail = _noise(year, "Производственный календарь hh.ru")
+    return "\n".join([head, *quarters, tail]), raw_days
+
+def main() -> None:
+    """Наполнение корпуса синтетическими страницами
+
+    Сохраняет в benchmarks/fixtures синтетические страницы Консультанта (2017 - текущий год, а также 2020b и 2024b)
+    и hh.ru (2020 - текущий год) с разметкой как у настоящих, и эталоны из модели календаря, а не из парсера.
+    Кроме того сохраняет страницы unrecognized, разметку которых быстрый парсер не распознаёт (class без кавычек),
+    для проверки перехода на полный парсер. Настоящие страницы скачиваются командой python -m benchmarks.capture_fixtures
+    и не перезаписываются даже с флагом --force
+    Запуск из директории server: python -m benchmarks.synthetic_fixtures
+    """
+
+    parser = argparse.ArgumentParser(description="Наполнение корпуса синтетическими страницами")
+    parser.add_argument("--force", action="store_true", help="Перезаписать уже сохранённые страницы")
+    args = parser.parse_args()
+    targets = [("consultant", year_str, consultant_page(year_str)) for year_str in consultant_year_strs()]
+    targets += [("hhru", year_str, hhru_page(year_str)) for year_str in hhru_year_strs()]
+    targets += [
+        ("consultant", UNRECOGNIZED_YEAR_STR, consultant_page(str(UNRECOGNIZED_YEAR), "cal")),
+        ("hhru", UNRECOGNIZED_YEAR_STR, hhru_page(str(UNRECOGNIZED_YEAR), "calendar-list"))
+    ]
+    manifest = load_manifest()
+    for source, year_str, (response_text, raw_days) in targets:
+        if manifest.get(f"{source}/{year_str}", {}).get("origin") == ORIGIN_CAPTURED:
+            print(f"{source}/{year_str}: скачана с сайта источника, пропущена")
+            continue
+        if os.path.exists(page_path(source, year_str)) and not args.force:
+            print(f"{source}/{year_str}: уже сохранена")
+            continue
+        save_page(source, year_str, response_text)
+        save_golden(source, year_str, raw_days)
+        update_manifest(source, year_str, {"origin": ORIGIN_SYNTHETIC})
+        print(f"{source}/{year_str}: сохранена ({len(response_text)} символов, дней {len(raw_days)})")
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,142 @@
 from core.logger import setup_logger
-from sqlalchemy.orm import declarative_base
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.orm import declarative_base, Session, SessionTransaction
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncEngine, AsyncSession
 from core.config import settings
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Optional
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError, TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
+from fastapi import HTTPException, status
+from metrics import Histogram
+import asyncio
+import logging
+import time
 
 logger = setup_logger("database")
 
 Base = declarative_base()
 
-engine = create_async_engine(
-    settings.POSTGRESQL_URL.get_secret_value(),
-    echo=True,
-    future=True,
-    pool_pre_ping=True
-)
+class PoolStats:
+    """Статистика ожидания соединений пула
+
+    Args:
+        name (str): Имя пула для логов (основной сервер или реплика)
+
+    Examples:
+        >>>pool_stats = PoolStats("primary")
+        >>>pool_stats.snapshot(engine.pool)
+    """
+
+    def __init__(self, name: str) -> None:
+        """Конструктор класса
+
+        Args:
+            self (Self@PoolStats): Экземпляр класса
+            name (str): Имя пула для логов
+        """
+
+        self.name = name
+        self.wait = Histogram()
+        self.timeouts = 0
+
+    def snapshot(self, pool: "MeasuredQueuePool") -> dict:
+        """Текущее состояние пула и гистограмма ожидания соединений
+
+        Args:
+            self (Self@PoolStats): Экземпляр класса
+            pool (MeasuredQueuePool): Пул
+
+        Returns:
+            dict: Размер пула, кол-во выданных, простаивающих и дополнительных соединений,
+                кол-во таймаутов и гистограмма ожидания (сек.)
+        """
+
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+            "timeouts": self.timeouts,
+            "wait_seconds": self.wait.snapshot()
+        }
+
+class MeasuredQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений с замером ожидания соединения
+
+    Время ожидания включает ожидание свободного соединения и подключение нового (в пределах max_overflow).
+    Статистика переносится в новый пул при сбросе пула (engine.dispose)
+    """
+
+    stats: PoolStats
+
+    def _do_get(self):
+        """Выдаёт соединение и учитывает время его ожидания"""
+
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.stats.timeouts += 1
+            logger.warning(f"Нет свободного соединения пула {self.stats.name} за {self._timeout} сек. ({self.status()})")
+            raise
+        finally:
+            self.stats.wait.observe(time.perf_counter() - started)
+
+    def recreate(self) -> "MeasuredQueuePool":
+        """Создаёт новый пул с теми же настройками и статистикой"""
+
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+#SQLAlchemy называет логгер пула по модулю класса, без этого отладочные логи пула попали бы в логгер database
+logging.getLogger(f"{MeasuredQueuePool.__module__}.{MeasuredQueuePool.__name__}").setLevel(logging.WARNING)
+
+def _create_engine(url: str, name: str, pool_size: int, max_overflow: int, read_only: bool = False) -> AsyncEngine:
+    """Создаёт движок PostgreSQL с настройками пула из конфигурации
+
+    Соединения движка только для чтения открываются с default_transaction_read_only: PostgreSQL отклоняет
+    в них любой запрос изменения, в том числе в режиме автофиксации, где каждый запрос - отдельная транзакция
+
+    Args:
+        url (str): Адрес PostgreSQL
+        name (str): Имя пула для статистики
+        pool_size (int): Кол-во постоянных соединений пула
+        max_overflow (int): Кол-во дополнительных соединений пула при нехватке
+        read_only (bool): Соединения только для чтения
+
+    Returns:
+        AsyncEngine: Движок
+    """
+
+    server_settings = {"application_name": settings.DB_APPLICATION_NAME}
+    if read_only:
+        server_settings["default_transaction_read_only"] = "on"
+
+    db_engine = create_async_engine(
+        url,
+        echo=True,
+        future=True,
+        poolclass=MeasuredQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+        connect_args={
+            "timeout": settings.DB_CONNECT_TIMEOUT,
+            "command_timeout": settings.DB_COMMAND_TIMEOUT,
+            "server_settings": server_settings,
+            "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE, #кэш подготовленных запросов SQLAlchemy поверх asyncpg
+            "statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE #собственный кэш asyncpg
+        }
+    )
+    db_engine.pool.stats = PoolStats(name)
+    return db_engine
+
+engine = _create_engine(settings.POSTGRESQL_URL.get_secret_value(), "primary", settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW)
 
 async_session_maker = async_sessionmaker(
     engine,
@@ -22,10 +145,628 @@ async_session_maker = async_sessionmaker(
     expire_on_commit=False
 )
 
+#отдельный пул чтения основного сервера со своим размером: запрос изменения в сессии чтения завершится ошибкой, а не выполнится
+read_engine = _create_engine(settings.POSTGRESQL_URL.get_secret_value(), "read", settings.DB_READ_POOL_SIZE, settings.DB_READ_MAX_OVERFLOW, read_only=True)
+
+replica_engine = _create_engine(
+    settings.POSTGRESQL_REPLICA_URL.get_secret_value(), "replica", settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW, read_only=True
+) if settings.POSTGRESQL_REPLICA_URL else None
+
+read_session_maker = async_sessionmaker(
+    read_engine.execution_options(isolation_level="AUTOCOMMIT"),
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+replica_session_maker = async_sessionmaker(
+    replica_engine.execution_options(isolation_level="AUTOCOMMIT"),
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+    info={"replica": True}
+) if replica_engine else None
+
+DB_CONNECTION_ERRORS = (OperationalError, InterfaceError, OSError, asyncio.TimeoutError)
+
+def is_connection_error(e: BaseException) -> bool:
+    """Проверяет, вызвана ли ошибка потерей соединения с БД
+
+    Кроме DB_CONNECTION_ERRORS учитываются ошибки драйвера, после которых SQLAlchemy пометила соединение
+    недействительным (connection_invalidated)
+
+    Args:
+        e (BaseException): Ошибка
+
+    Returns:
+        bool: True, если ошибка вызвана соединением, а не запросом
+    """
+
+    return isinstance(e, DB_CONNECTION_ERRORS) or (isinstance(e, DBAPIError) and e.connection_invalidated)
+
+class StatementCacheStats:
+    """Статистика кэша скомпилированных запросов SQLAlchemy
+
+    Для каждого выполненного запроса учитывается, взят ли он из кэша скомпилированных запросов, и время
+    его подготовки: от передачи запроса движку (построение ключа кэша, компиляция при промахе, обработка параметров)
+    до отправки в БД. Сводка пишется в лог каждые stats_every запросов
+
+    Args:
+        stats_every (int): Период (кол-во запросов) записи сводки в лог
+
+    Examples:
+        >>>statement_cache = StatementCacheStats(1000)
+        >>>statement_cache.stats()
+    """
+
+    def __init__(self, stats_every: int) -> None:
+        """Конструктор класса
+
+        Args:
+            self (Self@StatementCacheStats): Экземпляр класса
+            stats_every (int): Период (кол-во запросов) записи сводки в лог
+        """
+
+        self._stats_every = stats_every
+        self.hits = 0
+        self.misses = 0
+        self.uncached = 0
+        self.hit_seconds = 0.0
+        self.miss_seconds = 0.0
+
+    def observe(self, cache_hit: object, seconds: float) -> None:
+        """Учитывает подготовку запроса
+
+        Args:
+            self (Self@StatementCacheStats): Экземпляр класса
+            cache_hit (object): Исход обращения к кэшу (CACHE_HIT, CACHE_MISS и т.д. из sqlalchemy.engine.default)
+            seconds (float): Время (сек.) подготовки запроса
+        """
+
+        if cache_hit is CACHE_HIT:
+            self.hits += 1
+            self.hit_seconds += seconds
+        elif cache_hit is CACHE_MISS:
+            self.misses += 1
+            self.miss_seconds += seconds
+        else:
+            self.uncached += 1
+        if (self.hits + self.misses + self.uncached) % self._stats_every == 0:
+            logger.info(f"Кэш скомпилированных запросов: {self.stats()}")
+
+    def stats(self) -> dict:
+        """Сводка кэша скомпилированных запросов
+
+        Args:
+            self (Self@StatementCacheStats): Экземпляр класса
+
+        Returns:
+            dict: Кол-во попаданий, промахов и запросов без кэша, доля попаданий и среднее время (мкс) подготовки
+        """
+
+        cached = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "uncached": self.uncached,
+            "hit_ratio": round(self.hits / cached, 4) if cached else 0.0,
+            "avg_hit_us": round(self.hit_seconds / self.hits * 1e6, 1) if self.hits else 0.0,
+            "avg_miss_us": round(self.miss_seconds / self.misses * 1e6, 1) if self.misses else 0.0
+        }
+
+statement_cache = StatementCacheStats(1000)
+
+def _on_before_execute(conn, clauseelement, multiparams, params, execution_options) -> None:
+    """Запоминает время передачи запроса движку"""
+
+    conn.info["statement_started_at"] = time.perf_counter()
+
+def _on_before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    """Учитывает исход обращения к кэшу и время подготовки запроса перед его отправкой в БД"""
+
+    started_at = conn.info.pop("statement_started_at", None)
+    if started_at is not None and context is not None and context.compiled is not None:
+        statement_cache.observe(context.cache_hit, time.perf_counter() - started_at)
+
+for db_engine in (engine, read_engine, replica_engine):
+    if db_engine is not None:
+        event.listen(db_engine.sync_engine, "before_execute", _on_before_execute)
+        event.listen(db_engine.sync_engine, "before_cursor_execute", _on_before_cursor_execute)
+
+async def validate_idle_connections(db_engine: AsyncEngine, timeout: float) -> int:
+    """Проверяет простаивающие соединения пула
+
+    Пул выдаёт соединения по очереди (FIFO), поэтому последовательная выдача стольких соединений, сколько
+    сейчас простаивает, проверяет каждое из них запросом SELECT 1. Соединение с ошибкой разрыва
+    SQLAlchemy помечает недействительным сам. Если простаивающих соединений нет, проверяется одно новое
+
+    Args:
+        db_engine (AsyncEngine): Движок PostgreSQL
+        timeout (float): Таймаут (сек.) проверки одного соединения
+
+    Returns:
+        int: Кол-во проверенных соединений
+
+    Raises:
+        Exception: Если проверка любого соединения не удалась
+    """
+
+    idle = max(db_engine.pool.checkedin(), 1)
+    for _ in range(idle):
+        async with db_engine.connect() as conn:
+            await asyncio.wait_for(conn.execute(text("SELECT 1")), timeout)
+    return idle
+
+class DatabaseHealth:
+    """Доступность основного сервера PostgreSQL
+
+    Класс запоминает, что основной сервер недоступен (ошибка соединения в любом запросе), чтобы следующие запросы
+    не ждали таймаутов подключения: чтение обслуживается из локального снимка календаря (snapshot.py) с пометкой
+    устаревших данных, а изменение сразу отклоняется. Раз в retry_seconds один запрос пробует обратиться к серверу,
+    успешный запрос возвращает обычный режим
+
+    Вместо проверки соединения при каждой выдаче из пула (pool_pre_ping) фоновая задача раз в check_interval секунд
+    проверяет простаивающие соединения пула и обновляет доступность сервера, а при ошибке сбрасывает пул,
+    чтобы запросы не получали разорванные соединения. Результат последней проверки отдаёт эндпоинт готовности
+
+    Args:
+        retry_seconds (float): Период (сек.) пробных обращений к недоступному серверу
+        check_interval (float): Период (сек.) фоновой проверки пула
+        check_timeout (float): Таймаут (сек.) проверки одного соединения
+
+    Examples:
+        >>>db_health = DatabaseHealth(5.0, 10.0, 5.0)
+        >>>if db_health.available(): ...
+    """
+
+    def __init__(self, retry_seconds: float, check_interval: float, check_timeout: float) -> None:
+        """Конструктор класса
+
+        Args:
+            self (Self@DatabaseHealth): Экземпляр класса
+            retry_seconds (float): Период (сек.) пробных обращений к недоступному серверу
+            check_interval (float): Период (сек.) фоновой проверки пула
+            check_timeout (float): Таймаут (сек.) проверки одного соединения
+        """
+
+        self._retry_seconds = retry_seconds
+        self._check_interval = check_interval
+        self._check_timeout = check_timeout
+        self._next_probe_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+        self.down_since: Optional[float] = None
+        self.checked_at: Optional[float] = None
+        self.checks = 0
+        self.failures = 0
+        self.validated = 0
+
+    @property
+    def down(self) -> bool:
+        """Флаг недоступности основного сервера"""
+
+        return self.down_since is not None
+
+    def available(self) -> bool:
+        """Проверяет, стоит ли обращаться к основному серверу
+
+        Пока сервер недоступен, возвращает True не чаще раза в retry_seconds (пробное обращение)
+
+        Args:
+            self (Self@DatabaseHealth): Экземпляр класса
+
+        Returns:
+            bool: True - обращаться к серверу, False - сразу использовать деградированный режим
+        """
+
+        if self.down_since is None:
+            return True
+        now = time.monotonic()
+        if now >= self._next_probe_at:
+            self._next_probe_at = now + self._retry_seconds
+            return True
+        return False
+
+    def mark_down(self, e: BaseException) -> None:
+        """Отмечает недоступность основного сервера
+
+        Args:
+            self (Self@DatabaseHealth): Экземпляр класса
+            e (BaseException): Ошибка соединения
+        """
+
+        if self.down_since is None:
+            self.down_since = time.time()
+            logger.error(f"Основной сервер PostgreSQL недоступен, включён деградированный режим: {type(e).__name__} {str(e)}")
+        self._next_probe_at = time.monotonic() + self._retry_seconds
+
+    def mark_up(self) -> None:
+        """Отмечает доступность основного сервера
+
+        Args:
+            self (Self@DatabaseHealth): Экземпляр класса
+        """
+
+        if self.down_since is not None:
+            logger.info(f"Основной сервер PostgreSQL снова доступен (недоступен был {time.time() - self.down_since:.0f} сек.)")
+            self.down_since = None
+
+    def reject_if_down(self) -> None:
+        """Сразу отклоняет запрос, если основной сервер недоступен
+
+        Args:
+            self (Self@DatabaseHealth): Экземпляр класса
+
+        Raises:
+            HTTPException: Если сервер недоступен и пробное обращение пока не положено
+        """
+
+        if not self.available():
+            desc = "БД временно недоступна, изменение календаря невозможно"
+            logger.warning(desc)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=desc,
+                headers={"Retry-After": str(int(self._retry_seconds) or 1)}
+            )
+
+    def status(self) -> dict:
+        """Результат последней проверки основного сервера
+
+        Args:
+            self (Self@DatabaseHealth): Экземпляр класса
+
+        Returns:
+            dict: Доступность сервера, время последней проверки и счётчики проверок
+        """
+
+        return {
+            "database": "down" if self.down else "up",
+            "down_since": self.down_since,
+            "checked_at": self.checked_at,
+            "checks": self.checks,
+            "failures": self.failures,
+            "validated_connections": self.validated
+        }
+
+    async def check(self) -> None:
+        """Проверяет простаивающие соединения пула основного сервера
+
+        Проверяются пулы изменения и чтения. При ошибке оба пула сбрасываются: простаивающие соединения
+        закрываются, а выданные закрываются при возврате
+
+        Args:
+            self (Self@DatabaseHealth): Экземпляр класса
+        """
+
+        self.checks += 1
+        try:
+            self.validated = await validate_idle_connections(engine, self._check_timeout)
+            self.validated += await validate_idle_connections(read_engine, self._check_timeout)
+            self.mark_up()
+        except Exception as e:
+            self.failures += 1
+            self.validated = 0
+            self.mark_down(e)
+            await engine.dispose()
+            await read_engine.dispose()
+        finally:
+            self.checked_at = time.time()
+
+    async def _loop(self) -> None:
+        """Цикл проверки основного сервера
+
+        Args:
+            self (Self@DatabaseHealth): Экземпляр класса
+        """
+
+        while True:
+            await asyncio.sleep(self._check_interval)
+            await self.check()
+
+    def start(self) -> None:
+        """Запускает фоновую проверку основного сервера
+
+        Предполагается использование только при старте сервера
+
+        Args:
+            self (Self@DatabaseHealth): Экземпляр класса
+        """
+
+        self._task = asyncio.create_task(self._loop(), name="db-health-check")
+        logger.info("Проверка пула основного сервера запущена")
+
+    async def stop(self) -> None:
+        """Останавливает фоновую проверку основного сервера
+
+        Предполагается использование только при остановке сервера
+
+        Args:
+            self (Self@DatabaseHealth): Экземпляр класса
+        """
+
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+db_health = DatabaseHealth(settings.DB_RETRY_SECONDS, settings.DB_HEALTH_CHECK_INTERVAL, settings.DB_CONNECT_TIMEOUT)
+
+def mark_connection_error(session: AsyncSession, e: BaseException) -> None:
+    """Учитывает ошибку соединения сессии
+
+    Ошибка сессии реплики переключает чтение на основной сервер, ошибка сессии основного сервера
+    включает деградированный режим
+
+    Args:
+        session (AsyncSession): Сессия, в которой произошла ошибка
+        e (BaseException): Ошибка соединения
+    """
+
+    if session.info.get("replica"):
+        replica_router.mark_unhealthy(e)
+    else:
+        db_health.mark_down(e)
+
+def is_database_available(session: AsyncSession) -> bool:
+    """Проверяет, стоит ли выполнять запросы в сессии
+
+    Args:
+        session (AsyncSession): Сессия
+
+    Returns:
+        bool: True - сессия реплики или основной сервер доступен (либо положено пробное обращение)
+    """
+
+    if session.info.get("replica"):
+        return True
+    return db_health.available()
+
+class ReplicaRouter:
+    """Выбор сервера PostgreSQL для чтения
+
+    Класс решает, читать ли с реплики или с основного сервера. Чтение идёт с основного сервера, если реплика
+    не задана, недоступна, отстаёт больше чем на max_lag секунд или если календарь изменялся (этим или другим
+    воркером) меньше read_your_writes (но не меньше max_lag) секунд назад, чтобы клиент сразу видел свои изменения.
+    Доступность и отставание реплики проверяются фоновой задачей раз в check_interval секунд вместе
+    с простаивающими соединениями пула реплики (при ошибке пул сбрасывается), ошибка соединения с репликой во время запроса сразу переключает чтение на основной сервер до следующей проверки
+
+    Args:
+        max_lag (float): Допустимое отставание (сек.) реплики
+        read_your_writes (float): Время (сек.) чтения с основного сервера после изменения календаря
+        check_interval (float): Период (сек.) проверки реплики
+
+    Examples:
+        >>>replica_router = ReplicaRouter(5.0, 5.0, 5.0)
+        >>>session_maker = replica_session_maker if replica_router.use_replica() else async_session_maker
+    """
+
+    def __init__(self, max_lag: float, read_your_writes: float, check_interval: float) -> None:
+        """Конструктор класса
+
+        Реплика считается недоступной до первой успешной проверки
+
+        Args:
+            self (Self@ReplicaRouter): Экземпляр класса
+            max_lag (float): Допустимое отставание (сек.) реплики
+            read_your_writes (float): Время (сек.) чтения с основного сервера после изменения календаря
+            check_interval (float): Период (сек.) проверки реплики
+        """
+
+        self._max_lag = max_lag
+        self._read_your_writes = max(read_your_writes, max_lag) #иначе кэш лет может сохранить ещё не реплицированные дни
+        self._check_interval = check_interval
+        self._task: Optional[asyncio.Task] = None
+        self._last_write_at = float("-inf")
+        self.healthy = False
+        self.lag: Optional[float] = None
+
+    def mark_write(self) -> None:
+        """Отмечает изменение календаря (начинает окно чтения с основного сервера)
+
+        Args:
+            self (Self@ReplicaRouter): Экземпляр класса
+        """
+
+        self._last_write_at = time.monotonic()
+
+    def mark_unhealthy(self, e: BaseException) -> None:
+        """Переключает чтение на основной сервер до следующей успешной проверки реплики
+
+        Args:
+            self (Self@ReplicaRouter): Экземпляр класса
+            e (BaseException): Ошибка соединения с репликой
+        """
+
+        if self.healthy:
+            logger.warning(f"Реплика недоступна, чтение переключено на основной сервер: {str(e)}")
+        self.healthy = False
+
+    def use_replica(self) -> bool:
+        """Проверяет, можно ли читать с реплики
+
+        Args:
+            self (Self@ReplicaRouter): Экземпляр класса
+
+        Returns:
+            bool: True - читать с реплики, False - с основного сервера
+        """
+
+        return (
+            replica_session_maker is not None
+            and self.healthy
+            and time.monotonic() - self._last_write_at >= self._read_your_writes
+        )
+
+    async def check(self) -> None:
+        """Проверяет доступность и отставание реплики
+
+        Отставание считается нулевым, если реплика применила всё полученное WAL, иначе это время
+        с последней применённой транзакции. Затем проверяются остальные простаивающие соединения пула реплики
+
+        Args:
+            self (Self@ReplicaRouter): Экземпляр класса
+        """
+
+        try:
+            async with replica_engine.connect() as conn:
+                lag = await asyncio.wait_for(conn.scalar(text(
+                    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+                )), self._check_interval)
+            await validate_idle_connections(replica_engine, self._check_interval)
+            self.lag = float(lag)
+            healthy = self.lag <= self._max_lag
+            if healthy != self.healthy:
+                logger.info(f"Чтение переключено на {'реплику' if healthy else 'основной сервер'} (отставание реплики {self.lag:.1f} сек.)")
+            self.healthy = healthy
+        except Exception as e:
+            self.lag = None
+            self.mark_unhealthy(e)
+            await replica_engine.dispose()
+
+    async def _loop(self) -> None:
+        """Цикл проверки реплики
+
+        Args:
+            self (Self@ReplicaRouter): Экземпляр класса
+        """
+
+        while True:
+            await self.check()
+            await asyncio.sleep(self._check_interval)
+
+    def start(self) -> None:
+        """Запускает фоновую проверку реплики, если реплика задана
+
+        Предполагается использование только при старте сервера
+
+        Args:
+            self (Self@ReplicaRouter): Экземпляр класса
+        """
+
+        if replica_engine is not None:
+            self._task = asyncio.create_task(self._loop(), name="replica-check")
+            logger.info("Проверка реплики запущена")
+
+    async def stop(self) -> None:
+        """Останавливает фоновую проверку реплики
+
+        Предполагается использование только при остановке сервера
+
+        Args:
+            self (Self@ReplicaRouter): Экземпляр класса
+        """
+
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+replica_router = ReplicaRouter(settings.REPLICA_MAX_LAG, settings.REPLICA_READ_YOUR_WRITES, settings.REPLICA_CHECK_INTERVAL)
+
+class ConnectionHoldStats:
+    """Время удержания соединений пула запросами к API
+
+    Сессия берёт соединение из пула только при первом запросе к БД и возвращает его в конце транзакции,
+    поэтому время удержания считается по транзакциям сессии и суммируется за запрос к API
+
+    Examples:
+        >>>connection_hold = ConnectionHoldStats()
+        >>>connection_hold.observe(0.002)
+    """
+
+    def __init__(self) -> None:
+        """Конструктор класса
+
+        Args:
+            self (Self@ConnectionHoldStats): Экземпляр класса
+        """
+
+        self.requests = 0
+        self.holding_requests = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: Optional[float]) -> None:
+        """Учитывает время удержания соединения запросом
+
+        Args:
+            self (Self@ConnectionHoldStats): Экземпляр класса
+            seconds (Optional[float]): Время (сек.) удержания, None - запрос не брал соединение
+        """
+
+        self.requests += 1
+        if seconds is not None:
+            self.holding_requests += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def stats(self) -> dict:
+        """Статистика удержания соединений
+
+        Args:
+            self (Self@ConnectionHoldStats): Экземпляр класса
+
+        Returns:
+            dict: Кол-во запросов (всего и бравших соединение), среднее и максимальное время (мс) удержания
+        """
+
+        return {
+            "requests": self.requests,
+            "holding_requests": self.holding_requests,
+            "avg_ms": round(self.total / self.holding_requests * 1000, 3) if self.holding_requests else 0.0,
+            "max_ms": round(self.max * 1000, 3)
+        }
+
+connection_hold = ConnectionHoldStats()
+
+@event.listens_for(Session, "after_begin")
+def _on_connection_acquired(session: Session, transaction: SessionTransaction, connection) -> None:
+    """Запоминает время получения сессией соединения"""
+
+    session.info.setdefault("connection_acquired_at", time.perf_counter())
+
+@event.listens_for(Session, "after_transaction_end")
+def _on_connection_released(session: Session, transaction: SessionTransaction) -> None:
+    """Добавляет время удержания соединения к сумме сессии по завершении её транзакции"""
+
+    acquired_at = session.info.pop("connection_acquired_at", None) if transaction.parent is None else None
+    if acquired_at is not None:
+        session.info["connection_hold"] = session.info.get("connection_hold", 0.0) + time.perf_counter() - acquired_at
+
+def _observe_connection_hold(session: AsyncSession, name: str) -> None:
+    """Учитывает время удержания соединения закрытой сессией запроса
+
+    Args:
+        session (AsyncSession): Закрытая сессия
+        name (str): Тип сессии для лога
+    """
+
+    hold = session.info.pop("connection_hold", None)
+    connection_hold.observe(hold)
+    if hold is not None:
+        logger.info(f"Сессия {name} удерживала соединение {hold * 1000:.1f} мс")
+
+def pool_status() -> dict:
+    """Текущее состояние пулов основного сервера и реплики
+
+    Returns:
+        dict: Состояние пулов изменения и чтения основного сервера и пула реплики (None, если реплика не задана)
+    """
+
+    return {
+        "primary": engine.pool.stats.snapshot(engine.pool),
+        "read": read_engine.pool.stats.snapshot(read_engine.pool),
+        "replica": replica_engine.pool.stats.snapshot(replica_engine.pool) if replica_engine is not None else None
+    }
+
 async def get_db_connection() -> AsyncGenerator[AsyncSession, None]:
     """Возвращает асинхронную сессию для работы с PostgreSQL
 
-    Асинхронно создаёт и возвращает сессию для работы с БД PostgreSQL
+    Асинхронно создаёт и возвращает сессию для работы с БД PostgreSQL.
+    Соединение берётся из пула только при первом запросе сессии к БД, а фиксация выполняется,
+    только если сессия начала транзакцию. Время удержания соединения учитывается в connection_hold.
+    Если основной сервер недоступен (см. DatabaseHealth), запрос сразу отклоняется с кодом 503
 
     Returns:
         AsyncGenerator[AsyncSession, None]: Асинхронная сессия, работа с которой
@@ -40,14 +781,58 @@ async def get_db_connection() -> AsyncGenerator[AsyncSession, None]:
         >>>print(result.scalars().all())
     """
 
+    db_health.reject_if_down()
     async with async_session_maker() as session:
         try:
             yield session
-            await session.commit()
+            if session.in_transaction():
+                await session.commit()
+                db_health.mark_up()
         except Exception as e:
+            if is_connection_error(e):
+                db_health.mark_down(e)
             desc = f"При работе с асинхронной сессией произошла ошибка: {str(e)}"
             logger.critical(desc, exc_info=True)
             await session.rollback()
             raise e
         finally:
-            await session.close()
\ No newline at end of file
+            await session.close()
+            _observe_connection_hold(session, "изменения")
+
+async def get_read_db_connection() -> AsyncGenerator[AsyncSession, None]:
+    """Возвращает асинхронную сессию для чтения
+
+    Возвращает сессию реплики, если с неё можно читать (см. ReplicaRouter), иначе сессию пула чтения основного сервера.
+    Сессия работает в режиме автофиксации: каждый запрос чтения выполняется без BEGIN и COMMIT.
+    Соединение берётся из пула при первом запросе и удерживается сессией до её закрытия в конце запроса к API.
+    Соединения открыты с default_transaction_read_only, поэтому запрос изменения в такой сессии отклоняется сервером
+    Предполагается использование только в эндпоинтах, которые ничего не изменяют в БД
+
+    Returns:
+        AsyncGenerator[AsyncSession, None]: Асинхронная сессия, работа с которой
+            происходит с использованием асинхронного контекстного менеджера
+
+    Raises:
+        Exception: В непредвиденной ситуации
+
+    Examples:
+        >>>async with get_read_db_connection() as session:
+        >>>result = await session.execute("SELECT * FROM db_name;")
+    """
+
+    use_replica = replica_router.use_replica()
+    session_maker = replica_session_maker if use_replica else read_session_maker
+    async with session_maker() as session:
+        try:
+            yield session
+            if session.in_transaction() and not use_replica:
+                db_health.mark_up()
+        except Exception as e:
+            if is_connection_error(e):
+                mark_connection_error(session, e)
+            desc = f"При работе с асинхронной сессией{' реплики' if use_replica else ''} произошла ошибка: {str(e)}"
+            logger.critical(desc, exc_info=True)
+            raise e
+        finally:
+            await session.close()
+            _observe_connection_hold(session, "чтения реплики" if use_replica else "чтения")
@@ -0,0 +1,64 @@
+from core.logger import setup_logger
+from core.config import settings
+from httpx import AsyncClient, Limits, Timeout
+from fastapi import Request
+import importlib.util
+
+logger = setup_logger("http_client")
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+
+def create_http_client() -> AsyncClient:
+    """Создаёт общий HTTP-клиент для внешних источников
+
+    Создаёт долгоживущий HTTP-клиент с пулом keep-alive соединений и явными таймаутами,
+    чтобы запросы к внешним источникам не устанавливали DNS/TCP/TLS-соединение заново
+    Предполагается создание одного клиента при старте сервера и его закрытие при остановке
+
+    Returns:
+        AsyncClient: Настроенный HTTP-клиент
+
+    Examples:
+        >>>http_client = create_http_client()
+        >>>await http_client.aclose()
+    """
+
+    http2 = settings.HTTP_HTTP2
+    if http2 and importlib.util.find_spec("h2") is None:
+        logger.warning("HTTP/2 включён в настройках, но пакет h2 не установлен, используется HTTP/1.1")
+        http2 = False
+    client = AsyncClient(
+        headers={"User-Agent": USER_AGENT},
+        timeout=Timeout(
+            connect=settings.HTTP_CONNECT_TIMEOUT,
+            read=settings.HTTP_READ_TIMEOUT,
+            write=settings.HTTP_READ_TIMEOUT,
+            pool=settings.HTTP_POOL_TIMEOUT
+        ),
+        limits=Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+        ),
+        http2=http2
+    )
+    logger.info(f"HTTP-клиент создан (http2={http2}, max_connections={settings.HTTP_MAX_CONNECTIONS})")
+    return client
+
+def get_http_client(request: Request) -> AsyncClient:
+    """Возвращает общий HTTP-клиент
+
+    Возвращает HTTP-клиент, созданный при старте сервера
+    Предполагается использование как зависимость в эндпоинтах
+
+    Args:
+        request (Request): Текущий запрос
+
+    Returns:
+        AsyncClient: Общий HTTP-клиент
+
+    Examples:
+        >>>async def endpoint(http_client: AsyncClient = Depends(get_http_client)):
+    """
+
+    return request.app.state.http_client
@@ -1,32 +1,326 @@
 from core.logger import setup_logger
 from core.config import settings
-from httpx import AsyncClient
+from httpx import AsyncClient, HTTPStatusError, Response
+from urllib.parse import urlsplit
+from collections import deque
+from typing import Optional
+import asyncio
+import time
+from page_cache import page_cache
+from page_archive import page_archive
+from metrics import cache_lookups
 from fastapi import HTTPException, status
 
 logger = setup_logger("interface")
 
+_host_semaphores: dict[str, asyncio.Semaphore] = {}
+
+def get_host_semaphore(host: str) -> asyncio.Semaphore:
+    """Возвращает семафор хоста
+
+    Возвращает общий для всех экземпляров ExternalInterface семафор, ограничивающий
+    кол-во одновременных запросов к одному хосту значением HTTP_MAX_CONNECTIONS_PER_HOST
+
+    Args:
+        host (str): Хост внешнего источника
+
+    Returns:
+        asyncio.Semaphore: Семафор хоста
+
+    Examples:
+        >>>async with get_host_semaphore("www.consultant.ru"):
+    """
+
+    semaphore = _host_semaphores.get(host)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(settings.HTTP_MAX_CONNECTIONS_PER_HOST)
+        _host_semaphores[host] = semaphore
+    return semaphore
+
+class CircuitBreaker:
+    """Автомат защиты внешнего источника
+
+    Класс описывает автомат (circuit breaker) одного внешнего источника. Автомат размыкается, если среди последних
+    window запросов доля ошибочных и медленных (дольше slow_call_seconds) достигла failure_rate. Разомкнутый автомат
+    не пропускает запросы к источнику, а через open_seconds пропускает один пробный запрос (полуразомкнутое состояние):
+    при его успехе автомат замыкается, при ошибке снова размыкается
+
+    Args:
+        name (str): Имя источника
+        window (int): Кол-во последних запросов, по которым считается доля ошибок
+        min_calls (int): Минимальное кол-во запросов в окне для размыкания
+        failure_rate (float): Доля ошибочных и медленных запросов, при которой автомат размыкается
+        slow_call_seconds (float): Задержка (сек.), начиная с которой запрос считается медленным
+        open_seconds (float): Время (сек.) до пробного запроса
+
+    Examples:
+        >>>breaker = CircuitBreaker("consultant", 10, 4, 0.5, 8.0, 30.0)
+        >>>if breaker.allow_request():
+    """
+
+    def __init__(self, name: str, window: int, min_calls: int, failure_rate: float, slow_call_seconds: float, open_seconds: float) -> None:
+        """Конструктор класса
+
+        Создаёт замкнутый автомат источника
+
+        Args:
+            self (Self@CircuitBreaker): Экземпляр класса
+            name (str): Имя источника
+            window (int): Кол-во последних запросов, по которым считается доля ошибок
+            min_calls (int): Минимальное кол-во запросов в окне для размыкания
+            failure_rate (float): Доля ошибочных и медленных запросов, при которой автомат размыкается
+            slow_call_seconds (float): Задержка (сек.), начиная с которой запрос считается медленным
+            open_seconds (float): Время (сек.) до пробного запроса
+        """
+
+        self.name = name
+        self._calls: deque[bool] = deque(maxlen=window)
+        self._min_calls = min_calls
+        self._failure_rate = failure_rate
+        self._slow_call_seconds = slow_call_seconds
+        self._open_seconds = open_seconds
+        self.state = "closed"
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def is_open(self) -> bool:
+        """Проверяет, разомкнут ли автомат
+
+        Args:
+            self (Self@CircuitBreaker): Экземпляр класса
+
+        Returns:
+            bool: True - к источнику сейчас нельзя обращаться, False - можно (в т.ч. пробным запросом)
+        """
+
+        if self.state == "open":
+            return time.monotonic() - self._opened_at < self._open_seconds
+        if self.state == "half_open":
+            return self._probe_in_flight
+        return False
+
+    def allow_request(self) -> bool:
+        """Разрешает запрос к источнику
+
+        Разрешает запрос в замкнутом состоянии; в разомкнутом после open_seconds переходит в полуразомкнутое
+        и разрешает ровно один пробный запрос
+
+        Args:
+            self (Self@CircuitBreaker): Экземпляр класса
+
+        Returns:
+            bool: True - запрос разрешён, False - запрос запрещён
+        """
+
+        if self.is_open():
+            return False
+        if self.state != "closed":
+            self.state = "half_open"
+            self._probe_in_flight = True
+            logger.info(f"Автомат источника {self.name} пропускает пробный запрос")
+        return True
+
+    def _open(self) -> None:
+        """Размыкает автомат
+
+        Args:
+            self (Self@CircuitBreaker): Экземпляр класса
+        """
+
+        self.state = "open"
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+        logger.warning(f"Автомат источника {self.name} разомкнут на {self._open_seconds} сек.")
+
+    def record_success(self, seconds: float) -> None:
+        """Записывает успешный запрос
+
+        Успешный, но медленный запрос считается ошибочным
+
+        Args:
+            self (Self@CircuitBreaker): Экземпляр класса
+            seconds (float): Задержка запроса (сек.)
+        """
+
+        if seconds >= self._slow_call_seconds:
+            logger.warning(f"Запрос к источнику {self.name} выполнялся {seconds:.3f} сек. и считается медленным")
+            self.record_failure()
+            return
+        if self.state == "half_open":
+            self.state = "closed"
+            self._probe_in_flight = False
+            self._calls.clear()
+            logger.info(f"Автомат источника {self.name} замкнут после успешного пробного запроса")
+        self._calls.append(True)
+
+    def record_failure(self) -> None:
+        """Записывает ошибочный запрос
+
+        Args:
+            self (Self@CircuitBreaker): Экземпляр класса
+        """
+
+        if self.state == "half_open":
+            self._open()
+            return
+        self._calls.append(False)
+        failures = self._calls.count(False)
+        if len(self._calls) >= self._min_calls and failures / len(self._calls) >= self._failure_rate:
+            self._calls.clear()
+            self._open()
+
+    def release(self) -> None:
+        """Освобождает пробный запрос
+
+        Вызывается, если запрос был отменён и не дал ни успеха, ни ошибки
+
+        Args:
+            self (Self@CircuitBreaker): Экземпляр класса
+        """
+
+        self._probe_in_flight = False
+
+circuit_breakers: dict[str, CircuitBreaker] = {
+    source: CircuitBreaker(
+        source,
+        settings.BREAKER_WINDOW,
+        settings.BREAKER_MIN_CALLS,
+        settings.BREAKER_FAILURE_RATE,
+        settings.BREAKER_SLOW_CALL_SECONDS,
+        settings.BREAKER_OPEN_SECONDS
+    )
+    for source in ("consultant", "hhru")
+}
+
 class ExternalInterface:
     """Интерфейс взаимодействия с внешними ресурсами
 
     Класс представляет собой интерфейс взаимодействия с внешними ресурсами, которые предоставляют данные производственных календарей
 
+    Args:
+        client (AsyncClient): Общий HTTP-клиент с пулом соединений
+
     Examples:
-        >>>external_interface = ExternalInterface()
+        >>>external_interface = ExternalInterface(http_client)
     """
 
-    def __init__(self) -> None:
+    def __init__(self, client: AsyncClient) -> None:
         """Конструктор класса
 
         Создаёт экземпляр класса для отправки запросов внешним источникам данных
 
         Args:
             self (Self@ExternalInterface): Экземпляр класса
+            client (AsyncClient): Общий HTTP-клиент с пулом соединений
         """
 
+        self._client = client
         self._consultant_url = settings.CONSULTANT_CALENDAR_URL
         self._hhru_url = settings.HHRU_CALENDAR_URL
 
-    async def get_consultant_calendar(self, year_str: str) -> str:
+    async def _get(self, url: str, **kwargs) -> Response:
+        """GET-запрос через общий клиент
+
+        Выполняет GET-запрос через общий HTTP-клиент, соблюдая ограничение одновременных запросов к хосту.
+        Ответ 304 Not Modified ошибкой не считается. Задержка запроса после получения семафора хоста (сек.)
+        записывается в response.extensions["request_seconds"]
+
+        Args:
+            self (Self@ExternalInterface): Экземпляр класса
+            url (str): Адрес запроса
+            **kwargs: Дополнительные параметры запроса httpx
+
+        Returns:
+            Response: Ответ внешнего источника
+
+        Raises:
+            Exception: В непредвиденной ситуации
+        """
+
+        async with get_host_semaphore(urlsplit(url).netloc):
+            started = time.perf_counter()
+            response = await self._client.get(url, **kwargs)
+        response.extensions["request_seconds"] = time.perf_counter() - started
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
+
+    async def _get_page(self, source: str, url: str, year_str: str, timeout: Optional[float], **kwargs) -> str:
+        """GET-запрос HTML-страницы с дисковым кэшем и автоматом защиты
+
+        Отдаёт страницу из дискового кэша, если она свежая; иначе перепроверяет её у источника
+        условным запросом (If-None-Match/If-Modified-Since) и при ответе 304 отдаёт закэшированную,
+        а при новом ответе сохраняет его в кэш и в архив
+        Если автомат источника разомкнут, сетевой запрос не выполняется: отдаётся устаревшая страница из кэша,
+        а при её отсутствии сразу возвращается ошибка
+        Автомат учитывает задержку самого запроса (см. _get), без ожидания семафора хоста
+
+        Args:
+            self (Self@ExternalInterface): Экземпляр класса
+            source (str): Источник (consultant или hhru)
+            url (str): Адрес страницы
+            year_str (str): Год календаря на странице в формате строки
+            timeout (Optional[float]): Бюджет задержки (сек.) сетевого запроса, None - без ограничения
+            **kwargs: Дополнительные параметры запроса httpx
+
+        Returns:
+            str: HTML-страница в формате строки
+
+        Raises:
+            HTTPException: Если автомат источника разомкнут и страницы нет в кэше
+            Exception: В непредвиденной ситуации
+        """
+
+        cached_page = None
+        if settings.PAGE_CACHE_ENABLED:
+            cached_page = await page_cache.load(url)
+            if cached_page and page_cache.is_fresh(cached_page, int(year_str[:4])):
+                logger.info(f"Страница url={url} получена из кэша")
+                cache_lookups.inc(("page", "hit"))
+                return cached_page["text"]
+        breaker = circuit_breakers[source]
+        if not breaker.allow_request():
+            if cached_page:
+                logger.warning(f"Автомат источника {source} разомкнут, отдаём устаревшую страницу url={url} из кэша")
+                return cached_page["text"]
+            desc = f"Автомат источника {source} разомкнут, запрос на url={url} не выполняется"
+            logger.warning(desc)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=desc
+            )
+        headers = page_cache.conditional_headers(cached_page) if cached_page else {}
+        try:
+            response = await asyncio.wait_for(self._get(url, headers=headers, **kwargs), timeout)
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except asyncio.TimeoutError:
+            breaker.record_failure()
+            raise TimeoutError(f"Превышен бюджет задержки {timeout:.3f} сек.")
+        except HTTPStatusError as e:
+            if e.response.status_code < 500: #источник исправен, просто страницы (ещё) нет
+                breaker.record_success(e.response.extensions["request_seconds"])
+            else:
+                breaker.record_failure()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        breaker.record_success(response.extensions["request_seconds"])
+        if response.status_code == 304 and cached_page:
+            logger.info(f"Страница url={url} не изменилась (304), используется кэш")
+            cache_lookups.inc(("page", "revalidated"))
+            await page_cache.touch(url)
+            return cached_page["text"]
+        if settings.PAGE_CACHE_ENABLED:
+            cache_lookups.inc(("page", "miss"))
+            await page_cache.store(url, response.text, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        if settings.ARCHIVE_ENABLED:
+            await page_archive.store(source, year_str, url, response.text)
+        return response.text
+
+    async def get_consultant_calendar(self, year_str: str, timeout: Optional[float] = None) -> str:
         """GET-запрос к Консультанту
 
         Выполняет асинхронный GET-запрос с эмуляцией браузерного запроса для получения HTML-страницы производственного календаря от Консультанта
@@ -34,6 +328,7 @@ class ExternalInterface:
         Args:
             self (Self@ExternalInterface): Экземпляр класса
             year_str (str): Год в формате строки
+            timeout (Optional[float]): Бюджет задержки (сек.) запроса, None - без ограничения
 
         Returns:
             str: HTML-страница в формате строки
@@ -45,24 +340,20 @@ class ExternalInterface:
             >>>response_text = await external_interface.get_consultant_calendar("2025")
         """
 
-        async with AsyncClient() as client:
-            try:
-                url = f"{self._consultant_url}/law/ref/calendar/proizvodstvennye/{year_str}/"
-                headers = {
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-                }
-                response = await client.get(url, headers=headers)
-                response.raise_for_status()
-                return response.text
-            except Exception as e:
-                desc = f"При выполнении GET-запрос на url={url} произошла ошибка: {str(e)}"
-                logger.error(desc, exc_info=True)
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=desc
-                )
-
-    async def get_hhru_calendar(self, year_str: str) -> str:
+        url = f"{self._consultant_url}/law/ref/calendar/proizvodstvennye/{year_str}/"
+        try:
+            return await self._get_page("consultant", url, year_str, timeout)
+        except HTTPException as e:
+            raise e
+        except Exception as e:
+            desc = f"При выполнении GET-запрос на url={url} произошла ошибка: {str(e)}"
+            logger.error(desc, exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=desc
+            )
+
+    async def get_hhru_calendar(self, year_str: str, timeout: Optional[float] = None) -> str:
         """GET-запрос к hh.ru
 
         Выполняет асинхронный GET-запрос с эмуляцией браузерного запроса для получения HTML-страницы производственного календаря от hh.ru
@@ -70,6 +361,7 @@ class ExternalInterface:
         Args:
             self (Self@ExternalInterface): Экземпляр класса
             year_str (str): Год в формате строки
+            timeout (Optional[float]): Бюджет задержки (сек.) запроса, None - без ограничения
 
         Returns:
             str: HTML-страница в формате строки
@@ -81,19 +373,15 @@ class ExternalInterface:
             >>>response_text = await external_interface.get_hhru_calendar("2025")
         """
 
-        async with AsyncClient() as client:
-            try:
-                url = f"{self._hhru_url}/article/calendar{year_str}"
-                headers = {
-                    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-                }
-                response = await client.get(url, headers=headers, follow_redirects=True)
-                response.raise_for_status()
-                return response.text
-            except Exception as e:
-                desc = f"При выполнении GET-запрос на url={url} произошла ошибка: {str(e)}"
-                logger.error(desc, exc_info=True)
-                raise HTTPException(
-                    status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                    detail=desc
-                )
\ No newline at end of file
+        url = f"{self._hhru_url}/article/calendar{year_str}"
+        try:
+            return await self._get_page("hhru", url, year_str, timeout, follow_redirects=True)
+        except HTTPException as e:
+            raise e
+        except Exception as e:
+            desc = f"При выполнении GET-запрос на url={url} произошла ошибка: {str(e)}"
+            logger.error(desc, exc_info=True)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=desc
+            )
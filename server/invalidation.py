@@ -0,0 +1,169 @@
+from core.logger import setup_logger
+from core.config import settings
+from services.calendar_cache import calendar_cache
+from snapshot import calendar_snapshot
+from database import replica_router
+from datetime import date
+from typing import Optional
+from sqlalchemy.engine import make_url
+import asyncio
+import asyncpg
+import json
+import random
+
+logger = setup_logger("invalidation")
+
+class InvalidationListener:
+    """Слушатель уведомлений об изменении календаря
+
+    Класс держит отдельное от пула SQLAlchemy соединение asyncpg, подписанное (LISTEN) на канал,
+    в который репозиторий календарных дней отправляет NOTIFY при каждом изменении дней,
+    и сбрасывает в кэше лет этого воркера только затронутые годы, а также запускает пересоздание снимка хоста (snapshot.py)
+    Потеря соединения обнаруживается по его закрытию или по неответу на периодическую проверку, после чего кэш
+    отключается, а соединение переустанавливается с экспоненциальной задержкой. После переподключения кэш
+    начинается с пустого, так как уведомления, отправленные во время разрыва, потеряны
+
+    Args:
+        channel (str): Канал уведомлений
+        keepalive (float): Период (сек.) проверки соединения
+        reconnect_max (float): Максимальная задержка (сек.) перед переподключением
+
+    Examples:
+        >>>invalidation_listener = InvalidationListener("calendar_changed", 30.0, 30.0)
+        >>>invalidation_listener.start()
+    """
+
+    def __init__(self, channel: str, keepalive: float, reconnect_max: float) -> None:
+        """Конструктор класса
+
+        Создаёт экземпляр слушателя, само соединение устанавливается методом start
+
+        Args:
+            self (Self@InvalidationListener): Экземпляр класса
+            channel (str): Канал уведомлений
+            keepalive (float): Период (сек.) проверки соединения
+            reconnect_max (float): Максимальная задержка (сек.) перед переподключением
+        """
+
+        self._channel = channel
+        self._keepalive = keepalive
+        self._reconnect_max = reconnect_max
+        self._task: Optional[asyncio.Task] = None
+        self.connected = False
+        self.reconnects = 0
+        self.received = 0
+
+    def start(self) -> None:
+        """Запускает фоновую задачу слушателя
+
+        Предполагается использование только при старте сервера
+
+        Args:
+            self (Self@InvalidationListener): Экземпляр класса
+        """
+
+        self._task = asyncio.create_task(self._loop(), name="invalidation-listener")
+        logger.info(f"Слушатель уведомлений канала {self._channel} запущен")
+
+    async def stop(self) -> None:
+        """Останавливает фоновую задачу слушателя и закрывает соединение
+
+        Предполагается использование только при остановке сервера
+
+        Args:
+            self (Self@InvalidationListener): Экземпляр класса
+        """
+
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            logger.info(f"Слушатель уведомлений канала {self._channel} остановлен")
+
+    def _on_notification(self, connection: asyncpg.Connection, pid: int, channel: str, payload: str) -> None:
+        """Обрабатывает уведомление об изменении календаря
+
+        Args:
+            self (Self@InvalidationListener): Экземпляр класса
+            connection (asyncpg.Connection): Соединение слушателя
+            pid (int): Id процесса PostgreSQL, отправившего уведомление
+            channel (str): Канал уведомления
+            payload (str): JSON с изменённым периодом (date_start, date_end) и новой версией календаря
+        """
+
+        self.received += 1
+        try:
+            message = json.loads(payload)
+            years = calendar_cache.invalidate(
+                date.fromisoformat(message["date_start"]),
+                date.fromisoformat(message["date_end"]),
+                int(message["version"])
+            )
+            replica_router.mark_write()
+            logger.info(f"Календарь изменён (version={message['version']}), сброшены годы {years}")
+            if settings.SNAPSHOT_ENABLED:
+                calendar_snapshot.schedule_refresh()
+        except Exception as e:
+            logger.warning(f"Не удалось разобрать уведомление {payload!r}, кэш сброшен полностью: {str(e)}")
+            calendar_cache.reset()
+            if settings.SNAPSHOT_ENABLED:
+                calendar_snapshot.schedule_refresh()
+
+    async def _listen(self, connection: asyncpg.Connection) -> None:
+        """Слушает канал, пока соединение живо
+
+        Args:
+            self (Self@InvalidationListener): Экземпляр класса
+            connection (asyncpg.Connection): Соединение слушателя
+
+        Raises:
+            ConnectionError: Если соединение потеряно
+        """
+
+        lost = asyncio.Event()
+        connection.add_termination_listener(lambda _: lost.set())
+        await connection.add_listener(self._channel, self._on_notification)
+        version = await connection.fetchval("SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM calendar_version_seq")
+        year_versions = {row["year"]: row["version"] for row in await connection.fetch("SELECT year, version FROM calendar_year_version")}
+        calendar_cache.trust(version, year_versions)
+        if settings.SNAPSHOT_ENABLED:
+            calendar_snapshot.on_connected(version)
+        self.connected = True
+        logger.info(f"Слушатель подписан на канал {self._channel}, версия календаря {version}")
+        while True:
+            try:
+                await asyncio.wait_for(lost.wait(), self._keepalive)
+                raise ConnectionError("Соединение закрыто")
+            except asyncio.TimeoutError:
+                await asyncio.wait_for(connection.fetchval("SELECT 1"), self._keepalive)
+
+    async def _loop(self) -> None:
+        """Цикл подключения слушателя
+
+        Args:
+            self (Self@InvalidationListener): Экземпляр класса
+        """
+
+        dsn = make_url(settings.POSTGRESQL_URL.get_secret_value()).set(drivername="postgresql").render_as_string(hide_password=False)
+        delay = 1.0
+        while True:
+            connection: Optional[asyncpg.Connection] = None
+            try:
+                connection = await asyncpg.connect(dsn, timeout=self._keepalive)
+                delay = 1.0
+                await self._listen(connection)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Слушатель уведомлений канала {self._channel} отключён: {str(e)}, переподключение через {delay:.1f} сек.")
+            finally:
+                if self.connected:
+                    self.reconnects += 1
+                self.connected = False
+                calendar_cache.distrust()
+                if connection is not None:
+                    connection.terminate()
+            await asyncio.sleep(delay + random.uniform(0, delay / 2))
+            delay = min(delay * 2, self._reconnect_max)
+
+invalidation_listener = InvalidationListener(settings.INVALIDATION_CHANNEL, settings.INVALIDATION_KEEPALIVE, settings.INVALIDATION_RECONNECT_MAX)
@@ -1,19 +1,33 @@
 from core.logger import setup_logger
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, status
-from database import engine, Base
+from database import engine, read_engine, replica_engine, replica_router, db_health, pool_status, connection_hold, statement_cache, Base
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 import router
 import uvicorn
 from core.config import settings
+from services.jobs import job_runner
+from http_client import create_http_client
+from parse_pool import parse_pool
+from services.sync import sync_scheduler
+from invalidation import invalidation_listener
+from snapshot import calendar_snapshot
+from shared_cache import shared_cache
+from services.calendar_cache import calendar_cache
+from single_flight import flights
+from metrics import MetricFamily, MetricsMiddleware, render_metrics
 
 logger = setup_logger("main")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Создание таблицы БД
+    """Создание таблиц БД, HTTP-клиента и запуск фоновых задач
 
-    Создаёт таблицу БД при старте сервиса
+    Создаёт таблицы БД, запускает проверку пула основного сервера, слушатель уведомлений об изменении календаря
+    и проверку реплики, создаёт общий HTTP-клиент
+    для внешних источников, запускает пул парсинга HTML-страниц,
+    воркеры фоновых задач и планировщик синхронизации при старте сервиса, останавливает их при остановке сервиса
     Предполагается использование только при старте сервера
 
     Args:
@@ -28,6 +42,17 @@ async def lifespan(app: FastAPI):
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
         logger.info("Таблица создана")
+        db_health.start()
+        if settings.SNAPSHOT_ENABLED:
+            calendar_snapshot.start(settings.SNAPSHOT_REFRESH_INTERVAL)
+        if settings.CALENDAR_CACHE_ENABLED:
+            invalidation_listener.start()
+        replica_router.start()
+        app.state.http_client = create_http_client()
+        parse_pool.start()
+        await job_runner.start(app.state.http_client)
+        if settings.SYNC_ENABLED:
+            sync_scheduler.start(app.state.http_client)
     except Exception as e:
         desc = f"При создании таблицы произошла ошибка: {str(e)}"
         logger.error(desc, exc_info=True)
@@ -37,7 +62,19 @@ async def lifespan(app: FastAPI):
         )
     yield
     logger.info("Остановка сервера")
+    await sync_scheduler.stop()
+    await job_runner.stop()
+    await invalidation_listener.stop()
+    await calendar_snapshot.stop()
+    await shared_cache.close()
+    await replica_router.stop()
+    await db_health.stop()
+    await app.state.http_client.aclose()
+    await parse_pool.stop()
     await engine.dispose()
+    await read_engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
 
 app = FastAPI(
     title="Calendar-API",
@@ -53,6 +90,8 @@ app.add_middleware(
     allow_headers=["*"]
 )
 
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(router.router)
 
 @app.get("/")
@@ -67,6 +106,110 @@ async def root() -> dict:
     """
     return {"message": "Calendar-API is running..."}
 
+@app.get("/ready")
+async def ready() -> dict:
+    """Готовность сервера
+
+    Отдаёт результат последней фоновой проверки PostgreSQL без обращения к БД. Сервер готов, если основной
+    сервер доступен или чтение можно обслуживать из локального снимка календаря (деградированный режим)
+    Предполагается использование только в роутинге
+
+    Returns:
+        dict: Состояние основного сервера, реплики и снимка
+
+    Raises:
+        HTTPException: Если основной сервер недоступен, а снимка нет
+    """
+
+    result = db_health.status()
+    result["replica"] = None if replica_engine is None else ("up" if replica_router.healthy else "down")
+    result["snapshot_version"] = calendar_snapshot.version if settings.SNAPSHOT_ENABLED and calendar_snapshot.read_at else None
+    if db_health.down and result["snapshot_version"] is None:
+        desc = f"Сервер не готов: БД недоступна, снимка календаря нет ({result})"
+        logger.warning(desc)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=desc
+        )
+    result["status"] = "degraded" if db_health.down else "ready"
+    return result
+
+@app.get("/pool")
+async def pool() -> dict:
+    """Состояние пулов соединений PostgreSQL
+
+    Отдаёт размер пулов, кол-во выданных, простаивающих и дополнительных соединений, таймауты и гистограмму
+    ожидания соединения, а также время удержания соединений запросами. Помогает подобрать размер пула
+    под кол-во воркеров и увидеть его насыщение под нагрузкой
+    Предполагается использование только в роутинге
+
+    Returns:
+        dict: Состояние пулов изменения и чтения основного сервера, пула реплики и время удержания соединений
+    """
+
+    result = pool_status()
+    result["connection_hold"] = connection_hold.stats()
+    return result
+
+def _component_metrics() -> list[MetricFamily]:
+    """Метрики из статистики компонентов сервера
+
+    Returns:
+        list[MetricFamily]: Метрики кэшей, объединения запросов, снимка, пулов и доступности БД
+    """
+
+    year_cache = calendar_cache.stats()
+    l2_cache = shared_cache.stats()
+    statements = statement_cache.stats()
+    hold = connection_hold.stats()
+    families: list[MetricFamily] = [
+        ("http_requests_in_flight", "gauge", "Кол-во запросов к API в обработке", [({}, MetricsMiddleware.in_flight)]),
+        ("calendar_year_cache_lookups_total", "counter", "Обращения к кэшу лет воркера", [
+            ({"result": "hit"}, year_cache["hits"]), ({"result": "miss"}, year_cache["misses"])
+        ]),
+        ("calendar_year_cache_years", "gauge", "Кол-во лет в кэше воркера", [({}, year_cache["years"])]),
+        ("calendar_version", "gauge", "Версия календаря, известная воркеру", [({}, year_cache["version"])]),
+        ("shared_cache_lookups_total", "counter", "Обращения к общему кэшу узлов", [
+            ({"result": "hit"}, l2_cache["hits"]), ({"result": "miss"}, l2_cache["misses"]), ({"result": "error"}, l2_cache["errors"])
+        ]),
+        ("single_flight_requests_total", "counter", "Запросы групп объединения: выполненные и ожидавшие чужое выполнение", [
+            sample for flight in flights for sample in (
+                ({"group": flight.name, "result": "executed"}, flight.executed),
+                ({"group": flight.name, "result": "coalesced"}, flight.coalesced)
+            )
+        ]),
+        ("calendar_snapshot_served_total", "counter", "Периоды, отданные из снимка календаря", [({}, calendar_snapshot.served)]),
+        ("calendar_snapshot_refreshes_total", "counter", "Пересоздания снимка календаря этим воркером", [({}, calendar_snapshot.refreshes)]),
+        ("db_statement_cache_total", "counter", "Запросы по исходу обращения к кэшу скомпилированных запросов", [
+            ({"result": "hit"}, statements["hits"]), ({"result": "miss"}, statements["misses"]), ({"result": "uncached"}, statements["uncached"])
+        ]),
+        ("db_connection_hold_seconds_max", "gauge", "Максимальное время удержания соединения запросом к API", [({}, hold["max_ms"] / 1000)]),
+        ("db_up", "gauge", "Доступность основного сервера PostgreSQL", [({}, 0 if db_health.down else 1)]),
+        ("db_invalidation_listener_connected", "gauge", "Подключение слушателя уведомлений об изменениях", [({}, int(invalidation_listener.connected))])
+    ]
+    pools = [("primary", engine), ("read", read_engine)] + ([("replica", replica_engine)] if replica_engine is not None else [])
+    pool_states = pool_status()
+    for key in ("size", "checked_out", "idle", "overflow"):
+        families.append((f"db_pool_{key}", "gauge", f"Пул соединений PostgreSQL: {key}", [({"pool": name}, pool_states[name][key]) for name, _ in pools]))
+    families.append(("db_pool_timeouts_total", "counter", "Таймауты ожидания соединения пула", [({"pool": name}, db_engine.pool.stats.timeouts) for name, db_engine in pools]))
+    families.append(("db_pool_wait_seconds", "histogram", "Ожидание соединения пула", [({"pool": name}, db_engine.pool.stats.wait) for name, db_engine in pools]))
+    return families
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """Метрики сервера в текстовом формате Prometheus
+
+    Отдаёт кол-во, время обработки и размер ответов запросов по эндпоинтам, запросы в обработке, время этапов
+    формирования календаря по периоду, время получения и парсинга страниц внешних источников, обращения к кэшам
+    и состояние пулов соединений. Метрики накапливаются в памяти воркера без обращения к БД
+    Предполагается использование только в роутинге
+
+    Returns:
+        PlainTextResponse: Метрики в формате text/plain; version=0.0.4
+    """
+
+    return PlainTextResponse(render_metrics(_component_metrics()), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     logger.info("API-сервис производственного календаря запущен")
     uvicorn.run(
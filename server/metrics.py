@@ -0,0 +1,334 @@
+from bisect import bisect_left
+from typing import Any, Awaitable, Callable, Sequence
+import time
+
+LATENCY_BUCKETS: tuple[float, ...] = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STAGE_BUCKETS: tuple[float, ...] = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5)
+SIZE_BUCKETS: tuple[float, ...] = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+MetricFamily = tuple[str, str, str, list[tuple[dict[str, Any], Any]]] #имя, тип, описание, значения (число или Histogram) с метками
+
+class Histogram:
+    """Гистограмма значений с фиксированными границами корзин
+
+    Наблюдение стоит одного двоичного поиска по границам и двух сложений, поэтому гистограмму можно
+    обновлять на каждом запросе. Корзины хранятся не накопительно, накопительные счётчики (как в Prometheus)
+    считаются при чтении
+
+    Args:
+        buckets (Sequence[float]): Верхние границы корзин по возрастанию, корзина +Inf добавляется сама
+
+    Examples:
+        >>>histogram = Histogram(LATENCY_BUCKETS)
+        >>>histogram.observe(0.003)
+    """
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        """Конструктор класса
+
+        Args:
+            self (Self@Histogram): Экземпляр класса
+            buckets (Sequence[float]): Верхние границы корзин по возрастанию
+        """
+
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        """Учитывает значение
+
+        Args:
+            self (Self@Histogram): Экземпляр класса
+            value (float): Значение
+        """
+
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> list[tuple[float, int]]:
+        """Накопительные счётчики корзин
+
+        Args:
+            self (Self@Histogram): Экземпляр класса
+
+        Returns:
+            list[tuple[float, int]]: Пары (верхняя граница, кол-во значений не больше неё), последняя граница - +Inf
+        """
+
+        result, total = [], 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def snapshot(self) -> dict:
+        """Состояние гистограммы для JSON-ответов
+
+        Args:
+            self (Self@Histogram): Экземпляр класса
+
+        Returns:
+            dict: Кол-во и сумма значений и накопительные счётчики корзин по их границам
+        """
+
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "buckets": {("+Inf" if bound == float("inf") else str(bound)): count for bound, count in self.cumulative()}
+        }
+
+def _format_labels(labels: dict[str, Any]) -> str:
+    """Метки значения в формате Prometheus
+
+    Args:
+        labels (dict[str, Any]): Метки
+
+    Returns:
+        str: Метки в фигурных скобках или пустая строка
+    """
+
+    if not labels:
+        return ""
+    pairs = []
+    for name, value in labels.items():
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+def _format_value(value: float) -> str:
+    """Значение в формате Prometheus
+
+    Args:
+        value (float): Значение
+
+    Returns:
+        str: Значение, бесконечность - +Inf
+    """
+
+    return "+Inf" if value == float("inf") else repr(float(value)) if isinstance(value, float) else str(value)
+
+def _render_histogram(lines: list[str], name: str, labels: dict[str, Any], histogram: Histogram) -> None:
+    """Добавляет значения гистограммы в текстовом формате Prometheus
+
+    Args:
+        lines (list[str]): Строки ответа
+        name (str): Имя метрики
+        labels (dict[str, Any]): Метки
+        histogram (Histogram): Гистограмма
+    """
+
+    for bound, count in histogram.cumulative():
+        lines.append(f"{name}_bucket{_format_labels({**labels, 'le': _format_value(bound)})} {count}")
+    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}")
+    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+
+class LabeledHistogram:
+    """Набор гистограмм по значениям меток
+
+    Гистограмма для новой комбинации меток создаётся при первом наблюдении
+
+    Args:
+        name (str): Имя метрики
+        description (str): Описание метрики
+        label_names (tuple[str, ...]): Имена меток
+        buckets (Sequence[float]): Верхние границы корзин
+
+    Examples:
+        >>>period_stages = LabeledHistogram("calendar_period_stage_seconds", "Этапы", ("stage",), STAGE_BUCKETS)
+        >>>period_stages.observe(("merge_days",), 0.0002)
+    """
+
+    def __init__(self, name: str, description: str, label_names: tuple[str, ...], buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        """Конструктор класса
+
+        Args:
+            self (Self@LabeledHistogram): Экземпляр класса
+            name (str): Имя метрики
+            description (str): Описание метрики
+            label_names (tuple[str, ...]): Имена меток
+            buckets (Sequence[float]): Верхние границы корзин
+        """
+
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self.buckets = tuple(buckets)
+        self.histograms: dict[tuple, Histogram] = {}
+
+    def observe(self, labels: tuple, value: float) -> None:
+        """Учитывает значение
+
+        Args:
+            self (Self@LabeledHistogram): Экземпляр класса
+            labels (tuple): Значения меток в порядке label_names
+            value (float): Значение
+        """
+
+        histogram = self.histograms.get(labels)
+        if histogram is None:
+            histogram = self.histograms[labels] = Histogram(self.buckets)
+        histogram.observe(value)
+
+    def render(self, lines: list[str]) -> None:
+        """Добавляет метрику в текстовом формате Prometheus
+
+        Args:
+            self (Self@LabeledHistogram): Экземпляр класса
+            lines (list[str]): Строки ответа
+        """
+
+        lines.append(f"# HELP {self.name} {self.description}")
+        lines.append(f"# TYPE {self.name} histogram")
+        for labels, histogram in list(self.histograms.items()):
+            _render_histogram(lines, self.name, dict(zip(self.label_names, labels)), histogram)
+
+class LabeledCounter:
+    """Счётчики по значениям меток
+
+    Args:
+        name (str): Имя метрики (с суффиксом _total)
+        description (str): Описание метрики
+        label_names (tuple[str, ...]): Имена меток
+
+    Examples:
+        >>>cache_lookups = LabeledCounter("cache_lookups_total", "Обращения к кэшам", ("cache", "result"))
+        >>>cache_lookups.inc(("page", "hit"))
+    """
+
+    def __init__(self, name: str, description: str, label_names: tuple[str, ...]) -> None:
+        """Конструктор класса
+
+        Args:
+            self (Self@LabeledCounter): Экземпляр класса
+            name (str): Имя метрики
+            description (str): Описание метрики
+            label_names (tuple[str, ...]): Имена меток
+        """
+
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self.values: dict[tuple, int] = {}
+
+    def inc(self, labels: tuple, amount: int = 1) -> None:
+        """Увеличивает счётчик
+
+        Args:
+            self (Self@LabeledCounter): Экземпляр класса
+            labels (tuple): Значения меток в порядке label_names
+            amount (int): Приращение
+        """
+
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self, lines: list[str]) -> None:
+        """Добавляет метрику в текстовом формате Prometheus
+
+        Args:
+            self (Self@LabeledCounter): Экземпляр класса
+            lines (list[str]): Строки ответа
+        """
+
+        lines.append(f"# HELP {self.name} {self.description}")
+        lines.append(f"# TYPE {self.name} counter")
+        for labels, value in list(self.values.items()):
+            lines.append(f"{self.name}{_format_labels(dict(zip(self.label_names, labels)))} {value}")
+
+http_requests = LabeledCounter("http_requests_total", "Кол-во запросов к API", ("method", "route", "status"))
+http_request_duration = LabeledHistogram("http_request_duration_seconds", "Время обработки запроса к API", ("method", "route"))
+http_response_size = LabeledHistogram("http_response_size_bytes", "Размер тела ответа API", ("method", "route"), SIZE_BUCKETS)
+period_stages = LabeledHistogram("calendar_period_stage_seconds", "Время этапов формирования календаря по периоду", ("stage",), STAGE_BUCKETS)
+period_sources = LabeledCounter("calendar_period_source_total", "Источник дней БД календаря по периоду", ("source",))
+external_stages = LabeledHistogram("external_source_seconds", "Время получения (fetch) и парсинга (parse) страницы внешнего источника", ("source", "phase"))
+external_requests = LabeledCounter("external_source_requests_total", "Исходы запросов к внешним источникам", ("source", "outcome"))
+cache_lookups = LabeledCounter("cache_lookups_total", "Обращения к кэшам внешних календарей", ("cache", "result"))
+
+REGISTRY: list = [http_requests, http_request_duration, http_response_size, period_stages, period_sources, external_stages, external_requests, cache_lookups]
+
+class MetricsMiddleware:
+    """ASGI-middleware учёта запросов к API
+
+    Учитывает кол-во запросов по методу, шаблону пути эндпоинта и коду ответа, время обработки, размер тела ответа
+    (в том числе потокового) и кол-во запросов в обработке. Запросы, не совпавшие ни с одним эндпоинтом,
+    учитываются с путём unmatched, чтобы кол-во меток не росло от произвольных адресов
+
+    Args:
+        app (Callable): Следующее ASGI-приложение
+
+    Examples:
+        >>>app.add_middleware(MetricsMiddleware)
+    """
+
+    in_flight = 0
+
+    def __init__(self, app: Callable[..., Awaitable[None]]) -> None:
+        """Конструктор класса
+
+        Args:
+            self (Self@MetricsMiddleware): Экземпляр класса
+            app (Callable): Следующее ASGI-приложение
+        """
+
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        """Обрабатывает запрос
+
+        Args:
+            self (Self@MetricsMiddleware): Экземпляр класса
+            scope (dict): Параметры соединения ASGI
+            receive (Callable): Получение сообщений ASGI
+            send (Callable): Отправка сообщений ASGI
+        """
+
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status_code = 500
+        size = 0
+
+        async def send_with_metrics(message: dict) -> None:
+            nonlocal status_code, size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        MetricsMiddleware.in_flight += 1
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            MetricsMiddleware.in_flight -= 1
+            route = scope.get("route")
+            labels = (scope["method"], getattr(route, "path", "unmatched"))
+            http_requests.inc(labels + (status_code,))
+            http_request_duration.observe(labels, time.perf_counter() - started)
+            http_response_size.observe(labels, size)
+
+def render_metrics(families: list[MetricFamily]) -> str:
+    """Все метрики в текстовом формате Prometheus
+
+    Args:
+        families (list[MetricFamily]): Дополнительные метрики, собранные из статистики компонентов
+
+    Returns:
+        str: Текст ответа /metrics
+    """
+
+    lines: list[str] = []
+    for metric in REGISTRY:
+        metric.render(lines)
+    for name, metric_type, description, samples in families:
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        for labels, value in samples:
+            if isinstance(value, Histogram):
+                _render_histogram(lines, name, labels, value)
+            else:
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
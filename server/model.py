@@ -1,5 +1,7 @@
 from database import Base
-from sqlalchemy import Column, Integer, Date, String
+from sqlalchemy import Column, Integer, BigInteger, Date, String, DateTime, Text, JSON, Sequence
+
+calendar_version_seq = Sequence("calendar_version_seq", metadata=Base.metadata) #версия календаря, растёт при каждом изменении дней
 
 class CalendarDay(Base):
     """Описывает таблицу календарных дней
@@ -75,4 +77,160 @@ class CalendarDay(Base):
         return (
             f"<Day(id={self.id};date={self.date};type_id={self.type_id};"
             f"type_text={self.type_text};note={self.note};week_day={self.week_day})>"
-        )
\ No newline at end of file
+        )
+
+class CalendarYearVersion(Base):
+    """Описывает таблицу версий лет календаря
+
+    Класс описывает ORM-модель версии года: версию календаря (calendar_version_seq), в которой дни года
+    изменялись последний раз. Версия года входит в ключи общего кэша, поэтому одинакова для всех узлов
+
+    Attributes:
+        __tablename__ (str): Название таблицы
+        year (Integer): Год
+        version (BigInteger): Версия последнего изменения дней года
+
+    Examples:
+        >>>calendar_year_version = CalendarYearVersion(year=...,version=...)
+    """
+
+    __tablename__: str = "calendar_year_version"
+
+    year = Column(
+        Integer,
+        primary_key=True,
+        autoincrement=False,
+        comment="Год"
+    )
+    version = Column(
+        BigInteger,
+        nullable=False,
+        comment="Версия последнего изменения дней года"
+    )
+
+class ImportJob(Base):
+    """Описывает таблицу фоновых задач
+
+    Класс описывает ORM-модель фоновой задачи (вставка производственного календаря, синхронизация
+    с внешним источником), которая выполняется вне HTTP-запроса и может быть возобновлена после перезапуска
+
+    Attributes:
+        __tablename__ (str): Название таблицы
+        id (Integer): Id задачи
+        kind (String): Тип задачи
+        status (String): Статус задачи (pending, running, done, failed)
+        payload (JSON): Входные данные задачи
+        result (JSON): Результат задачи
+        error (Text): Описание ошибки задачи
+        rows_total (Integer): Общее кол-во обрабатываемых дней
+        rows_validated (Integer): Кол-во провалидированных дней
+        rows_written (Integer): Кол-во записанных в БД дней
+        created_at (DateTime): Время создания задачи
+        started_at (DateTime): Время запуска задачи
+        finished_at (DateTime): Время завершения задачи
+        heartbeat_at (DateTime): Время последнего обновления прогресса задачи
+
+    Examples:
+        >>>import_job = ImportJob(kind=...,...)
+    """
+
+    __tablename__: str = "import_job"
+
+    id = Column(
+        Integer,
+        primary_key=True,
+        index=True,
+        comment="Id задачи"
+    )
+    kind = Column(
+        String(32),
+        nullable=False,
+        comment="Тип задачи"
+    )
+    status = Column(
+        String(16),
+        nullable=False,
+        default="pending",
+        index=True,
+        comment="Статус задачи"
+    )
+    payload = Column(
+        JSON,
+        nullable=False,
+        comment="Входные данные задачи"
+    )
+    result = Column(
+        JSON,
+        nullable=True,
+        default=None,
+        comment="Результат задачи"
+    )
+    error = Column(
+        Text,
+        nullable=True,
+        default=None,
+        comment="Описание ошибки задачи"
+    )
+    rows_total = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        comment="Общее кол-во обрабатываемых дней"
+    )
+    rows_validated = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        comment="Кол-во провалидированных дней"
+    )
+    rows_written = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        comment="Кол-во записанных в БД дней"
+    )
+    created_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        comment="Время создания задачи"
+    )
+    started_at = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        default=None,
+        comment="Время запуска задачи"
+    )
+    finished_at = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        default=None,
+        comment="Время завершения задачи"
+    )
+    heartbeat_at = Column(
+        DateTime(timezone=True),
+        nullable=True,
+        default=None,
+        comment="Время последнего обновления прогресса задачи"
+    )
+
+    def __repr__(self) -> str:
+        """Понятно выводит информацию об экземпляре
+
+        Выводит информацию об экземпляре в понятном виде
+
+        Args:
+            self (Self@ImportJob): Экземпляр класса ImportJob
+
+        Returns:
+            str: Строка с основными полями экземпляра
+
+        Examples:
+            >>>import_job = ImportJob(kind=...,...)
+            >>>print(import_job)
+            >>>`<ImportJob(id=...,...)>`
+        """
+
+        return (
+            f"<ImportJob(id={self.id};kind={self.kind};status={self.status};rows_total={self.rows_total};"
+            f"rows_validated={self.rows_validated};rows_written={self.rows_written})>"
+        )
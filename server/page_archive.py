@@ -0,0 +1,280 @@
+from core.logger import setup_logger
+from core.config import settings
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Optional
+from services.external_utils import parse_consultant_days, parse_hhru_days
+import asyncio
+import fcntl
+import gzip
+import hashlib
+import json
+import os
+import uuid
+
+logger = setup_logger("page_archive")
+
+def _reparse_file(source: str, body_path: str) -> list[tuple[int, int, str]]:
+    """Парсит страницу архива в процессе-воркере
+
+    Процессу передаётся только путь к странице, а сама страница читается и распаковывается в нём
+
+    Args:
+        source (str): Источник (consultant или hhru)
+        body_path (str): Путь сжатой страницы
+
+    Returns:
+        list[tuple[int, int, str]]: Список дней вида (месяц, день, вид дня)
+
+    Raises:
+        RuntimeError: Если парсинг завершился ошибкой
+    """
+
+    with gzip.open(body_path, "rb") as body_file:
+        response_text = body_file.read().decode("utf-8")
+    parser = parse_consultant_days if source == "consultant" else parse_hhru_days
+    try:
+        return parser(response_text)
+    except Exception as e:
+        raise RuntimeError(str(getattr(e, "detail", e))) from None
+
+class PageArchive:
+    """Архив HTML-страниц внешних источников
+
+    Класс хранит все различающиеся версии страниц источников, сжатые gzip, вместе с хэшем содержимого (sha256)
+    и временем получения, чтобы после исправления парсера календари можно было пересобрать без повторных запросов
+    к источникам. Версии страницы лежат в директории {source}/{year_str}, их метаданные дописываются в index.jsonl
+    при каждой смене версии, последняя запись индекса - текущая версия страницы. Для каждой страницы хранятся
+    только последние max_versions записей индекса, тела версий, на которые они больше не ссылаются, удаляются
+
+    Args:
+        directory (str): Директория архива
+        processes (int): Кол-во процессов для массового перепарсинга
+        max_versions (int): Кол-во хранимых записей индекса (смен версии) одной страницы
+
+    Examples:
+        >>>page_archive = PageArchive("cache/archive", 2, 20)
+        >>>await page_archive.store("consultant", "2025", url, response_text)
+    """
+
+    def __init__(self, directory: str, processes: int, max_versions: int) -> None:
+        """Конструктор класса
+
+        Создаёт экземпляр архива, сама директория создаётся при первой записи
+
+        Args:
+            self (Self@PageArchive): Экземпляр класса
+            directory (str): Директория архива
+            processes (int): Кол-во процессов для массового перепарсинга
+            max_versions (int): Кол-во хранимых записей индекса (смен версии) одной страницы
+        """
+
+        self._directory = directory
+        self._processes = processes
+        self._max_versions = max_versions
+
+    def _store(self, source: str, year_str: str, url: str, text: str) -> Optional[str]:
+        """Синхронно сохраняет версию страницы
+
+        Тело версии записывается, только если его ещё нет в архиве. Запись в index.jsonl добавляется,
+        если версия отличается от последней записанной: так страница, вернувшаяся к прежней версии (A→B→A),
+        снова становится последней. Страницу одновременно могут сохранять несколько воркеров с общей директорией
+        архива, поэтому запись выполняется под файловой блокировкой страницы, а временный файл уникален
+        для процесса и потока. Затем лишние записи индекса и тела версий удаляются (см. _prune)
+
+        Args:
+            self (Self@PageArchive): Экземпляр класса
+            source (str): Источник (consultant или hhru)
+            year_str (str): Год страницы в формате строки
+            url (str): URL страницы
+            text (str): Текст страницы
+
+        Returns:
+            Optional[str]: Хэш записанной версии, либо None, если она и так последняя в архиве
+        """
+
+        body = text.encode("utf-8")
+        content_hash = hashlib.sha256(body).hexdigest()
+        page_dir = os.path.join(self._directory, source, year_str)
+        os.makedirs(page_dir, exist_ok=True)
+        with open(os.path.join(page_dir, "index.lock"), "wb") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                return self._store_locked(source, year_str, page_dir, url, body, content_hash)
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _store_locked(self, source: str, year_str: str, page_dir: str, url: str, body: bytes, content_hash: str) -> Optional[str]:
+        """Сохраняет версию страницы под файловой блокировкой страницы
+
+        Args:
+            self (Self@PageArchive): Экземпляр класса
+            source (str): Источник (consultant или hhru)
+            year_str (str): Год страницы в формате строки
+            page_dir (str): Директория страницы
+            url (str): URL страницы
+            body (bytes): Тело страницы
+            content_hash (str): Хэш тела страницы (sha256)
+
+        Returns:
+            Optional[str]: Хэш записанной версии, либо None, если она и так последняя в архиве
+        """
+
+        versions = self.versions(source, year_str)
+        if versions and versions[-1]["sha256"] == content_hash:
+            return None
+        body_path = os.path.join(page_dir, f"{content_hash}.html.gz")
+        if not os.path.exists(body_path):
+            tmp_path = f"{body_path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+            try:
+                with gzip.open(tmp_path, "wb") as body_file:
+                    body_file.write(body)
+                os.replace(tmp_path, body_path)
+            except Exception:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+        versions.append({
+            "sha256": content_hash,
+            "url": url,
+            "size": len(body),
+            "fetched_at": datetime.now(timezone.utc).isoformat()
+        })
+        if len(versions) > self._max_versions:
+            self._prune(page_dir, versions)
+        else:
+            with open(os.path.join(page_dir, "index.jsonl"), "a", encoding="utf-8") as index_file:
+                index_file.write(json.dumps(versions[-1]) + "\n")
+        return content_hash
+
+    def _prune(self, page_dir: str, versions: list[dict]) -> None:
+        """Оставляет последние max_versions записей индекса страницы
+
+        Индекс атомарно заменяется сокращённым, после чего удаляются тела версий, на которые он больше не ссылается
+
+        Args:
+            self (Self@PageArchive): Экземпляр класса
+            page_dir (str): Директория страницы
+            versions (list[dict]): Все записи индекса, включая новую
+        """
+
+        kept = versions[-self._max_versions:]
+        index_path = os.path.join(page_dir, "index.jsonl")
+        tmp_path = f"{index_path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as index_file:
+                index_file.writelines(json.dumps(version) + "\n" for version in kept)
+            os.replace(tmp_path, index_path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        kept_hashes = {version["sha256"] for version in kept}
+        for version in versions[:-self._max_versions]:
+            if version["sha256"] not in kept_hashes:
+                kept_hashes.add(version["sha256"]) #тело одной версии может упоминаться в индексе несколько раз
+                body_path = os.path.join(page_dir, f"{version['sha256']}.html.gz")
+                if os.path.exists(body_path):
+                    os.remove(body_path)
+
+    async def store(self, source: str, year_str: str, url: str, text: str) -> None:
+        """Сохраняет страницу в архив
+
+        Сохраняет страницу, только если она (по хэшу содержимого) отличается от последней версии в архиве
+
+        Args:
+            self (Self@PageArchive): Экземпляр класса
+            source (str): Источник (consultant или hhru)
+            year_str (str): Год страницы в формате строки
+            url (str): URL страницы
+            text (str): Текст страницы
+        """
+
+        try:
+            content_hash = await asyncio.to_thread(self._store, source, year_str, url, text)
+            if content_hash:
+                logger.info(f"В архив записана версия страницы {source}/{year_str} sha256={content_hash}")
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить в архив страницу {source}/{year_str}: {str(e)}")
+
+    def versions(self, source: str, year_str: str) -> list[dict]:
+        """Список версий страницы
+
+        Args:
+            self (Self@PageArchive): Экземпляр класса
+            source (str): Источник (consultant или hhru)
+            year_str (str): Год страницы в формате строки
+
+        Returns:
+            list[dict]: Метаданные версий (sha256, url, size, fetched_at) в порядке получения
+        """
+
+        index_path = os.path.join(self._directory, source, year_str, "index.jsonl")
+        if not os.path.exists(index_path):
+            return []
+        with open(index_path, "r", encoding="utf-8") as index_file:
+            return [json.loads(line) for line in index_file if line.strip()]
+
+    def latest_pages(self) -> dict[tuple[str, str], str]:
+        """Последние версии всех страниц архива
+
+        Args:
+            self (Self@PageArchive): Экземпляр класса
+
+        Returns:
+            dict[tuple[str, str], str]: Путь последней версии страницы по ключу (источник, год страницы в формате строки)
+        """
+
+        pages: dict[tuple[str, str], str] = {}
+        for source in ("consultant", "hhru"):
+            source_dir = os.path.join(self._directory, source)
+            if not os.path.isdir(source_dir):
+                continue
+            for year_str in sorted(os.listdir(source_dir)):
+                versions = self.versions(source, year_str)
+                if versions:
+                    pages[(source, year_str)] = os.path.join(source_dir, year_str, f"{versions[-1]['sha256']}.html.gz")
+        return pages
+
+    async def reparse(self, years: Optional[list[int]] = None) -> dict[int, tuple[str, list[tuple[int, int, str]]]]:
+        """Перепарсивает архив текущими парсерами
+
+        Парсит последние версии страниц архива в пуле процессов, не обращаясь к источникам.
+        Для каждого года берётся календарь Консультанта (исправленная редакция вида 2024b важнее обычной),
+        а при его отсутствии или ошибке - календарь hh.ru
+
+        Args:
+            self (Self@PageArchive): Экземпляр класса
+            years (Optional[list[int]]): Перепарсиваемые годы, по умолчанию все годы архива
+
+        Returns:
+            dict[int, tuple[str, list[tuple[int, int, str]]]]: Источник и список дней по году календаря
+
+        Examples:
+            >>>raw_calendars = await page_archive.reparse([2020, 2024])
+        """
+
+        pages = {
+            key: path for key, path in self.latest_pages().items()
+            if years is None or int(key[1][:4]) in years
+        }
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(max_workers=self._processes) as executor:
+            keys = list(pages)
+            results = await asyncio.gather(
+                *(loop.run_in_executor(executor, _reparse_file, source, pages[(source, year_str)]) for source, year_str in keys),
+                return_exceptions=True
+            )
+        parsed: dict[tuple[str, str], list[tuple[int, int, str]]] = {}
+        for key, result in zip(keys, results):
+            if isinstance(result, BaseException) or not result:
+                logger.warning(f"Страница архива {key[0]}/{key[1]} не распознана: {str(result) if isinstance(result, BaseException) else 'нет дней'}")
+                continue
+            parsed[key] = result
+        raw_calendars: dict[int, tuple[str, list[tuple[int, int, str]]]] = {}
+        for (source, year_str) in sorted(parsed, key=lambda key: (key[0] == "consultant", key[1])): #Консультант и редакции "b" перезаписывают остальные
+            raw_calendars[int(year_str[:4])] = (source, parsed[(source, year_str)])
+        logger.info(f"Архив перепарсен: страниц {len(pages)}, распознано {len(parsed)}, лет {len(raw_calendars)}")
+        return raw_calendars
+
+page_archive = PageArchive(settings.ARCHIVE_DIR, settings.ARCHIVE_REPARSE_PROCESSES, settings.ARCHIVE_MAX_VERSIONS)
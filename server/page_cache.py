@@ -0,0 +1,219 @@
+from core.logger import setup_logger
+from core.config import settings
+from datetime import datetime, timezone
+from typing import Optional
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import uuid
+
+logger = setup_logger("page_cache")
+
+class PageCache:
+    """Дисковый кэш HTML-страниц внешних источников
+
+    Класс хранит сжатые gzip HTML-страницы внешних источников по их URL в одном файле с ETag/Last-Modified,
+    чтобы страницы не скачивались заново. Политика свежести зависит от года календаря:
+    страница прошедшего года, скачанная уже после его окончания, не меняется и не перепроверяется никогда,
+    остальные страницы перепроверяются условным запросом не чаще раза в current_year_ttl секунд
+
+    Args:
+        directory (str): Директория кэша
+        current_year_ttl (int): Время (сек.), после которого страница текущего года перепроверяется
+
+    Examples:
+        >>>page_cache = PageCache("cache/pages", 3600)
+        >>>cached_page = await page_cache.load(url)
+    """
+
+    def __init__(self, directory: str, current_year_ttl: int) -> None:
+        """Конструктор класса
+
+        Создаёт экземпляр дискового кэша, сама директория создаётся при первой записи
+
+        Args:
+            self (Self@PageCache): Экземпляр класса
+            directory (str): Директория кэша
+            current_year_ttl (int): Время (сек.), после которого страница текущего года перепроверяется
+        """
+
+        self._directory = directory
+        self._current_year_ttl = current_year_ttl
+
+    def _path(self, url: str) -> str:
+        """Путь файла страницы
+
+        Args:
+            self (Self@PageCache): Экземпляр класса
+            url (str): URL страницы
+
+        Returns:
+            str: Путь сжатого файла с метаданными и текстом страницы
+        """
+
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return os.path.join(self._directory, f"{key}.json.gz")
+
+    def _load(self, url: str) -> Optional[dict]:
+        """Синхронно читает страницу и её метаданные с диска
+
+        Args:
+            self (Self@PageCache): Экземпляр класса
+            url (str): URL страницы
+
+        Returns:
+            Optional[dict]: Метаданные и текст страницы, либо None, если страницы нет в кэше
+        """
+
+        path = self._path(url)
+        if not os.path.exists(path):
+            return None
+        with gzip.open(path, "rb") as page_file:
+            return json.loads(page_file.read().decode("utf-8"))
+
+    def _write(self, page: dict) -> None:
+        """Атомарно записывает страницу вместе с метаданными
+
+        Метаданные и текст лежат в одном файле, поэтому читатель не может увидеть новый текст со старым ETag.
+        Временный файл уникален для процесса и потока: страницу одновременно могут записывать
+        несколько потоков воркера и несколько воркеров с общей директорией кэша
+
+        Args:
+            self (Self@PageCache): Экземпляр класса
+            page (dict): Метаданные страницы и её текст в поле text
+        """
+
+        os.makedirs(self._directory, exist_ok=True)
+        path = self._path(page["url"])
+        tmp_path = f"{path}.{os.getpid()}.{uuid.uuid4().hex}.tmp"
+        try:
+            with gzip.open(tmp_path, "wb") as page_file:
+                page_file.write(json.dumps(page, ensure_ascii=False).encode("utf-8"))
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _store(self, url: str, text: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        """Синхронно записывает страницу и её метаданные на диск
+
+        Args:
+            self (Self@PageCache): Экземпляр класса
+            url (str): URL страницы
+            text (str): Текст страницы
+            etag (Optional[str]): Заголовок ETag ответа
+            last_modified (Optional[str]): Заголовок Last-Modified ответа
+        """
+
+        self._write({
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "fetched_at": datetime.now(timezone.utc).isoformat(),
+            "text": text
+        })
+
+    def _touch(self, url: str) -> None:
+        """Синхронно обновляет время получения страницы
+
+        Args:
+            self (Self@PageCache): Экземпляр класса
+            url (str): URL страницы
+        """
+
+        page = self._load(url)
+        if page is None:
+            return
+        page["fetched_at"] = datetime.now(timezone.utc).isoformat()
+        self._write(page)
+
+    async def load(self, url: str) -> Optional[dict]:
+        """Получает страницу из кэша
+
+        Args:
+            self (Self@PageCache): Экземпляр класса
+            url (str): URL страницы
+
+        Returns:
+            Optional[dict]: Метаданные страницы (etag, last_modified, fetched_at) и её текст в поле text,
+                либо None, если страницы нет в кэше или её не удалось прочитать
+        """
+
+        try:
+            return await asyncio.to_thread(self._load, url)
+        except Exception as e:
+            logger.warning(f"Не удалось прочитать из кэша страницу url={url}: {str(e)}")
+            return None
+
+    async def store(self, url: str, text: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        """Сохраняет страницу в кэш
+
+        Атомарно (через временный файл) сохраняет сжатую страницу вместе с её метаданными
+
+        Args:
+            self (Self@PageCache): Экземпляр класса
+            url (str): URL страницы
+            text (str): Текст страницы
+            etag (Optional[str]): Заголовок ETag ответа
+            last_modified (Optional[str]): Заголовок Last-Modified ответа
+        """
+
+        try:
+            await asyncio.to_thread(self._store, url, text, etag, last_modified)
+        except Exception as e:
+            logger.warning(f"Не удалось сохранить в кэш страницу url={url}: {str(e)}")
+
+    async def touch(self, url: str) -> None:
+        """Продлевает свежесть страницы
+
+        Обновляет время получения страницы после ответа 304 Not Modified
+
+        Args:
+            self (Self@PageCache): Экземпляр класса
+            url (str): URL страницы
+        """
+
+        try:
+            await asyncio.to_thread(self._touch, url)
+        except Exception as e:
+            logger.warning(f"Не удалось обновить в кэше страницу url={url}: {str(e)}")
+
+    def is_fresh(self, cached_page: dict, year: int) -> bool:
+        """Проверяет свежесть страницы
+
+        Args:
+            self (Self@PageCache): Экземпляр класса
+            cached_page (dict): Страница из кэша
+            year (int): Год календаря на странице
+
+        Returns:
+            bool: True - страницу можно отдать без обращения к источнику, False - нужна перепроверка
+        """
+
+        fetched_at = datetime.fromisoformat(cached_page["fetched_at"])
+        if fetched_at.year > year: #страница скачана после окончания своего года и больше не изменится
+            return True
+        return (datetime.now(timezone.utc) - fetched_at).total_seconds() < self._current_year_ttl
+
+    @staticmethod
+    def conditional_headers(cached_page: dict) -> dict[str, str]:
+        """Заголовки условного запроса
+
+        Args:
+            cached_page (dict): Страница из кэша
+
+        Returns:
+            dict[str, str]: Заголовки If-None-Match/If-Modified-Since для перепроверки страницы
+        """
+
+        headers: dict[str, str] = {}
+        if cached_page.get("etag"):
+            headers["If-None-Match"] = cached_page["etag"]
+        if cached_page.get("last_modified"):
+            headers["If-Modified-Since"] = cached_page["last_modified"]
+        return headers
+
+page_cache = PageCache(settings.PAGE_CACHE_DIR, settings.PAGE_CACHE_CURRENT_YEAR_TTL)
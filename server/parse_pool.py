@@ -0,0 +1,161 @@
+from core.logger import setup_logger
+from core.config import settings
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+from services.external_utils import parse_consultant_days, parse_hhru_days
+from fastapi import HTTPException, status
+import asyncio
+
+logger = setup_logger("parse_pool")
+
+def _parse_in_worker(source: str, response_text: str) -> list[tuple[int, int, str]]:
+    """Парсит HTML-страницу в воркере пула
+
+    Выполняется в отдельном процессе или потоке: принимает только HTML-страницу и возвращает компактный список дней.
+    HTTPException заменяется на RuntimeError, чтобы ошибка гарантированно передалась из процесса-воркера
+
+    Args:
+        source (str): Источник (consultant или hhru)
+        response_text (str): HTML-страница источника
+
+    Returns:
+        list[tuple[int, int, str]]: Список дней вида (месяц, день, вид дня)
+
+    Raises:
+        RuntimeError: Если парсинг завершился ошибкой
+    """
+
+    parser = parse_consultant_days if source == "consultant" else parse_hhru_days
+    try:
+        return parser(response_text)
+    except HTTPException as e:
+        raise RuntimeError(e.detail) from None
+
+class ParsePool:
+    """Пул парсинга HTML-страниц
+
+    Класс выносит синхронный парсинг HTML-страниц внешних источников из event loop
+    в пул процессов (PARSE_EXECUTOR=process) или потоков (PARSE_EXECUTOR=thread), чтобы парсинг
+    одной страницы не задерживал остальные запросы воркера сервера. Если пул не запущен
+    (например, вне сервера), парсинг выполняется в потоке по умолчанию через asyncio.to_thread.
+    Пул процессов, сломанный аварийным завершением воркера (OOM, segfault), пересоздаётся
+
+    Args:
+        executor_type (str): Тип пула (process или thread)
+        size (int): Кол-во воркеров пула
+
+    Examples:
+        >>>parse_pool = ParsePool("process", 2)
+        >>>raw_days = await parse_pool.parse("consultant", response_text)
+    """
+
+    def __init__(self, executor_type: str, size: int) -> None:
+        """Конструктор класса
+
+        Создаёт экземпляр пула парсинга, сами воркеры запускаются методом start
+
+        Args:
+            self (Self@ParsePool): Экземпляр класса
+            executor_type (str): Тип пула (process или thread)
+            size (int): Кол-во воркеров пула
+        """
+
+        self._executor_type = executor_type
+        self._size = size
+        self._executor: Optional[Executor] = None
+
+    def _create_executor(self) -> Executor:
+        """Создаёт пул заданного типа
+
+        Args:
+            self (Self@ParsePool): Экземпляр класса
+
+        Returns:
+            Executor: Пул процессов или потоков
+        """
+
+        if self._executor_type == "process":
+            return ProcessPoolExecutor(max_workers=self._size)
+        return ThreadPoolExecutor(max_workers=self._size, thread_name_prefix="parse")
+
+    def start(self) -> None:
+        """Запускает пул
+
+        Предполагается использование только при старте сервера
+
+        Args:
+            self (Self@ParsePool): Экземпляр класса
+        """
+
+        self._executor = self._create_executor()
+        logger.info(f"Пул парсинга запущен (executor={self._executor_type}, size={self._size})")
+
+    async def stop(self) -> None:
+        """Останавливает пул
+
+        Ожидает завершения воркеров в отдельном потоке, чтобы не блокировать event loop
+        Предполагается использование только при остановке сервера
+
+        Args:
+            self (Self@ParsePool): Экземпляр класса
+        """
+
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+            logger.info("Пул парсинга остановлен")
+
+    def _recreate(self, broken_executor: Executor) -> None:
+        """Пересоздаёт сломанный пул процессов
+
+        Пул пересоздаётся один раз, даже если о поломке сообщили несколько одновременных парсингов
+
+        Args:
+            self (Self@ParsePool): Экземпляр класса
+            broken_executor (Executor): Сломанный пул
+        """
+
+        if self._executor is not broken_executor:
+            return
+        logger.warning("Пул парсинга сломан аварийным завершением воркера и пересоздаётся")
+        broken_executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = self._create_executor()
+
+    async def parse(self, source: str, response_text: str) -> list[tuple[int, int, str]]:
+        """Парсит HTML-страницу источника вне event loop
+
+        Args:
+            self (Self@ParsePool): Экземпляр класса
+            source (str): Источник (consultant или hhru)
+            response_text (str): HTML-страница источника
+
+        Returns:
+            list[tuple[int, int, str]]: Список дней вида (месяц, день, вид дня)
+
+        Raises:
+            HTTPException: Если парсинг завершился ошибкой
+
+        Examples:
+            >>>raw_days = await parse_pool.parse("hhru", response_text)
+        """
+
+        try:
+            if self._executor is None:
+                return await asyncio.to_thread(_parse_in_worker, source, response_text)
+            loop = asyncio.get_running_loop()
+            executor = self._executor
+            try:
+                return await loop.run_in_executor(executor, _parse_in_worker, source, response_text)
+            except BrokenProcessPool:
+                self._recreate(executor)
+                return await loop.run_in_executor(self._executor, _parse_in_worker, source, response_text)
+        except Exception as e:
+            desc = f"При парсинге календаря источника {source} в пуле произошла ошибка: {str(e)}"
+            logger.error(desc)
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=desc
+            )
+
+parse_pool = ParsePool(settings.PARSE_EXECUTOR, settings.PARSE_POOL_SIZE)
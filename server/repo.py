@@ -1,15 +1,36 @@
 from core.logger import setup_logger
 from sqlalchemy.ext.asyncio import AsyncSession
-from model import CalendarDay
+from model import CalendarDay, CalendarYearVersion, ImportJob, calendar_version_seq
 from typing import Optional
 from schemas.schemas import CalendarDayInDB
-from datetime import date
-from sqlalchemy import select
+from datetime import date, datetime, timezone
+from sqlalchemy import select, update, or_, and_, tuple_, literal_column, func, lambda_stmt
+from sqlalchemy.sql.lambdas import StatementLambdaElement
+from core.config import settings
+from services.calendar_cache import calendar_cache
+from database import replica_router, is_connection_error, mark_connection_error
+import json
 from sqlalchemy.dialects.postgresql import insert
 from fastapi import HTTPException, status
 
 logger = setup_logger("repo")
 
+def _days_by_period_query(date_start: date, date_end: date) -> StatementLambdaElement:
+    """Запрос календарных дней по периоду
+
+    Запрос собирается лямбда-выражением: SQLAlchemy строит и компилирует его один раз, а в следующих
+    вызовах только подставляет даты периода как параметры
+
+    Args:
+        date_start (date): Дата начала периода
+        date_end (date): Дата конца периода
+
+    Returns:
+        StatementLambdaElement: Запрос дней периода, отсортированных по дате
+    """
+
+    return lambda_stmt(lambda: select(CalendarDay).where(CalendarDay.date >= date_start, CalendarDay.date <= date_end).order_by(CalendarDay.date))
+
 class CalendarDayRepository:
     """Репозиторий CRUD-логики календарных дней
 
@@ -35,6 +56,31 @@ class CalendarDayRepository:
 
         self._session = session
 
+    async def _notify_changed(self, date_start: date, date_end: date) -> int:
+        """Уведомляет воркеры об изменении дней
+
+        Получает новую версию календаря, записывает её версией затронутых лет
+        и отправляет NOTIFY с изменённым периодом и версией в текущей транзакции,
+        поэтому уведомление доставляется слушателям только после фиксации транзакции, а при откате не доставляется
+
+        Args:
+            self (Self@CalendarDayRepository): Экземпляр класса
+            date_start (date): Первый изменённый день
+            date_end (date): Последний изменённый день
+
+        Returns:
+            int: Новая версия календаря
+        """
+
+        version = await self._session.scalar(select(calendar_version_seq.next_value()))
+        query = insert(CalendarYearVersion).values([
+            {"year": year, "version": version} for year in range(date_start.year, date_end.year + 1)
+        ])
+        await self._session.execute(query.on_conflict_do_update(index_elements=["year"], set_={"version": query.excluded.version}))
+        payload = json.dumps({"date_start": date_start.isoformat(), "date_end": date_end.isoformat(), "version": version})
+        await self._session.execute(select(func.pg_notify(settings.INVALIDATION_CHANNEL, payload)))
+        return version
+
     async def create_day(self, day_data: CalendarDay) -> CalendarDayInDB:
         """Создаёт календарный день
 
@@ -48,7 +94,7 @@ class CalendarDayRepository:
             CalendarDayInDB: Представление созданного календарного дня в БД
 
         Raises:
-            HTTPException: В непредвиденной ситуации
+            HTTPException: 503, если потеряно соединение с БД (включается деградированный режим), иначе 400
 
         Examples:
             >>>created_day = await repo.create_day(CalendarDay(date=...,...))
@@ -57,7 +103,11 @@ class CalendarDayRepository:
         try:
             logger.info(f"Пробуем создать календарный день с данными: {day_data}")
             self._session.add(day_data)
+            await self._session.flush()
+            version = await self._notify_changed(day_data.date, day_data.date)
             await self._session.commit()
+            calendar_cache.invalidate(day_data.date, day_data.date, version)
+            replica_router.mark_write()
             await self._session.refresh(day_data)
             logger.info(f"Календарный день успешно создан (перед валидацией): {day_data}")
             return CalendarDayInDB.model_validate(day_data)
@@ -65,29 +115,36 @@ class CalendarDayRepository:
             desc = f"При создании дня date={day_data.date} произошла ошибка: {str(e)}"
             logger.error(desc, exc_info=True)
             await self._session.rollback()
+            if is_connection_error(e):
+                mark_connection_error(self._session, e)
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail=desc
+                )
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=desc
             )
 
-    async def insert_production_calendar(self, days_list: list[CalendarDay]) -> int:
+    async def insert_production_calendar(self, days_list: list[CalendarDay]) -> dict[str, int]:
         """Вставляет производственный календарь
 
         Вставляет в БД большое количество календарных дней за раз.
-        При конфликте (день существует) обновляет поля дня
+        При конфликте (день существует) обновляет поля дня, но только если они действительно изменились,
+        неизменённые дни не перезаписываются и не порождают лишних записей в WAL
 
         Args:
             self (Self@CalendarDayRepository): Экземпляр класса
             days_list (list[CalendarDay]): Список календарных дней
 
         Returns:
-            int: Кол-во успешных вставок в БД
+            dict[str, int]: Кол-во вставленных, обновлённых и неизменённых дней
 
         Raises:
             Exception: В непредвиденной ситуации
 
         Examples:
-            >>>inserted_days = await repo.insert_production_calendar([CalendarDay(...),...])
+            >>>counts = await repo.insert_production_calendar([CalendarDay(...),...])
         """
 
         try:
@@ -99,21 +156,94 @@ class CalendarDayRepository:
                 "note": day.note,
                 "week_day": day.week_day
             } for day in days_list])
-            query = query.on_conflict_do_update(index_elements=["date"], set_={
-                "type_id": query.excluded.type_id,
-                "type_text": query.excluded.type_text,
-                "note": query.excluded.note,
-                "week_day": query.excluded.week_day
-            })
-            await self._session.execute(query)
+            query = query.on_conflict_do_update(
+                index_elements=["date"],
+                set_={
+                    "type_id": query.excluded.type_id,
+                    "type_text": query.excluded.type_text,
+                    "note": query.excluded.note,
+                    "week_day": query.excluded.week_day
+                },
+                where=tuple_(
+                    CalendarDay.type_id,
+                    CalendarDay.type_text,
+                    CalendarDay.note,
+                    CalendarDay.week_day
+                ).is_distinct_from(tuple_(
+                    query.excluded.type_id,
+                    query.excluded.type_text,
+                    query.excluded.note,
+                    query.excluded.week_day
+                ))
+            ).returning(literal_column("(xmax = 0)").label("inserted"), CalendarDay.date) #xmax = 0 только у только что вставленных строк
+            result = await self._session.execute(query)
+            rows = result.all()
+            inserted_flags = [row.inserted for row in rows]
+            changed_dates = [row.date for row in rows]
+            version = None
+            if changed_dates:
+                version = await self._notify_changed(min(changed_dates), max(changed_dates))
             await self._session.commit()
-            inserted = len(days_list)
-            logger.info(f"Вставка прошла успешно, было добавлено/обновлено {inserted} календарных дней")
-            return inserted
+            if version is not None:
+                calendar_cache.invalidate(min(changed_dates), max(changed_dates), version)
+                replica_router.mark_write()
+            inserted = sum(1 for flag in inserted_flags if flag)
+            counts = {
+                "inserted": inserted,
+                "updated": len(inserted_flags) - inserted,
+                "unchanged": len(days_list) - len(inserted_flags)
+            }
+            logger.info(f"Вставка прошла успешно: {counts}")
+            return counts
         except Exception as e:
             await self._session.rollback()
             raise e
 
+    async def diff_production_calendar(self, days_list: list[CalendarDay]) -> dict[str, int]:
+        """Сравнивает производственный календарь с БД
+
+        Считает, сколько дней из списка будет вставлено, обновлено или останется неизменным
+        при вставке производственного календаря, при этом ничего не записывает в БД
+
+        Args:
+            self (Self@CalendarDayRepository): Экземпляр класса
+            days_list (list[CalendarDay]): Список календарных дней
+
+        Returns:
+            dict[str, int]: Кол-во дней, которые будут вставлены, обновлены и останутся неизменными
+
+        Raises:
+            Exception: В непредвиденной ситуации
+
+        Examples:
+            >>>counts = await repo.diff_production_calendar([CalendarDay(...),...])
+        """
+
+        try:
+            logger.info(f"Пробуем сравнить с БД {len(days_list)} календарных дней")
+            query = select(
+                CalendarDay.date,
+                CalendarDay.type_id,
+                CalendarDay.type_text,
+                CalendarDay.note,
+                CalendarDay.week_day
+            ).where(CalendarDay.date.in_([day.date for day in days_list]))
+            result = await self._session.execute(query)
+            db_days = {row.date: (row.type_id, row.type_text, row.note, row.week_day) for row in result.all()}
+            counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+            for day in days_list:
+                db_day = db_days.get(day.date)
+                if db_day is None:
+                    counts["inserted"] += 1
+                elif db_day != (day.type_id, day.type_text, day.note, day.week_day):
+                    counts["updated"] += 1
+                else:
+                    counts["unchanged"] += 1
+            logger.info(f"Сравнение прошло успешно: {counts}")
+            return counts
+        except Exception as e:
+            raise e
+
     async def get_days_by_period(self, date_start: date, date_end: date) -> list[CalendarDayInDB]:
         """Получает календарные дни по периоду
 
@@ -136,7 +266,7 @@ class CalendarDayRepository:
 
         try:
             logger.info(f"Пробуем получить календарные дни по периоду date_start={date_start}, date_end={date_end}")
-            query = select(CalendarDay).where(CalendarDay.date >= date_start, CalendarDay.date <= date_end).order_by(CalendarDay.date)
+            query = _days_by_period_query(date_start, date_end)
             result = await self._session.execute(query)
             list_of_days = result.scalars().all()
             if list_of_days:
@@ -152,6 +282,35 @@ class CalendarDayRepository:
         except Exception as e:
             raise e
 
+    async def get_days_by_year(self, year: int) -> list[CalendarDayInDB]:
+        """Получает все календарные дни года
+
+        Используется для заполнения кэша лет, поэтому, в отличие от get_days_by_period, отсутствие дней не является ошибкой
+
+        Args:
+            self (Self@CalendarDayRepository): Экземпляр класса
+            year (int): Год
+
+        Returns:
+            list[CalendarDayInDB]: Список календарных дней года, возможно пустой
+
+        Raises:
+            Exception: В непредвиденной ситуации
+
+        Examples:
+            >>>db_days = await repo.get_days_by_year(2025)
+        """
+
+        try:
+            logger.info(f"Пробуем получить календарные дни года year={year}")
+            query = _days_by_period_query(date(year, 1, 1), date(year, 12, 31))
+            result = await self._session.execute(query)
+            list_of_days = result.scalars().all()
+            logger.info(f"Календарные дни года year={year} успешно получены, их {len(list_of_days)}")
+            return [CalendarDayInDB.model_validate(day) for day in list_of_days]
+        except Exception as e:
+            raise e
+
     async def get_day_by_date(self, date: date) -> Optional[CalendarDay]:
         """Получает календарный день по дате
 
@@ -173,7 +332,7 @@ class CalendarDayRepository:
 
         try:
             logger.info(f"Пробуем получить день date={date}")
-            query = select(CalendarDay).where(CalendarDay.date == date)
+            query = lambda_stmt(lambda: select(CalendarDay).where(CalendarDay.date == date))
             result = await self._session.execute(query)
             received_day = result.scalars().first()
             if received_day:
@@ -218,7 +377,12 @@ class CalendarDayRepository:
                 received_day.type_text = day_data.type_text
                 received_day.note = day_data.note
                 received_day.week_day = day_data.week_day
+                await self._session.flush()
+                changed_start, changed_end = min(date, day_data.date), max(date, day_data.date) #дату дня тоже можно изменить
+                version = await self._notify_changed(changed_start, changed_end)
                 await self._session.commit()
+                calendar_cache.invalidate(changed_start, changed_end, version)
+                replica_router.mark_write()
                 await self._session.refresh(received_day)
                 logger.info(f"Календарный день date={date} успешно обновлён (перед валидацией): {received_day}")
                 return CalendarDayInDB.model_validate(received_day)
@@ -257,7 +421,11 @@ class CalendarDayRepository:
             calendar_day = await self.get_day_by_date(date)
             if calendar_day:
                 await self._session.delete(calendar_day)
+                await self._session.flush()
+                version = await self._notify_changed(date, date)
                 await self._session.commit()
+                calendar_cache.invalidate(date, date, version)
+                replica_router.mark_write()
                 logger.info(f"Календарный день date={date} успешно удалён")
                 return True
             else:
@@ -269,4 +437,207 @@ class CalendarDayRepository:
                 )
         except Exception as e:
             await self._session.rollback()
-            raise e
\ No newline at end of file
+            raise e
+
+class ImportJobRepository:
+    """Репозиторий фоновых задач
+
+    Класс описывает методы для работы с таблицей фоновых задач, а именно:
+    создание задачи; получение задачи; захват задачи на выполнение; обновление прогресса задачи
+
+    Args:
+        session (AsyncSession): Асинхронная сессия для выполнения запросов к БД
+
+    Examples:
+        >>>repo = ImportJobRepository(session)
+    """
+
+    def __init__(self, session: AsyncSession) -> None:
+        """Конструктор класса
+
+        Создаёт экземпляр класса для работы с асинхронной сессией БД PostgreSQL
+
+        Args:
+            self (Self@ImportJobRepository): Экземпляр класса
+            session (AsyncSession): Асинхронная сессия для выполнения запросов к БД
+        """
+
+        self._session = session
+
+    async def create_job(self, kind: str, payload: dict, rows_total: int) -> ImportJob:
+        """Создаёт фоновую задачу
+
+        Создаёт фоновую задачу в статусе pending
+
+        Args:
+            self (Self@ImportJobRepository): Экземпляр класса
+            kind (str): Тип задачи
+            payload (dict): Входные данные задачи
+            rows_total (int): Общее кол-во обрабатываемых дней (0, если заранее неизвестно)
+
+        Returns:
+            ImportJob: Созданная задача
+
+        Raises:
+            Exception: В непредвиденной ситуации
+
+        Examples:
+            >>>job = await repo.create_job("external_sync", {"year": 2025, "week_type": 5}, 0)
+        """
+
+        try:
+            logger.info(f"Пробуем создать фоновую задачу kind={kind}")
+            job = ImportJob(
+                kind=kind,
+                status="pending",
+                payload=payload,
+                rows_total=rows_total,
+                created_at=datetime.now(timezone.utc)
+            )
+            self._session.add(job)
+            await self._session.commit()
+            await self._session.refresh(job)
+            logger.info(f"Фоновая задача успешно создана: {job}")
+            return job
+        except Exception as e:
+            await self._session.rollback()
+            raise e
+
+    async def get_job(self, job_id: int) -> ImportJob:
+        """Получает фоновую задачу по id
+
+        Получает одну фоновую задачу по её id
+
+        Args:
+            self (Self@ImportJobRepository): Экземпляр класса
+            job_id (int): Id задачи
+
+        Returns:
+            ImportJob: Фоновая задача
+
+        Raises:
+            HTTPException: Если задача не существует
+
+        Examples:
+            >>>job = await repo.get_job(1)
+        """
+
+        try:
+            query = lambda_stmt(lambda: select(ImportJob).where(ImportJob.id == job_id))
+            result = await self._session.execute(query)
+            job = result.scalars().first()
+            if job:
+                return job
+            else:
+                desc = f"Фоновая задача id={job_id} не существует"
+                logger.warning(desc)
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail=desc
+                )
+        except Exception as e:
+            raise e
+
+    async def get_resumable_job_ids(self, stale_before: datetime) -> list[int]:
+        """Получает id задач, которые нужно возобновить
+
+        Получает id задач в статусе pending, а также задач в статусе running,
+        прогресс которых не обновлялся с момента stale_before (их воркер остановился)
+
+        Args:
+            self (Self@ImportJobRepository): Экземпляр класса
+            stale_before (datetime): Граница устаревания прогресса задачи
+
+        Returns:
+            list[int]: Список id задач по порядку создания
+
+        Raises:
+            Exception: В непредвиденной ситуации
+
+        Examples:
+            >>>job_ids = await repo.get_resumable_job_ids(datetime.now(timezone.utc) - timedelta(minutes=5))
+        """
+
+        try:
+            query = select(ImportJob.id).where(or_(
+                ImportJob.status == "pending",
+                and_(ImportJob.status == "running", ImportJob.heartbeat_at < stale_before)
+            )).order_by(ImportJob.id)
+            result = await self._session.execute(query)
+            return list(result.scalars().all())
+        except Exception as e:
+            raise e
+
+    async def claim_job(self, job_id: int, stale_before: datetime) -> Optional[ImportJob]:
+        """Захватывает задачу на выполнение
+
+        Атомарно переводит задачу в статус running, если она ещё ожидает выполнения
+        или её прежний воркер остановился. Так одну задачу не выполнят два воркера одновременно
+
+        Args:
+            self (Self@ImportJobRepository): Экземпляр класса
+            job_id (int): Id задачи
+            stale_before (datetime): Граница устаревания прогресса задачи
+
+        Returns:
+            Optional[ImportJob]: Захваченная задача, либо None, если её уже выполняет другой воркер
+
+        Raises:
+            Exception: В непредвиденной ситуации
+
+        Examples:
+            >>>job = await repo.claim_job(1, datetime.now(timezone.utc) - timedelta(minutes=5))
+        """
+
+        try:
+            now = datetime.now(timezone.utc)
+            query = update(ImportJob).where(
+                ImportJob.id == job_id,
+                or_(
+                    ImportJob.status == "pending",
+                    and_(ImportJob.status == "running", ImportJob.heartbeat_at < stale_before)
+                )
+            ).values(
+                status="running",
+                started_at=now,
+                heartbeat_at=now,
+                finished_at=None,
+                error=None,
+                rows_validated=0,
+                rows_written=0
+            ).returning(ImportJob)
+            result = await self._session.execute(query)
+            job = result.scalars().first()
+            await self._session.commit()
+            return job
+        except Exception as e:
+            await self._session.rollback()
+            raise e
+
+    async def update_job(self, job_id: int, **values) -> None:
+        """Обновляет прогресс задачи
+
+        Обновляет переданные поля задачи и время её последнего обновления
+
+        Args:
+            self (Self@ImportJobRepository): Экземпляр класса
+            job_id (int): Id задачи
+            **values: Обновляемые поля задачи
+
+        Raises:
+            Exception: В непредвиденной ситуации
+
+        Examples:
+            >>>await repo.update_job(1, rows_written=100)
+        """
+
+        try:
+            query = update(ImportJob).where(ImportJob.id == job_id).values(
+                heartbeat_at=datetime.now(timezone.utc),
+                **values
+            )
+            await self._session.execute(query)
+            await self._session.commit()
+        except Exception as e:
+            await self._session.rollback()
+            raise e
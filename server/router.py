@@ -1,13 +1,17 @@
 from core.logger import setup_logger
 from security import verify_auth
-from fastapi import APIRouter, Query, Depends
+from fastapi import APIRouter, Query, Depends, Response
+from fastapi.responses import StreamingResponse
 from schemas.schemas import CalendarDayInDB, CalendarDayInput, ProductionCalendar
 from sqlalchemy.ext.asyncio import AsyncSession
-from database import get_db_connection
+from database import get_db_connection, get_read_db_connection
 from typing import Optional, Union
 from services.calendar_day import CalendarDayService
 from datetime import date
 from services.external import ExternalService
+from services.jobs import JobService
+from httpx import AsyncClient
+from http_client import get_http_client
 
 logger = setup_logger("router")
 
@@ -48,10 +52,11 @@ async def create_day(
 @router.get("/period/{period}", response_model=dict)
 async def get_days_by_period(
     period: str,
+    response: Response,
     compact: Optional[bool] = Query(False, description="Флаг сокращённого формата вывода"),
     week_type: Optional[int] = Query(5, ge=5, le=6, description="Тип рабочей недели"),
     statistic: Optional[bool] = Query(False, description="Подробная статистика по выбранному периоду"),
-    session: AsyncSession = Depends(get_db_connection)
+    session: AsyncSession = Depends(get_read_db_connection)
 ) -> dict:
     """Получает календарные дни по периоду
 
@@ -61,10 +66,11 @@ async def get_days_by_period(
 
     Args:
         period (str): Временной период получаемых дней
+        response (Response): Ответ (для пометки устаревших данных, полученных из снимка при недоступной БД)
         compact (Optional[bool]): Статус формата вывода данных (True - сокращённый, False - полный)
         week_type (Optional[int]): Формат рабочей недели (5- или 6-дневная)
         statistic (Optional[bool]): Статус статистики (True - полная, False - сокращённая)
-        session (AsyncSession): Асинхронная сессия для выполнения запросов к БД
+        session (AsyncSession): Асинхронная сессия для чтения (реплики, если с неё можно читать)
 
     Returns:
         dict: Словарь со всей информацией
@@ -77,6 +83,8 @@ async def get_days_by_period(
         logger.info(f"Пробуем получить календарные дни по периоду={period}")
         day_service = CalendarDayService(session)
         result = await day_service.get_days_by_period(period, compact, week_type, statistic)
+        if result.get("stale"):
+            response.headers["Warning"] = '110 - "Response is Stale"'
         logger.info(f"Календарные дни по периоду={period} успешно получены")
         return result
     except Exception as e:
@@ -148,7 +156,7 @@ async def parse_external_calendar(
     year: int,
     week_type: int = Query(5, ge=5, le=6, description="Тип рабочей недели"),
     statistic: bool = Query(False, description="Подробная статистика по выбранному периоду"),
-    session: AsyncSession = Depends(get_db_connection)
+    http_client: AsyncClient = Depends(get_http_client)
 ) -> dict:
     """Парсит календарные дни за год
 
@@ -160,6 +168,7 @@ async def parse_external_calendar(
         year (int): Год, за который получает список дней
         week_type (int): Тип рабочей недели
         statistic (bool): Формат формируемой статистики
+        http_client (AsyncClient): Общий HTTP-клиент для запросов к внешним источникам
 
     Returns:
         dict: Словарь со всей информацией
@@ -170,35 +179,210 @@ async def parse_external_calendar(
 
     try:
         logger.info(f"Пробуем получить календарные дни по параметрам: год={year}, рабочая неделя={week_type}")
-        external_service = ExternalService(session)
+        external_service = ExternalService(http_client=http_client)
         result = await external_service.parse_external_calendar(year, week_type, statistic)
         logger.info(f"Календарные дни (год={year}, рабочая неделя={week_type}) успешно получены")
         return result
     except Exception as e:
         raise e
 
+@router.get("/external/range/{year_start}/{year_end}")
+async def parse_external_range(
+    year_start: int,
+    year_end: int,
+    week_type: int = Query(5, ge=5, le=6, description="Тип рабочей недели"),
+    statistic: bool = Query(False, description="Подробная статистика по каждому году"),
+    http_client: AsyncClient = Depends(get_http_client)
+) -> StreamingResponse:
+    """Парсит календарные дни за диапазон лет
+
+    Одновременно получает календари всех лет диапазона и отдаёт их потоком NDJSON: каждый год отдельной строкой
+    по мере готовности, последней строкой - сводку с общей статистикой
+    Предполагается использование только в роутинге
+
+    Args:
+        year_start (int): Первый год диапазона
+        year_end (int): Последний год диапазона
+        week_type (int): Тип рабочей недели
+        statistic (bool): Формат формируемой статистики каждого года
+        http_client (AsyncClient): Общий HTTP-клиент для запросов к внешним источникам
+
+    Returns:
+        StreamingResponse: Поток строк NDJSON
+
+    Raises:
+        Exception: В непредвиденной ситуации
+    """
+
+    try:
+        logger.info(f"Пробуем получить календарные дни по параметрам: годы={year_start}-{year_end}, рабочая неделя={week_type}")
+        external_service = ExternalService(http_client=http_client)
+        external_service.validate_range(year_start, year_end)
+        return StreamingResponse(
+            external_service.stream_external_range(year_start, year_end, week_type, statistic),
+            media_type="application/x-ndjson"
+        )
+    except Exception as e:
+        raise e
+
 @router.post("/external/insert_production_calendar", dependencies=[Depends(verify_auth)], response_model=dict)
-async def insert_production_calendar(production_calendar: ProductionCalendar, session: AsyncSession = Depends(get_db_connection)) -> dict:
+async def insert_production_calendar(
+    production_calendar: ProductionCalendar,
+    dry_run: bool = Query(False, description="Только сравнить календарь с БД, ничего не записывая"),
+    session: AsyncSession = Depends(get_db_connection)
+) -> dict:
     """Вставляет в БД производственный календарь
 
-    Вставляет в БД за раз большое количество календарных дней. При наличии дня заменяет его поля на новые
+    Вставляет в БД за раз большое количество календарных дней. При наличии дня заменяет его поля на новые,
+    если они отличаются. При dry_run=True только сравнивает календарь с БД
     Предполагается использование только в роутинге
 
     Args:
         production_calendar (ProductionCalendar): Производственный календарь
+        dry_run (bool): Режим сравнения без записи в БД
         session (AsyncSession): Асинхронная сессия для выполнения запросов к БД
 
     Returns:
-        dict: Возвращает количество вставленных/изменённых дней
+        dict: Возвращает количество вставленных/обновлённых/неизменённых дней
 
     Raises:
         Exception: В непредвиденной ситуации
     """
 
     try:
-        logger.info(f"Пробуем вставить производственный календарь в БД")
+        logger.info(f"Пробуем вставить производственный календарь в БД (dry_run={dry_run})")
         external_service = ExternalService(session)
-        result = await external_service.insert_production_calendar(production_calendar)
-        return {"message": f"Вставка прошла успешно, было добавлено/обновлено {result} календарных дней"}
+        counts = await external_service.insert_production_calendar(production_calendar, dry_run)
+        if dry_run:
+            message = (
+                f"Сравнение прошло успешно, будет добавлено {counts['inserted']}, обновлено {counts['updated']}, "
+                f"не изменится {counts['unchanged']} календарных дней"
+            )
+        else:
+            message = (
+                f"Вставка прошла успешно, было добавлено {counts['inserted']}, обновлено {counts['updated']}, "
+                f"не изменилось {counts['unchanged']} календарных дней"
+            )
+        return {"message": message, "dry_run": dry_run, **counts}
+    except Exception as e:
+        raise e
+
+@router.post("/jobs/insert_production_calendar", dependencies=[Depends(verify_auth)], response_model=dict)
+async def submit_insert_production_calendar(production_calendar: ProductionCalendar, session: AsyncSession = Depends(get_db_connection)) -> dict:
+    """Ставит в очередь вставку производственного календаря
+
+    Создаёт фоновую задачу вставки производственного календаря и сразу возвращает её id,
+    прогресс задачи доступен по GET /jobs/{job_id}
+    Предполагается использование только в роутинге
+
+    Args:
+        production_calendar (ProductionCalendar): Производственный календарь
+        session (AsyncSession): Асинхронная сессия для выполнения запросов к БД
+
+    Returns:
+        dict: Id и статус созданной задачи
+
+    Raises:
+        Exception: В непредвиденной ситуации
+    """
+
+    try:
+        logger.info(f"Пробуем поставить в очередь вставку производственного календаря")
+        job_service = JobService(session)
+        result = await job_service.submit_insert_production_calendar(production_calendar)
+        logger.info(f"Вставка производственного календаря поставлена в очередь: {result}")
+        return result
+    except Exception as e:
+        raise e
+
+@router.post("/jobs/external_sync/{year}", dependencies=[Depends(verify_auth)], response_model=dict)
+async def submit_external_sync(
+    year: int,
+    week_type: int = Query(5, ge=5, le=6, description="Тип рабочей недели"),
+    session: AsyncSession = Depends(get_db_connection)
+) -> dict:
+    """Ставит в очередь синхронизацию с внешним источником
+
+    Создаёт фоновую задачу, которая получает календарь за год из внешнего источника и записывает его в БД,
+    и сразу возвращает её id, прогресс задачи доступен по GET /jobs/{job_id}
+    Предполагается использование только в роутинге
+
+    Args:
+        year (int): Год синхронизируемого календаря
+        week_type (int): Тип рабочей недели
+        session (AsyncSession): Асинхронная сессия для выполнения запросов к БД
+
+    Returns:
+        dict: Id и статус созданной задачи
+
+    Raises:
+        Exception: В непредвиденной ситуации
+    """
+
+    try:
+        logger.info(f"Пробуем поставить в очередь синхронизацию календаря (год={year}, рабочая неделя={week_type})")
+        job_service = JobService(session)
+        result = await job_service.submit_external_sync(year, week_type)
+        logger.info(f"Синхронизация календаря поставлена в очередь: {result}")
+        return result
+    except Exception as e:
+        raise e
+
+@router.post("/jobs/reparse_archive", dependencies=[Depends(verify_auth)], response_model=dict)
+async def submit_reparse_archive(
+    week_type: int = Query(5, ge=5, le=6, description="Тип рабочей недели"),
+    years: Optional[list[int]] = Query(None, description="Перепарсиваемые годы, по умолчанию все годы архива"),
+    session: AsyncSession = Depends(get_db_connection)
+) -> dict:
+    """Ставит в очередь перепарсинг архива страниц
+
+    Создаёт фоновую задачу, которая заново парсит сохранённые в архиве страницы внешних источников текущими парсерами
+    и записывает изменившиеся дни в БД без обращения к источникам, и сразу возвращает её id,
+    прогресс задачи доступен по GET /jobs/{job_id}
+    Предполагается использование только в роутинге
+
+    Args:
+        week_type (int): Тип рабочей недели
+        years (Optional[list[int]]): Перепарсиваемые годы
+        session (AsyncSession): Асинхронная сессия для выполнения запросов к БД
+
+    Returns:
+        dict: Id и статус созданной задачи
+
+    Raises:
+        Exception: В непредвиденной ситуации
+    """
+
+    try:
+        logger.info(f"Пробуем поставить в очередь перепарсинг архива (годы={years}, рабочая неделя={week_type})")
+        job_service = JobService(session)
+        result = await job_service.submit_reparse_archive(week_type, years)
+        logger.info(f"Перепарсинг архива поставлен в очередь: {result}")
+        return result
     except Exception as e:
-        raise e
\ No newline at end of file
+        raise e
+
+@router.get("/jobs/{job_id}", response_model=dict)
+async def get_job_status(job_id: int, session: AsyncSession = Depends(get_read_db_connection)) -> dict:
+    """Получает статус фоновой задачи
+
+    Получает статус, прогресс (провалидировано/записано дней), время выполнения и результат фоновой задачи
+    Предполагается использование только в роутинге
+
+    Args:
+        job_id (int): Id задачи
+        session (AsyncSession): Асинхронная сессия для чтения (реплики, если с неё можно читать)
+
+    Returns:
+        dict: Словарь со статусом задачи
+
+    Raises:
+        Exception: В непредвиденной ситуации
+    """
+
+    try:
+        logger.info(f"Пробуем получить статус фоновой задачи id={job_id}")
+        job_service = JobService(session)
+        return await job_service.get_job_status(job_id)
+    except Exception as e:
+        raise e
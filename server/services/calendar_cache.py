@@ -0,0 +1,270 @@
+from core.logger import setup_logger
+from core.config import settings
+from schemas.schemas import CalendarDayInDB
+from single_flight import SingleFlight
+from shared_cache import shared_cache
+from datetime import date
+from fastapi import HTTPException, status
+from typing import Callable, TYPE_CHECKING
+import time
+
+if TYPE_CHECKING:
+    from repo import CalendarDayRepository
+
+logger = setup_logger("services.calendar_cache")
+
+class CalendarYearCache:
+    """Кэш дней собственного календаря по годам
+
+    Класс хранит в памяти воркера все дни БД за год и собирает из них дни любого периода без запроса к БД.
+    Кэш используется, только пока слушатель уведомлений об изменениях (invalidation.py) подключён к PostgreSQL:
+    изменение дней любым воркером на любом хосте сбрасывает только затронутые годы. Пока слушатель отключён,
+    кэш пуст и дни получаются из БД напрямую
+
+    Промахи загружаются из общего кэша узлов (shared_cache.py), если он настроен, и только затем из БД
+
+    Каждый сброс года (или всего кэша) увеличивает его поколение, поэтому год, загруженный из БД одновременно с изменением,
+    не сохраняется в кэш устаревшим
+
+    Args:
+        enabled (bool): Флаг кэша
+
+    Examples:
+        >>>calendar_cache = CalendarYearCache(True)
+        >>>db_days = await calendar_cache.get_period(repo, date(2025, 1, 1), date(2025, 3, 31))
+    """
+
+    def __init__(self, enabled: bool) -> None:
+        """Конструктор класса
+
+        Создаёт пустой кэш, которому нельзя доверять до подключения слушателя уведомлений
+
+        Args:
+            self (Self@CalendarYearCache): Экземпляр класса
+            enabled (bool): Флаг кэша
+        """
+
+        self._enabled = enabled
+        self._trusted = False
+        self._years: dict[int, list[CalendarDayInDB]] = {}
+        self._statistics: dict[tuple[int, int], dict] = {}
+        self._generations: dict[int, int] = {}
+        self._epoch = 0
+        self._invalidated_at: dict[int, float] = {}
+        self._reset_at = 0.0
+        self._year_versions: dict[int, int] = {}
+        self._flight = SingleFlight("calendar_year")
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def trusted(self) -> bool:
+        """Флаг использования кэша (кэш включён и слушатель уведомлений подключён)"""
+
+        return self._enabled and self._trusted
+
+    def year_version(self, year: int) -> int:
+        """Версия календаря, в которой последний раз изменялся год
+
+        Args:
+            self (Self@CalendarYearCache): Экземпляр класса
+            year (int): Год
+
+        Returns:
+            int: Версия последнего изменения года, 0 - год не изменялся
+        """
+
+        return self._year_versions.get(year, 0)
+
+    def stale_since(self, year_start: int, year_end: int) -> float:
+        """Время последнего сброса лет
+
+        Данные, прочитанные из БД раньше этого времени, для этих лет могут быть устаревшими
+
+        Args:
+            self (Self@CalendarYearCache): Экземпляр класса
+            year_start (int): Первый год
+            year_end (int): Последний год
+
+        Returns:
+            float: Время (unix) последнего сброса любого из лет или всего кэша
+        """
+
+        return max([self._reset_at] + [
+            invalidated_at for year, invalidated_at in self._invalidated_at.items() if year_start <= year <= year_end
+        ])
+
+    def stats(self) -> dict[str, int]:
+        """Статистика кэша
+
+        Args:
+            self (Self@CalendarYearCache): Экземпляр класса
+
+        Returns:
+            dict[str, int]: Кол-во попаданий, промахов, закэшированных лет и текущая версия календаря
+        """
+
+        return {"hits": self.hits, "misses": self.misses, "years": len(self._years), "version": self.version}
+
+    def trust(self, version: int, year_versions: dict[int, int]) -> None:
+        """Включает кэш после подключения слушателя уведомлений
+
+        Уведомления, отправленные, пока слушатель был отключён, потеряны, поэтому кэш начинается с пустого,
+        а версии лет берутся из БД
+
+        Args:
+            self (Self@CalendarYearCache): Экземпляр класса
+            version (int): Текущая версия календаря в БД
+            year_versions (dict[int, int]): Версии лет из таблицы calendar_year_version
+        """
+
+        self.reset()
+        self.version = max(self.version, version)
+        for year, year_version in year_versions.items():
+            self._year_versions[year] = max(self._year_versions.get(year, 0), year_version)
+        self._trusted = True
+
+    def distrust(self) -> None:
+        """Отключает кэш при потере соединения слушателя уведомлений
+
+        Args:
+            self (Self@CalendarYearCache): Экземпляр класса
+        """
+
+        self._trusted = False
+        self.reset()
+
+    def reset(self) -> None:
+        """Сбрасывает все годы
+
+        Args:
+            self (Self@CalendarYearCache): Экземпляр класса
+        """
+
+        self._epoch += 1
+        self._reset_at = time.time()
+        self._years.clear()
+        self._statistics.clear()
+
+    def invalidate(self, date_start: date, date_end: date, version: int) -> list[int]:
+        """Сбрасывает годы, затронутые изменением
+
+        Args:
+            self (Self@CalendarYearCache): Экземпляр класса
+            date_start (date): Первый изменённый день
+            date_end (date): Последний изменённый день
+            version (int): Версия календаря после изменения
+
+        Returns:
+            list[int]: Сброшенные годы
+        """
+
+        years = list(range(date_start.year, date_end.year + 1))
+        for year in years:
+            self._generations[year] = self._generations.get(year, 0) + 1
+            self._years.pop(year, None)
+            self._statistics.pop((year, 5), None)
+            self._statistics.pop((year, 6), None)
+            self._year_versions[year] = max(self._year_versions.get(year, 0), version)
+            self._invalidated_at[year] = time.time()
+        self.version = max(self.version, version)
+        return years
+
+    async def _load_year(self, repo: "CalendarDayRepository", year: int) -> list[CalendarDayInDB]:
+        """Загружает дни года из общего кэша или БД и сохраняет их, если год не сбрасывался во время загрузки
+
+        Дни, загруженные из БД, сохраняются и в общий кэш по ключу с версией года на момент начала загрузки
+
+        Args:
+            self (Self@CalendarYearCache): Экземпляр класса
+            repo (CalendarDayRepository): Репозиторий календарных дней
+            year (int): Год
+
+        Returns:
+            list[CalendarDayInDB]: Дни года из БД
+        """
+
+        generation = (self._epoch, self._generations.get(year, 0))
+        version = self.year_version(year)
+        db_days = await shared_cache.get_year_days(year, version)
+        from_shared_cache = db_days is not None
+        if not from_shared_cache:
+            db_days = await repo.get_days_by_year(year)
+        if self.trusted and (self._epoch, self._generations.get(year, 0)) == generation:
+            self._years[year] = db_days
+            if not from_shared_cache:
+                await shared_cache.put_year_days(year, version, db_days)
+        return db_days
+
+    async def get_year_statistic(self, year: int, week_type: int, compute: Callable[[], dict]) -> dict:
+        """Получает статистику целого года
+
+        Статистика берётся из памяти воркера, затем из общего кэша узлов, и только затем вычисляется
+
+        Args:
+            self (Self@CalendarYearCache): Экземпляр класса
+            year (int): Год
+            week_type (int): Тип недели календаря (5- или 6-дневная)
+            compute (Callable[[], dict]): Вычисление статистики
+
+        Returns:
+            dict: Статистика года
+        """
+
+        if not self.trusted:
+            return compute()
+        statistic = self._statistics.get((year, week_type))
+        if statistic is not None:
+            return dict(statistic)
+        generation = (self._epoch, self._generations.get(year, 0))
+        version = self.year_version(year)
+        statistic = await shared_cache.get_year_statistic(year, week_type, version)
+        from_shared_cache = statistic is not None
+        if not from_shared_cache:
+            statistic = compute()
+        if self.trusted and (self._epoch, self._generations.get(year, 0)) == generation:
+            self._statistics[(year, week_type)] = dict(statistic)
+            if not from_shared_cache:
+                await shared_cache.put_year_statistic(year, week_type, version, statistic)
+        return statistic
+
+    async def get_period(self, repo: "CalendarDayRepository", date_start: date, date_end: date) -> list[CalendarDayInDB]:
+        """Получает дни БД по периоду
+
+        Возвращает копии дней, так как форматирование ответа изменяет их
+
+        Args:
+            self (Self@CalendarYearCache): Экземпляр класса
+            repo (CalendarDayRepository): Репозиторий календарных дней
+            date_start (date): Дата начала периода
+            date_end (date): Дата конца периода
+
+        Returns:
+            list[CalendarDayInDB]: Список календарных дней периода
+
+        Raises:
+            HTTPException: Если дней в периоде нет
+        """
+
+        if not self.trusted:
+            return await repo.get_days_by_period(date_start, date_end)
+        period_days: list[CalendarDayInDB] = []
+        for year in range(date_start.year, date_end.year + 1):
+            year_days = self._years.get(year)
+            if year_days is None:
+                self.misses += 1
+                year_days = await self._flight.do(year, lambda year=year: self._load_year(repo, year))
+            else:
+                self.hits += 1
+            period_days.extend(day.model_copy() for day in year_days if date_start <= day.date <= date_end)
+        if not period_days:
+            desc = f"Календарные дни по периоду date_start={date_start}, date_end={date_end} отсутствуют"
+            logger.warning(desc)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=desc
+            )
+        return period_days
+
+calendar_cache = CalendarYearCache(settings.CALENDAR_CACHE_ENABLED)
@@ -5,9 +5,18 @@ from schemas.schemas import CalendarDayInput, CalendarDayInDB
 from typing import Optional
 from services.calendar_day_utils import assemble_day, period_parse, create_base_days, merge_days, formatting_days, get_statistic
 from datetime import date
+from single_flight import SingleFlight
+from services.calendar_cache import calendar_cache
+from snapshot import calendar_snapshot
+from database import DB_CONNECTION_ERRORS, mark_connection_error, is_database_available
+from fastapi import HTTPException, status
+from metrics import period_stages, period_sources
+import time
 
 logger = setup_logger("services.calendar_day")
 
+period_flight = SingleFlight("period")
+
 class CalendarDayService:
     """Сервис бизнес-логики календарных дней
 
@@ -30,6 +39,7 @@ class CalendarDayService:
             session (AsyncSession): Асинхронная сессия для выполнения запросов к БД
         """
 
+        self._session = session
         self._repo = CalendarDayRepository(session)
 
     async def create_day(self, day_data: CalendarDayInput, note: Optional[str]) -> CalendarDayInDB:
@@ -67,6 +77,11 @@ class CalendarDayService:
         Динамически создаёт полный список дней обычного календаря от параметра week_type для периода period,
         далее получает дни для этого же периода из БД и перезаписывает соответствующие стандартные дни полученными,
         после чего форматирует итоговый список дней в нужный вид
+        Дни из БД берутся из общего снимка хоста (snapshot.py) или кэша лет воркера (services/calendar_cache.py),
+        пока они синхронизированы с БД. Если БД недоступна, дни берутся из снимка, а в результат добавляются
+        stale и snapshot_at (время чтения БД для снимка)
+        Одинаковые одновременные запросы (с тем же разобранным периодом, параметрами, версией календаря
+        и сервером БД - основным или репликой) выполняются один раз
 
         Args:
             self (Self@CalendarDayService): Экземпляр класса
@@ -87,26 +102,107 @@ class CalendarDayService:
 
         try:
             logger.info(f"Пробуем получить календарные дни по периоду={period}")
+            started = time.perf_counter()
             date_start, date_end, period_name = period_parse(period)
-            base_days = create_base_days(date_start, date_end, week_type)
-            db_days = await self._repo.get_days_by_period(date_start, date_end)
-            merged_days = merge_days(base_days, db_days)
-            result_days = formatting_days(merged_days, compact, week_type)
-            result = {
-                "date_start": date_start.strftime("%d.%m.%Y"),
-                "date_end": date_end.strftime("%d.%m.%Y"),
-                "work_week_type": f"{week_type}-и дневная рабочая неделя",
-                "period": period_name,
-            }
-            if statistic:
-                add_statistic = get_statistic(merged_days)
-                result.update(add_statistic)
-                logger.info(f"Итоговый результат сформирован")
-            result["days"] = result_days
-            return result
+            period_stages.observe(("period_parse",), time.perf_counter() - started)
+            #версия календаря и сервер БД в ключе: запрос после изменения не присоединяется к чтению, начатому до него
+            key = (calendar_cache.version, self._session.info.get("replica", False), date_start, date_end, period_name, compact, week_type, statistic)
+            return await period_flight.do(key, lambda: self._build_period(date_start, date_end, period_name, compact, week_type, statistic))
         except Exception as e:
             raise e
 
+    async def _build_period(self, date_start: date, date_end: date, period_name: str, compact: bool, week_type: int, statistic: bool) -> dict:
+        """Формирует календарные дни по разобранному периоду
+
+        Args:
+            self (Self@CalendarDayService): Экземпляр класса
+            date_start (date): Первый день периода
+            date_end (date): Последний день периода
+            period_name (str): Тип периода
+            compact (bool): Формат итоговых данных (True - компактный, False - полный)
+            week_type (int): Тип недели календаря (5- или 6-дневная)
+            statistic (bool): Формат статистики (True - детальная, False - обычная)
+
+        Returns:
+            dict: Форматированный словарь с множеством параметров
+        """
+
+        started = time.perf_counter()
+        base_days = create_base_days(date_start, date_end, week_type)
+        period_stages.observe(("create_base_days",), time.perf_counter() - started)
+        started = time.perf_counter()
+        stale = False
+        source = "snapshot"
+        db_days = calendar_snapshot.get_period(date_start, date_end)
+        if db_days is None:
+            source = "cache" if calendar_cache.trusted else "database"
+            if is_database_available(self._session):
+                try:
+                    db_days = await calendar_cache.get_period(self._repo, date_start, date_end)
+                except DB_CONNECTION_ERRORS as e:
+                    mark_connection_error(self._session, e)
+                    await self._session.rollback()
+                    stale = True
+            else:
+                stale = True
+            if stale:
+                source = "degraded"
+                db_days = self._get_degraded_days(date_start, date_end)
+        period_stages.observe(("db_query",), time.perf_counter() - started)
+        period_sources.inc((source,))
+        started = time.perf_counter()
+        merged_days = merge_days(base_days, db_days)
+        period_stages.observe(("merge_days",), time.perf_counter() - started)
+        started = time.perf_counter()
+        result_days = formatting_days(merged_days, compact, week_type)
+        period_stages.observe(("formatting_days",), time.perf_counter() - started)
+        result = {
+            "date_start": date_start.strftime("%d.%m.%Y"),
+            "date_end": date_end.strftime("%d.%m.%Y"),
+            "work_week_type": f"{week_type}-и дневная рабочая неделя",
+            "period": period_name,
+        }
+        if statistic:
+            started = time.perf_counter()
+            if date_start == date(date_start.year, 1, 1) and date_end == date(date_start.year, 12, 31):
+                add_statistic = await calendar_cache.get_year_statistic(date_start.year, week_type, lambda: get_statistic(merged_days))
+            else:
+                add_statistic = get_statistic(merged_days)
+            period_stages.observe(("get_statistic",), time.perf_counter() - started)
+            result.update(add_statistic)
+            logger.info(f"Итоговый результат сформирован")
+        result["days"] = result_days
+        if stale:
+            result["stale"] = True
+            result["snapshot_at"] = calendar_snapshot.read_at.isoformat()
+        return result
+
+    def _get_degraded_days(self, date_start: date, date_end: date) -> list[CalendarDayInDB]:
+        """Получает дни БД по периоду из локального снимка, когда БД недоступна
+
+        Args:
+            self (Self@CalendarDayService): Экземпляр класса
+            date_start (date): Первый день периода
+            date_end (date): Последний день периода
+
+        Returns:
+            list[CalendarDayInDB]: Дни периода из снимка (возможно устаревшие)
+
+        Raises:
+            HTTPException: Если снимка нет или период выходит за его диапазон
+        """
+
+        db_days = calendar_snapshot.get_period(date_start, date_end, allow_stale=True)
+        if db_days is None:
+            desc = f"БД временно недоступна, а локального снимка календаря для периода date_start={date_start}, date_end={date_end} нет"
+            logger.error(desc)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=desc
+            )
+        logger.warning(f"БД недоступна, дни по периоду date_start={date_start}, date_end={date_end} получены из снимка от {calendar_snapshot.read_at}")
+        return db_days
+
     async def update_day(self, date: date, day_data: CalendarDayInput, note: Optional[str]) -> CalendarDayInDB:
         """Обновляет календарный день по дате
 
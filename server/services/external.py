@@ -1,50 +1,239 @@
 from core.logger import setup_logger
 from services.calendar_day_utils import period_parse
-from interface import ExternalInterface
-from services.external_utils import parse_consultant_calendar, parse_hhru_calendar, get_statistic
+from interface import ExternalInterface, circuit_breakers
+from services.external_utils import project_calendar_days, get_statistic
+from parse_pool import parse_pool
+from single_flight import SingleFlight
+from services.external_cache import parsed_calendar_cache, RawCalendar
 from datetime import datetime
 from repo import CalendarDayRepository
 from sqlalchemy.ext.asyncio import AsyncSession
+from httpx import AsyncClient, HTTPStatusError
 from model import CalendarDay
 from services.calendar_day_utils import assemble_day, parse_date
 from schemas.schemas import CalendarDayInput, ProductionCalendar, ReadyCalendarDay
 from fastapi import HTTPException, status
+from typing import AsyncIterator, Optional
+from core.config import settings
+from metrics import external_stages, external_requests
+import asyncio
+import json
+import time
 
 logger = setup_logger("service.external")
 
+external_flight = SingleFlight("external")
+external_load_flight = SingleFlight("external_load")
+
+EXTERNAL_FIRST_YEAR = 2017
+
+def external_years() -> range:
+    """Годы, календари которых можно получить из внешних источников
+
+    Календарь следующего года публикуется заранее, поэтому он тоже входит в диапазон; пока он не опубликован,
+    запрос следующего года получает 422 (см. ExternalService._load_raw_calendar)
+
+    Returns:
+        range: Годы от EXTERNAL_FIRST_YEAR до следующего включительно
+    """
+
+    return range(EXTERNAL_FIRST_YEAR, datetime.now().year + 2)
+
 class ExternalService:
     """Сервис бизнес-логики внешних ресурсов
 
     Класс описывает бизнес-методы для получения календарных дней из внешних ресурсов
 
+    Args:
+        session (Optional[AsyncSession]): Асинхронная сессия для выполнения запросов к БД, нужна только для записи календаря в БД
+        http_client (Optional[AsyncClient]): Общий HTTP-клиент, нужен только для запросов к внешним источникам
+
     Examples:
-        >>>external_service = ExternalService()
+        >>>external_service = ExternalService(session, http_client)
+        >>>external_service = ExternalService(http_client=http_client)
     """
 
-    def __init__(self, session: AsyncSession) -> None:
+    def __init__(self, session: Optional[AsyncSession] = None, http_client: Optional[AsyncClient] = None) -> None:
         """Конструктор класса
 
         Создаёт экземпляр класса для работы с внешним источником данных
 
         Args:
             self (Self@ExternalService): Экземпляр класса
-            session (AsyncSession): Асинхронная сессия для выполнения запросов к БД
+            session (Optional[AsyncSession]): Асинхронная сессия для выполнения запросов к БД, нужна только для записи календаря в БД
+            http_client (Optional[AsyncClient]): Общий HTTP-клиент, нужен только для запросов к внешним источникам
+        """
+
+        self._repo = CalendarDayRepository(session) if session is not None else None
+        self._http_client = http_client
+
+    async def _fetch_source(self, external_interface: ExternalInterface, source: str, year: int, timeout: Optional[float]) -> list[tuple[int, int, str]]:
+        """Получает и парсит календарь одного источника
+
+        Args:
+            self (Self@ExternalService): Экземпляр класса
+            external_interface (ExternalInterface): Интерфейс внешних источников
+            source (str): Источник (consultant или hhru)
+            year (int): Год запрашиваемого календаря
+            timeout (Optional[float]): Бюджет задержки (сек.) запроса к источнику
+
+        Returns:
+            list[tuple[int, int, str]]: Список дней вида (месяц, день, вид дня)
+
+        Raises:
+            HTTPException: Если источник недоступен или на странице нет календарных дней
         """
 
-        self._repo = CalendarDayRepository(session)
+        started = time.perf_counter()
+        if source == "consultant":
+            year_str = str(year)
+            if year_str == "2024":
+                year_str = "2024b"
+            elif year_str == "2020":
+                year_str = "2020b"
+            response_text = await external_interface.get_consultant_calendar(year_str, timeout)
+        else:
+            response_text = await external_interface.get_hhru_calendar(str(year), timeout)
+        fetched = time.perf_counter()
+        external_stages.observe((source, "fetch"), fetched - started)
+        raw_days = await parse_pool.parse(source, response_text)
+        external_stages.observe((source, "parse"), time.perf_counter() - fetched)
+        if not raw_days:
+            desc = f"На странице источника {source} (year={year}) не найдено ни одного календарного дня"
+            logger.warning(desc)
+            raise HTTPException(
+                status_code=status.HTTP_502_BAD_GATEWAY,
+                detail=desc
+            )
+        return raw_days
+
+    async def _timed_fetch(self, external_interface: ExternalInterface, source: str, year: int, timeout: Optional[float], latencies: dict[str, dict]) -> RawCalendar:
+        """Получает календарь источника, замеряя задержку
 
-    async def parse_external_calendar(self, year: int, week_type: int, statistic: bool) -> dict:
+        Args:
+            self (Self@ExternalService): Экземпляр класса
+            external_interface (ExternalInterface): Интерфейс внешних источников
+            source (str): Источник (consultant или hhru)
+            year (int): Год запрашиваемого календаря
+            timeout (Optional[float]): Бюджет задержки (сек.) запроса к источнику
+            latencies (dict[str, dict]): Словарь, в который записывается задержка и исход запроса к источнику
+
+        Returns:
+            RawCalendar: Источник и список дней вида (месяц, день, вид дня)
+
+        Raises:
+            Exception: Если источник недоступен
+        """
+
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            raw_days = await self._fetch_source(external_interface, source, year, timeout)
+            outcome = "ok"
+            return source, raw_days
+        except asyncio.CancelledError:
+            outcome = "cancelled"
+            raise
+        finally:
+            latencies[source] = {"seconds": round(time.perf_counter() - started, 3), "outcome": outcome}
+            external_requests.inc((source, outcome))
+
+    async def _load_raw_calendar(self, year: int) -> RawCalendar:
+        """Получает календарь из внешних источников без учёта типа рабочей недели
+
+        Получает и парсит HTML-страницу основного источника (Консультанта), резервный источник (hh.ru) запускается
+        в зависимости от EXTERNAL_FETCH_MODE: после ошибки основного (fallback), через EXTERNAL_HEDGE_DELAY секунд,
+        если основной ещё не ответил (hedged), или сразу (race). Берётся первый успешный результат,
+        запрос к проигравшему источнику отменяется
+        Источник с разомкнутым автоматом пропускается, и запрос сразу уходит к исправному. Общий бюджет задержки
+        EXTERNAL_LATENCY_BUDGET делится между источниками: основному достаётся доля EXTERNAL_PRIMARY_BUDGET_SHARE,
+        резервному - остаток бюджета на момент его запуска
+
+        Args:
+            self (Self@ExternalService): Экземпляр класса
+            year (int): Год запрашиваемого календаря
+
+        Returns:
+            RawCalendar: Источник и список дней вида (месяц, день, вид дня)
+
+        Raises:
+            HTTPException: 422, если календарь следующего года ещё не опубликован (страницы нет или на ней нет дней)
+            Exception: Если ни один источник не вернул календарь
+        """
+
+        external_interface = ExternalInterface(self._http_client)
+        hedge_delay = {
+            "fallback": None,
+            "hedged": settings.EXTERNAL_HEDGE_DELAY,
+            "race": 0
+        }[settings.EXTERNAL_FETCH_MODE]
+        deadline = time.monotonic() + settings.EXTERNAL_LATENCY_BUDGET
+        sources = ["consultant", "hhru"] if year >= 2020 else ["consultant"] #hh.ru предоставляет календари только с 2020 года
+        healthy_sources = [source for source in sources if not circuit_breakers[source].is_open()]
+        if healthy_sources and healthy_sources != sources:
+            logger.warning(f"Автоматы источников {set(sources) - set(healthy_sources)} разомкнуты, календарь year={year} запрашивается у {healthy_sources}")
+            sources = healthy_sources
+        primary_timeout = settings.EXTERNAL_LATENCY_BUDGET
+        if len(sources) > 1:
+            primary_timeout *= settings.EXTERNAL_PRIMARY_BUDGET_SHARE
+        latencies: dict[str, dict] = {}
+        primary = asyncio.create_task(self._timed_fetch(external_interface, sources[0], year, primary_timeout, latencies))
+        pending: set[asyncio.Task] = {primary}
+        last_error: Optional[BaseException] = None
+        try:
+            if len(sources) > 1:
+                await asyncio.wait(pending, timeout=hedge_delay)
+                if not primary.done() or primary.exception() is not None:
+                    secondary_timeout = max(deadline - time.monotonic(), 0.001)
+                    pending.add(asyncio.create_task(self._timed_fetch(external_interface, sources[1], year, secondary_timeout, latencies)))
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        source, raw_days = task.result()
+                        logger.info(f"Календарь year={year} получен от источника {source}, задержки источников: {latencies}")
+                        return source, raw_days
+                    last_error = task.exception()
+                    logger.error(f"При получении календарных дней (year={year}) произошла ошибка: {str(last_error)}")
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+                logger.info(f"Запросы к проигравшим источникам отменены, задержки источников: {latencies}")
+        if year < 2020:
+            desc = f"Год должен быть от 2020 и до текущего включительно, но получен {year}"
+            logger.warning(desc)
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=desc
+            )
+        not_found = isinstance(last_error, HTTPStatusError) and last_error.response.status_code < 500
+        no_days = isinstance(last_error, HTTPException) and last_error.status_code == status.HTTP_502_BAD_GATEWAY
+        if year > datetime.now().year and (not_found or no_days):
+            desc = f"Календарь на {year} год ещё не опубликован внешними источниками"
+            logger.warning(desc)
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=desc
+            )
+        raise last_error
+
+    async def parse_external_calendar(self, year: int, week_type: int, statistic: bool, wait_fresh: bool = False) -> dict:
         """Формирует список календарных дней из внешних данных
 
         Получает список календарных дней, полученных после парсинга HTML-страницы Консультанта
         В случае ошибки при обращении к Консультанту (кроме валидации, например ошибка сайта)
-        вызывается резервный метод к HH.ru
+        вызывается резервный метод к HH.ru, в режимах hedged/race он запускается параллельно
+        Распарсенный календарь кэшируется без учёта типа рабочей недели, week_type применяется поверх кэша
+        Одинаковые одновременные запросы выполняются один раз
 
         Args:
             self (Self@ExternalService): Экземпляр класса
             year (int): Год запрашиваемого календаря
             week_type (int): Тип рабочей недели
             statistic (bool): Опциональная статистика календаря
+            wait_fresh (bool): Дождаться обновления устаревшего календаря в кэше вместо фонового обновления
 
         Returns:
             dict: Словарь с календарём и дополнительными данными
@@ -53,89 +242,183 @@ class ExternalService:
             Exception: В непредвиденной ситуации
 
         Examples:
-            >>>result = await external_service.get_days_by_year(2025, 5, True)
+            >>>result = await external_service.parse_external_calendar(2025, 5, True)
         """
 
         try:
             logger.info(f"Пробуем сформировать календарь (year={year}, week_type={week_type}, statistic={statistic})")
-            if year > datetime.now().year or year < 2017:
-                desc = f"Год должен быть от 2017 и до текущего включительно, но получен {year}"
+            if year not in external_years():
+                desc = f"Год должен быть от {EXTERNAL_FIRST_YEAR} и до следующего включительно, но получен {year}"
                 logger.warning(desc)
                 raise HTTPException(
                     status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
                     detail=desc
                 )
-            year_str = str(year)
-            date_start, date_end, period_name = period_parse(year_str)
-            external_interface = ExternalInterface()
-            if year_str == "2024":
-                year_str = "2024b"
-            elif year_str == "2020":
-                year_str = "2020b"
-            response_text = await external_interface.get_consultant_calendar(year_str)
-            correct_external_days = parse_consultant_calendar(response_text, year, week_type)
-            result = {
-                    "date_start": date_start.strftime("%d.%m.%Y"),
-                    "date_end": date_end.strftime("%d.%m.%Y"),
-                    "work_week_type": f"{week_type}-дневная рабочая неделя",
-                    "period": period_name,
-                }
-            if statistic:
-                add_statistic = get_statistic(correct_external_days)
-                result.update(add_statistic)
-            result["days"] = correct_external_days
-            return result
+            key = (year, week_type, statistic, wait_fresh)
+            return await external_flight.do(key, lambda: self._build_external_calendar(year, week_type, statistic, wait_fresh))
         except Exception as e:
-            logger.error(f"При получении календарных дней от Консультанта (year={year}, week_type={week_type}) произошла ошибка: {str(e)}", exc_info=True)
+            raise e
+
+    async def _build_external_calendar(self, year: int, week_type: int, statistic: bool, wait_fresh: bool) -> dict:
+        """Формирует календарь за год из кэша или внешних источников
+
+        Получение календаря из внешних источников для года объединяется между запросами с разными week_type
+
+        Args:
+            self (Self@ExternalService): Экземпляр класса
+            year (int): Год запрашиваемого календаря
+            week_type (int): Тип рабочей недели
+            statistic (bool): Опциональная статистика календаря
+            wait_fresh (bool): Дождаться обновления устаревшего календаря в кэше вместо фонового обновления
+
+        Returns:
+            dict: Словарь с календарём и дополнительными данными
+        """
+
+        date_start, date_end, period_name = period_parse(str(year))
+        source, raw_days = await parsed_calendar_cache.get(
+            year,
+            lambda: external_load_flight.do(year, lambda: self._load_raw_calendar(year)),
+            wait_fresh
+        )
+        correct_external_days = project_calendar_days(raw_days, year, week_type)
+        result = {
+            "date_start": date_start.strftime("%d.%m.%Y"),
+            "date_end": date_end.strftime("%d.%m.%Y"),
+            "work_week_type": f"{week_type}-дневная рабочая неделя",
+            "period": period_name,
+        }
+        if statistic:
+            add_statistic = get_statistic(correct_external_days)
+            result.update(add_statistic)
+        result["days"] = correct_external_days
+        return result
+
+    async def _range_year(self, year: int, week_type: int, statistic: bool, semaphore: asyncio.Semaphore) -> dict:
+        """Получает календарь одного года диапазона
+
+        Args:
+            self (Self@ExternalService): Экземпляр класса
+            year (int): Год календаря
+            week_type (int): Тип рабочей недели
+            statistic (bool): Опциональная статистика календаря
+            semaphore (asyncio.Semaphore): Семафор, ограничивающий кол-во одновременно получаемых лет
+
+        Returns:
+            dict: Календарь года, либо ошибка его получения
+        """
+
+        async with semaphore:
+            started = time.perf_counter()
             try:
-                if year > datetime.now().year or year < 2020:
-                    desc = f"Год должен быть от 2020 и до текущего включительно, но получен {year}"
-                    logger.warning(desc)
-                    raise HTTPException(
-                        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-                        detail=desc
-                    )
-                year_str = str(year)
-                date_start, date_end, period_name = period_parse(year_str)
-                external_interface = ExternalInterface()
-                response_text = await external_interface.get_hhru_calendar(year_str)
-                correct_external_days = parse_hhru_calendar(response_text, year, week_type)
-                result = {
-                    "date_start": date_start.strftime("%d.%m.%Y"),
-                    "date_end": date_end.strftime("%d.%m.%Y"),
-                    "work_week_type": f"{week_type}-дневная рабочая неделя",
-                    "period": period_name,
-                }
-                if statistic:
-                    add_statistic = get_statistic(correct_external_days)
-                    result.update(add_statistic)
-                result["days"] = correct_external_days
-                return result
+                result = await self.parse_external_calendar(year, week_type, statistic)
+                return {"year": year, "ok": True, "elapsed": round(time.perf_counter() - started, 3), "result": result}
             except Exception as e:
-                raise e
+                return {
+                    "year": year,
+                    "ok": False,
+                    "elapsed": round(time.perf_counter() - started, 3),
+                    "status_code": getattr(e, "status_code", status.HTTP_500_INTERNAL_SERVER_ERROR),
+                    "error": str(getattr(e, "detail", e))
+                }
+
+    async def stream_external_range(self, year_start: int, year_end: int, week_type: int, statistic: bool) -> AsyncIterator[str]:
+        """Формирует календари диапазона лет из внешних данных
+
+        Получает календари всех лет диапазона одновременно (не больше EXTERNAL_RANGE_CONCURRENCY лет за раз)
+        и отдаёт каждый год строкой NDJSON сразу по готовности, не дожидаясь остальных.
+        Последней строкой отдаётся сводка: общая статистика по успешно полученным годам и список неудачных лет
+
+        Args:
+            self (Self@ExternalService): Экземпляр класса
+            year_start (int): Первый год диапазона
+            year_end (int): Последний год диапазона
+            week_type (int): Тип рабочей недели
+            statistic (bool): Опциональная статистика каждого года
+
+        Returns:
+            AsyncIterator[str]: Строки NDJSON
+
+        Examples:
+            >>>async for line in external_service.stream_external_range(2020, 2025, 5, False):
+        """
+
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(settings.EXTERNAL_RANGE_CONCURRENCY)
+        tasks = [
+            asyncio.create_task(self._range_year(year, week_type, statistic, semaphore))
+            for year in range(year_start, year_end + 1)
+        ]
+        totals = {"calendar_days": 0, "calendar_days_without_holidays": 0, "work_days": 0, "weekends": 0, "holidays": 0}
+        failed_years: list[int] = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                year_result = await next_done
+                if year_result["ok"]:
+                    for key, value in get_statistic(year_result["result"]["days"]).items():
+                        totals[key] += value
+                else:
+                    failed_years.append(year_result["year"])
+                yield json.dumps(year_result, ensure_ascii=False) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+        summary = {
+            "year_start": year_start,
+            "year_end": year_end,
+            "years_ok": len(tasks) - len(failed_years),
+            "years_failed": sorted(failed_years),
+            "elapsed": round(time.perf_counter() - started, 3),
+            "statistic": totals
+        }
+        logger.info(f"Календари диапазона лет получены: {summary}")
+        yield json.dumps({"summary": summary}, ensure_ascii=False) + "\n"
+
+    def validate_range(self, year_start: int, year_end: int) -> None:
+        """Проверяет диапазон лет
+
+        Args:
+            self (Self@ExternalService): Экземпляр класса
+            year_start (int): Первый год диапазона
+            year_end (int): Последний год диапазона
+
+        Raises:
+            HTTPException: Если диапазон некорректен
+        """
+
+        years = external_years()
+        if year_start > year_end or year_start not in years or year_end not in years:
+            desc = f"Диапазон должен лежать в пределах от {EXTERNAL_FIRST_YEAR} до следующего года включительно, но получен {year_start}-{year_end}"
+            logger.warning(desc)
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=desc
+            )
 
-    async def insert_production_calendar(self, production_calendar: ProductionCalendar) -> int:
+    async def insert_production_calendar(self, production_calendar: ProductionCalendar, dry_run: bool = False) -> dict[str, int]:
         """Сохранение производственного календаря в БД
 
         Сохраняет за раз весь производственный календарь, т.е. все дни из него
-        При наличии дня в БД перезаписывает его поля
+        При наличии дня в БД перезаписывает его поля, если они изменились
+        В режиме dry_run только сравнивает календарь с БД, ничего не записывая
 
         Args:
             self (Self@ExternalService): Экземпляр класса
             production_calendar (ProductionCalendar): Производственный календарь
+            dry_run (bool): Режим сравнения без записи в БД
 
         Returns:
-            int: Кол-во вставленных/изменённых дней в БД
+            dict[str, int]: Кол-во вставленных, обновлённых и неизменённых дней в БД
 
         Raises:
             Exception: В непредвиденной ситуации
 
         Examples:
-            >>>count_saved_days = await external_service.insert_production_calendar({..., days: [...]})
+            >>>counts = await external_service.insert_production_calendar({..., days: [...]})
         """
 
         try:
-            logger.info(f"Пробуем вставить производственный календарь в БД")
+            logger.info(f"Пробуем вставить производственный календарь в БД (dry_run={dry_run})")
             days_list: list[ReadyCalendarDay] = production_calendar.days
             if not days_list:
                 desc = "Некорректный формат производственного календаря! Требуется {..., days: [...]}"
@@ -150,7 +433,8 @@ class ExternalService:
                 day_data = CalendarDayInput(date=day_date, type_id=day.type_id)
                 correct_day = assemble_day(day_data, day.note)
                 list_correct_days.append(correct_day)
-            inserted_days = await self._repo.insert_production_calendar(list_correct_days)
-            return inserted_days
+            if dry_run:
+                return await self._repo.diff_production_calendar(list_correct_days)
+            return await self._repo.insert_production_calendar(list_correct_days)
         except Exception as e:
-            raise e
\ No newline at end of file
+            raise e
@@ -0,0 +1,149 @@
+from core.logger import setup_logger
+from core.config import settings
+from metrics import cache_lookups
+import asyncio
+import time
+from datetime import datetime
+from typing import Awaitable, Callable
+
+logger = setup_logger("services.external_cache")
+
+EXTERNAL_SOURCES: tuple[str, ...] = ("consultant", "hhru")
+
+RawCalendar = tuple[str, list[tuple[int, int, str]]]
+
+class ParsedCalendarCache:
+    """Кэш распарсенных внешних календарей
+
+    Класс хранит в памяти результат парсинга внешнего календаря, не зависящий от типа рабочей недели,
+    по ключу (источник, год). Календари прошедших лет не устаревают никогда, остальные устаревают через ttl секунд;
+    устаревшая запись отдаётся сразу, а в фоне запускается её обновление (stale-while-revalidate)
+
+    Args:
+        ttl (int): Время (сек.) свежести календаря текущего и будущих лет
+
+    Examples:
+        >>>parsed_calendar_cache = ParsedCalendarCache(600)
+        >>>source, raw_days = await parsed_calendar_cache.get(2025, loader)
+    """
+
+    def __init__(self, ttl: int) -> None:
+        """Конструктор класса
+
+        Создаёт пустой кэш распарсенных календарей
+
+        Args:
+            self (Self@ParsedCalendarCache): Экземпляр класса
+            ttl (int): Время (сек.) свежести календаря текущего и будущих лет
+        """
+
+        self._ttl = ttl
+        self._entries: dict[tuple[str, int], tuple[float, list[tuple[int, int, str]]]] = {}
+        self._refreshing: dict[int, asyncio.Task] = {}
+
+    def _is_fresh(self, year: int, stored_at: float) -> bool:
+        """Проверяет свежесть записи
+
+        Args:
+            self (Self@ParsedCalendarCache): Экземпляр класса
+            year (int): Год календаря
+            stored_at (float): Время сохранения записи (time.monotonic)
+
+        Returns:
+            bool: True - запись свежая, False - запись нужно обновить
+        """
+
+        if year < datetime.now().year:
+            return True
+        return time.monotonic() - stored_at < self._ttl
+
+    def _store(self, year: int, raw_calendar: RawCalendar) -> None:
+        """Сохраняет запись
+
+        Args:
+            self (Self@ParsedCalendarCache): Экземпляр класса
+            year (int): Год календаря
+            raw_calendar (RawCalendar): Источник и список дней вида (месяц, день, вид дня)
+        """
+
+        source, raw_days = raw_calendar
+        self._entries[(source, year)] = (time.monotonic(), raw_days)
+
+    def put(self, year: int, raw_calendar: RawCalendar) -> None:
+        """Заменяет календарь за год
+
+        Используется, когда календарь получен не из внешнего источника (например, перепарсен из архива)
+
+        Args:
+            self (Self@ParsedCalendarCache): Экземпляр класса
+            year (int): Год календаря
+            raw_calendar (RawCalendar): Источник и список дней вида (месяц, день, вид дня)
+        """
+
+        for source in EXTERNAL_SOURCES:
+            self._entries.pop((source, year), None)
+        self._store(year, raw_calendar)
+
+    async def _refresh(self, year: int, loader: Callable[[], Awaitable[RawCalendar]]) -> None:
+        """Обновляет запись в фоне
+
+        Args:
+            self (Self@ParsedCalendarCache): Экземпляр класса
+            year (int): Год календаря
+            loader (Callable[[], Awaitable[RawCalendar]]): Функция получения календаря из внешнего источника
+        """
+
+        try:
+            self._store(year, await loader())
+            logger.info(f"Календарь year={year} обновлён в фоне")
+        except Exception as e:
+            logger.warning(f"Не удалось обновить в фоне календарь year={year}, остаётся устаревшая запись: {str(e)}")
+        finally:
+            self._refreshing.pop(year, None)
+
+    async def get(self, year: int, loader: Callable[[], Awaitable[RawCalendar]], wait_fresh: bool = False) -> RawCalendar:
+        """Получает календарь за год
+
+        Отдаёт самую свежую запись из кэша среди источников, при необходимости запуская её фоновое обновление.
+        Если записи нет, получает календарь через loader и сохраняет его
+        С wait_fresh устаревшая запись не отдаётся сразу, а обновляется с ожиданием (при ошибке отдаётся устаревшая)
+
+        Args:
+            self (Self@ParsedCalendarCache): Экземпляр класса
+            year (int): Год календаря
+            loader (Callable[[], Awaitable[RawCalendar]]): Функция получения календаря из внешнего источника
+            wait_fresh (bool): Дождаться обновления устаревшей записи
+
+        Returns:
+            RawCalendar: Источник и список дней вида (месяц, день, вид дня)
+
+        Raises:
+            Exception: Если записи нет и loader завершился ошибкой
+        """
+
+        entries = [
+            (source, self._entries[(source, year)])
+            for source in EXTERNAL_SOURCES
+            if (source, year) in self._entries
+        ]
+        if entries:
+            source, (stored_at, raw_days) = max(entries, key=lambda entry: entry[1][0]) #самая свежая запись среди источников
+            cache_lookups.inc(("parsed_calendar", "hit" if self._is_fresh(year, stored_at) else "stale"))
+            if wait_fresh and not self._is_fresh(year, stored_at):
+                try:
+                    raw_calendar = await loader()
+                    self._store(year, raw_calendar)
+                    return raw_calendar
+                except Exception as e:
+                    logger.warning(f"Не удалось обновить календарь year={year}, отдаём устаревшую запись: {str(e)}")
+                    return source, raw_days
+            if not self._is_fresh(year, stored_at) and year not in self._refreshing:
+                logger.info(f"Календарь year={year} устарел, отдаём его и обновляем в фоне")
+                self._refreshing[year] = asyncio.create_task(self._refresh(year, loader))
+            return source, raw_days
+        cache_lookups.inc(("parsed_calendar", "miss"))
+        raw_calendar = await loader()
+        self._store(year, raw_calendar)
+        return raw_calendar
+
+parsed_calendar_cache = ParsedCalendarCache(settings.PARSED_CACHE_TTL)
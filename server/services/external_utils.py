@@ -1,83 +1,247 @@
 from core.logger import setup_logger
-from bs4 import BeautifulSoup
+from core.config import settings
+from bs4 import BeautifulSoup, SoupStrainer, Tag
 from core.consts import MONTHS, OFFICIAL_HOLIDAYS, WEEK_DAYS, DAY_TYPES
 from datetime import date
 from fastapi import HTTPException, status
+import re
 
 logger = setup_logger("services.external_utils")
 
-def parse_consultant_calendar(response_text: str, year: int, week_type: int) -> list[dict]:
-    """Парсит HTML для получения календарных дней
+DAY_KIND_WORK = "work"
+DAY_KIND_WEEKEND = "weekend"
+DAY_KIND_DAY_OFF = "day_off"
+DAY_KIND_HOLIDAY = "holiday"
+DAY_KIND_PREHOLIDAY = "preholiday"
+
+CONSULTANT_STRAINER = SoupStrainer("table", class_=re.compile(r"(?<![\w-])cal(?![\w-])")) #при парсинге class ещё не разбит на список
+HHRU_STRAINER = SoupStrainer("ul", class_=re.compile(r"(?<![\w-])calendar-list(?![\w-])"))
+CONSULTANT_FRAGMENT_START = re.compile(r"""<table\b[^>]*\bclass\s*=\s*["'][^"']*(?<![\w-])cal(?![\w-])""", re.IGNORECASE)
+HHRU_FRAGMENT_START = re.compile(r"""<ul\b[^>]*\bclass\s*=\s*["'][^"']*(?<![\w-])calendar-list(?![\w-])""", re.IGNORECASE)
+
+def _calendar_fragment(response_text: str, start_pattern: re.Pattern, end_tag: str) -> str:
+    """Вырезает из HTML-страницы фрагмент с календарём
+
+    Фрагмент начинается с первого тега календаря и заканчивается последним закрывающим тегом end_tag,
+    чтобы парсер не разбирал остальную страницу
+
+    Args:
+        response_text (str): HTML-страница
+        start_pattern (re.Pattern): Шаблон открывающего тега календаря
+        end_tag (str): Закрывающий тег календаря
+
+    Returns:
+        str: Фрагмент с календарём, либо пустая строка, если календарь не найден
+    """
+
+    start = start_pattern.search(response_text)
+    if not start:
+        return ""
+    end = response_text.rfind(end_tag)
+    if end < start.start():
+        return ""
+    return response_text[start.start():end + len(end_tag)]
+
+def _consultant_table_days(table: Tag) -> list[tuple[int, int, str]]:
+    """Извлекает дни из таблицы месяца Консультанта
+
+    Args:
+        table (Tag): Таблица месяца table.cal
+
+    Returns:
+        list[tuple[int, int, str]]: Список дней месяца вида (месяц, день, вид дня DAY_KIND_*)
+    """
+
+    raw_days: list[tuple[int, int, str]] = []
+    month_header = table.find("th", class_="month")
+    if not month_header:
+        return raw_days
+    month_name = month_header.get_text(strip=True).lower()
+    month_number = MONTHS.get(month_name)
+    if not month_number:
+        return raw_days
+    table_body = table.find("tbody")
+    if not table_body:
+        return raw_days
+    for row in table_body.find_all("tr"):
+        for cell in row.find_all("td"):
+            cell_classes = cell.get("class", [])
+            if cell_classes == "inactively":
+                continue
+            day_str = cell.get_text(strip=True)
+            day_text = "".join(d for d in day_str if d.isdigit())
+            if not day_text:
+                continue
+            day_number = int(day_text)
+            if "holiday" in cell_classes or (month_number, day_number) in OFFICIAL_HOLIDAYS.keys(): #официальный праздник перекрывается простым выходным, исправляем
+                day_kind = DAY_KIND_HOLIDAY
+            elif "weekend" in cell_classes:
+                day_kind = DAY_KIND_WEEKEND
+            elif "preholiday" in cell_classes:
+                day_kind = DAY_KIND_PREHOLIDAY
+            else:
+                day_kind = DAY_KIND_WORK
+            raw_days.append((month_number, day_number, day_kind))
+    return raw_days
+
+def _hhru_quarter_days(quarter: Tag) -> list[tuple[int, int, str]]:
+    """Извлекает дни из квартала hh.ru
+
+    Args:
+        quarter (Tag): Список месяцев квартала ul.calendar-list
+
+    Returns:
+        list[tuple[int, int, str]]: Список дней квартала вида (месяц, день, вид дня DAY_KIND_*)
+    """
+
+    raw_days: list[tuple[int, int, str]] = []
+    months_list = quarter.find_all("li", class_="calendar-list__item")
+    for month in months_list:
+        month_body = month.find("div", class_="calendar-list__item-body")
+        if not month_body:
+            continue
+        month_title = month_body.find("div", class_="calendar-list__item-title")
+        if not month_title:
+            continue
+        month_name = month_title.get_text(strip=True).lower()
+        month_number = MONTHS.get(month_name)
+        if not month_number:
+            continue
+        days_table = month_body.find("ul", class_="calendar-list__numbers")
+        if not days_table:
+            continue
+        days_list = days_table.find_all("li")
+        for day in days_list:
+            day_classes = day.get("class", [])
+            if "calendar-list__numbers__item_other" in day_classes:
+                continue
+            day_str = day.find(string=True, recursive=False)
+            day_text = "".join(d for d in day_str if d.isdigit())
+            if not day_text:
+                continue
+            if "час" in day_str:
+                if len(day_text) == 3:
+                    day_number = int(day_text[0:2])
+                elif len(day_text) == 2:
+                    day_number = int(day_text[0])
+            else:
+                day_number = int(day_text)
+            if "calendar-list__numbers__item_day-off" in day_classes and (month_number, day_number) in OFFICIAL_HOLIDAYS.keys():
+                day_kind = DAY_KIND_HOLIDAY
+            elif "calendar-list__numbers__item_day-off" in day_classes:
+                day_kind = DAY_KIND_DAY_OFF
+            elif "calendar-list__numbers__item_shortened" in day_classes:
+                day_kind = DAY_KIND_PREHOLIDAY
+            else:
+                day_kind = DAY_KIND_WORK
+            raw_days.append((month_number, day_number, day_kind))
+    return raw_days
+
+def parse_consultant_days_full(response_text: str) -> list[tuple[int, int, str]]:
+    """Парсит HTML Консультанта целиком
+
+    Строит дерево всей HTML-страницы и ищет в нём таблицы месяцев. Медленный, но устойчивый к разметке путь
+
+    Args:
+        response_text (str): HTML-страница Консультанта
+
+    Returns:
+        list[tuple[int, int, str]]: Список дней вида (месяц, день, вид дня DAY_KIND_*)
+    """
+
+    soup = BeautifulSoup(response_text, "html.parser")
+    raw_days: list[tuple[int, int, str]] = []
+    for table in soup.select("table.cal"):
+        raw_days.extend(_consultant_table_days(table))
+    return raw_days
+
+def parse_consultant_days_fast(response_text: str) -> list[tuple[int, int, str]]:
+    """Парсит только таблицы месяцев HTML Консультанта
+
+    Разбирает только фрагмент страницы от первой до последней таблицы и строит дерево
+    только из таблиц table.cal (SoupStrainer), пропуская остальную страницу
+
+    Args:
+        response_text (str): HTML-страница Консультанта
+
+    Returns:
+        list[tuple[int, int, str]]: Список дней вида (месяц, день, вид дня DAY_KIND_*)
+    """
+
+    fragment = _calendar_fragment(response_text, CONSULTANT_FRAGMENT_START, "</table>")
+    soup = BeautifulSoup(fragment, "html.parser", parse_only=CONSULTANT_STRAINER)
+    raw_days: list[tuple[int, int, str]] = []
+    for table in soup.select("table.cal"):
+        raw_days.extend(_consultant_table_days(table))
+    return raw_days
+
+def parse_hhru_days_full(response_text: str) -> list[tuple[int, int, str]]:
+    """Парсит HTML hh.ru целиком
+
+    Строит дерево всей HTML-страницы и ищет в нём кварталы. Медленный, но устойчивый к разметке путь
+
+    Args:
+        response_text (str): HTML-страница hh.ru
+
+    Returns:
+        list[tuple[int, int, str]]: Список дней вида (месяц, день, вид дня DAY_KIND_*)
+    """
+
+    soup = BeautifulSoup(response_text, "html.parser")
+    raw_days: list[tuple[int, int, str]] = []
+    for quarter in soup.select("ul.calendar-list"):
+        raw_days.extend(_hhru_quarter_days(quarter))
+    return raw_days
+
+def parse_hhru_days_fast(response_text: str) -> list[tuple[int, int, str]]:
+    """Парсит только кварталы HTML hh.ru
+
+    Разбирает только фрагмент страницы от первого до последнего квартала и строит дерево
+    только из кварталов ul.calendar-list (SoupStrainer), пропуская остальную страницу
+
+    Args:
+        response_text (str): HTML-страница hh.ru
+
+    Returns:
+        list[tuple[int, int, str]]: Список дней вида (месяц, день, вид дня DAY_KIND_*)
+    """
+
+    fragment = _calendar_fragment(response_text, HHRU_FRAGMENT_START, "</ul>")
+    soup = BeautifulSoup(fragment, "html.parser", parse_only=HHRU_STRAINER)
+    raw_days: list[tuple[int, int, str]] = []
+    for quarter in soup.select("ul.calendar-list"):
+        raw_days.extend(_hhru_quarter_days(quarter))
+    return raw_days
+
+def parse_consultant_days(response_text: str) -> list[tuple[int, int, str]]:
+    """Парсит HTML Консультанта без учёта типа рабочей недели
 
     Парсит HTML-страницу, полученную от Консультанта, и ищет в ней календарные дни,
-    после чего составляет список таких календарных дней
+    после чего составляет компактный список дней, не зависящий от типа рабочей недели
+    По умолчанию страница разбирается целиком. С PARSE_FAST_PATH сначала разбираются только таблицы месяцев,
+    а если в них не найдено ни одного дня - страница целиком
 
     Args:
         response_text (str): HTML-страница Консультанта
-        year (int): Год запрашиваемого календаря
-        week_type (int): Тип рабочей недели
 
     Returns:
-        list[dict]: Сформированный список календарных дней
+        list[tuple[int, int, str]]: Список дней вида (месяц, день, вид дня DAY_KIND_*)
 
     Raises:
         HTTPException: В непредвиденной ситуации
 
     Examples:
-        >>>correct_external_days = parse_consultant_calendar("...", 2025, 5)
+        >>>raw_days = parse_consultant_days("...")
     """
 
     try:
-        soup = BeautifulSoup(response_text, "html.parser")
-        calendar_tables = soup.select("table.cal")
-        weekends = ["сб", "вс"] if week_type == 5 else ["вс"]
-        correct_external_days: list[dict] = []
-        for table in calendar_tables:
-            month_header = table.find("th", class_="month")
-            if not month_header:
-                continue
-            month_name = month_header.get_text(strip=True).lower()
-            month_number = MONTHS.get(month_name)
-            if not month_number:
-                continue
-            table_body = table.find("tbody")
-            if not table_body:
-                continue
-            for row in table_body.find_all("tr"):
-                for cell in row.find_all("td"):
-                    cell_classes = cell.get("class", [])
-                    if cell_classes == "inactively":
-                        continue
-                    day_str = cell.get_text(strip=True)
-                    day_text = "".join(d for d in day_str if d.isdigit())
-                    if not day_text:
-                        continue
-                    day_number = int(day_text)
-                    day_date = date(year, month_number, day_number)
-                    note = None
-                    if "holiday" in cell_classes or (month_number, day_number) in OFFICIAL_HOLIDAYS.keys(): #официальный праздник перекрывается простым выходным, исправляем
-                        type_id = 3
-                        note = OFFICIAL_HOLIDAYS.get((month_number, day_number))
-                    elif "weekend" in cell_classes: #при 6-дневной неделе выходная суббота перестаёт быть таковой
-                        if WEEK_DAYS[day_date.weekday()] in weekends:
-                            type_id = 2
-                        else:
-                            type_id = 1
-                    elif "preholiday" in cell_classes:
-                        type_id = 1
-                        note = "Предпраздничный день"
-                    else:
-                        type_id = 1
-                    correct_day = {
-                        "date": day_date.strftime("%d.%m.%Y"),
-                        "type_id": type_id,
-                        "type_text": DAY_TYPES[type_id],
-                    }
-                    if note:
-                        correct_day.update({"note": note})
-                    correct_day.update({"week_day": WEEK_DAYS[day_date.weekday()]})
-                    correct_external_days.append(correct_day)
-        return correct_external_days
+        if not settings.PARSE_FAST_PATH:
+            return parse_consultant_days_full(response_text)
+        raw_days = parse_consultant_days_fast(response_text)
+        if not raw_days:
+            logger.warning("Разметка календаря Консультанта не распознана быстрым парсером, парсим страницу целиком")
+            raw_days = parse_consultant_days_full(response_text)
+        return raw_days
     except Exception as e:
         desc = f"При парсинге календаря Консультанта произошла ошибка: {str(e)}"
         logger.error(desc, exc_info=True)
@@ -86,15 +250,52 @@ def parse_consultant_calendar(response_text: str, year: int, week_type: int) ->
             detail=desc
         )
 
-def parse_hhru_calendar(response_text: str, year: int, week_type: int) -> list[dict]:
-    """Парсит HTML для получения календарных дней
+def parse_hhru_days(response_text: str) -> list[tuple[int, int, str]]:
+    """Парсит HTML hh.ru без учёта типа рабочей недели
 
     Парсит HTML-страницу, полученную от hh.ru, и ищет в ней календарные дни,
-    после чего составляет список таких календарных дней
+    после чего составляет компактный список дней, не зависящий от типа рабочей недели
+    По умолчанию страница разбирается целиком. С PARSE_FAST_PATH сначала разбираются только кварталы,
+    а если в них не найдено ни одного дня - страница целиком
 
     Args:
         response_text (str): HTML-страница hh.ru
-        year (int): Год запрашиваемого календаря
+
+    Returns:
+        list[tuple[int, int, str]]: Список дней вида (месяц, день, вид дня DAY_KIND_*)
+
+    Raises:
+        HTTPException: В непредвиденной ситуации
+
+    Examples:
+        >>>raw_days = parse_hhru_days("...")
+    """
+
+    try:
+        if not settings.PARSE_FAST_PATH:
+            return parse_hhru_days_full(response_text)
+        raw_days = parse_hhru_days_fast(response_text)
+        if not raw_days:
+            logger.warning("Разметка календаря hh.ru не распознана быстрым парсером, парсим страницу целиком")
+            raw_days = parse_hhru_days_full(response_text)
+        return raw_days
+    except Exception as e:
+        desc = f"При парсинге календаря hh.ru произошла ошибка: {str(e)}"
+        logger.error(desc, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=desc
+        )
+
+def project_calendar_days(raw_days: list[tuple[int, int, str]], year: int, week_type: int) -> list[dict]:
+    """Формирует календарные дни под тип рабочей недели
+
+    Дёшево превращает компактный список дней, не зависящий от типа рабочей недели,
+    в итоговый список календарных дней для week_type
+
+    Args:
+        raw_days (list[tuple[int, int, str]]): Список дней вида (месяц, день, вид дня DAY_KIND_*)
+        year (int): Год календаря
         week_type (int): Тип рабочей недели
 
     Returns:
@@ -104,83 +305,97 @@ def parse_hhru_calendar(response_text: str, year: int, week_type: int) -> list[d
         HTTPException: В непредвиденной ситуации
 
     Examples:
-        >>>correct_external_days = parse_hhru_calendar("...", 2025, 5)
+        >>>correct_external_days = project_calendar_days([(1, 1, "holiday"),...], 2025, 5)
     """
 
     try:
-        soup = BeautifulSoup(response_text, "html.parser")
-        correct_external_days: list[dict] = []
         weekends = ["сб", "вс"] if week_type == 5 else ["вс"]
-        calendar_quarters = soup.select("ul.calendar-list")
-        for quarter in calendar_quarters:
-            months_list = quarter.find_all("li", class_="calendar-list__item")
-            if not months_list:
-                continue
-            for month in months_list:
-                month_body = month.find("div", class_="calendar-list__item-body")
-                if not month_body:
-                    continue
-                month_title = month_body.find("div", class_="calendar-list__item-title")
-                if not month_title:
-                    continue
-                month_name = month_title.get_text(strip=True).lower()
-                month_number = MONTHS.get(month_name)
-                if not month_number:
-                    continue
-                days_table = month_body.find("ul", class_="calendar-list__numbers")
-                if not days_table:
-                    continue
-                days_list = days_table.find_all("li")
-                for day in days_list:
-                    day_classes = day.get("class", [])
-                    if "calendar-list__numbers__item_other" in day_classes:
-                        continue
-                    day_str = day.find(text=True, recursive=False)
-                    day_text = "".join(d for d in day_str if d.isdigit())
-                    if not day_text:
-                        continue
-                    if "час" in day_str:
-                        if len(day_text) == 3:
-                            day_number = int(day_text[0:2])
-                        elif len(day_text) == 2:
-                            day_number = int(day_text[0])
-                    else:
-                        day_number = int(day_text)
-                    day_date = date(year, month_number, day_number)
-                    note = None
-                    if "calendar-list__numbers__item_day-off" in day_classes and (month_number, day_number) in OFFICIAL_HOLIDAYS.keys():
-                        type_id = 3
-                        note = OFFICIAL_HOLIDAYS.get((month_number, day_number))
-                    elif "calendar-list__numbers__item_day-off" in day_classes:
-                        if WEEK_DAYS[day_date.weekday()] not in weekends and week_type == 5:
-                            type_id = 3
-                        elif WEEK_DAYS[day_date.weekday()] in weekends:
-                            type_id = 2
-                        elif WEEK_DAYS[day_date.weekday()] == "сб" and week_type == 6:
-                            type_id = 1
-                    elif "calendar-list__numbers__item_shortened" in day_classes:
-                        type_id = 1
-                        note = "Предпраздничный день"
-                    else:
-                        type_id = 1
-                    correct_day = {
-                        "date": day_date.strftime("%d.%m.%Y"),
-                        "type_id": type_id,
-                        "type_text": DAY_TYPES[type_id],
-                    }
-                    if note:
-                        correct_day.update({"note": note})
-                    correct_day.update({"week_day": WEEK_DAYS[day_date.weekday()]})
-                    correct_external_days.append(correct_day)
+        correct_external_days: list[dict] = []
+        for month_number, day_number, day_kind in raw_days:
+            day_date = date(year, month_number, day_number)
+            week_day = WEEK_DAYS[day_date.weekday()]
+            note = None
+            if day_kind == DAY_KIND_HOLIDAY:
+                type_id = 3
+                note = OFFICIAL_HOLIDAYS.get((month_number, day_number))
+            elif day_kind == DAY_KIND_WEEKEND: #при 6-дневной неделе выходная суббота перестаёт быть таковой
+                type_id = 2 if week_day in weekends else 1
+            elif day_kind == DAY_KIND_DAY_OFF: #перенесённый выходной в будни считается праздником
+                if week_day in weekends:
+                    type_id = 2
+                elif week_day == "сб" and week_type == 6:
+                    type_id = 1
+                else:
+                    type_id = 3
+            elif day_kind == DAY_KIND_PREHOLIDAY:
+                type_id = 1
+                note = "Предпраздничный день"
+            else:
+                type_id = 1
+            correct_day = {
+                "date": day_date.strftime("%d.%m.%Y"),
+                "type_id": type_id,
+                "type_text": DAY_TYPES[type_id],
+            }
+            if note:
+                correct_day.update({"note": note})
+            correct_day.update({"week_day": week_day})
+            correct_external_days.append(correct_day)
         return correct_external_days
     except Exception as e:
-        desc = f"При парсинге календаря hh.ru произошла ошибка: {str(e)}"
+        desc = f"При формировании календарных дней произошла ошибка: {str(e)}"
         logger.error(desc, exc_info=True)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=desc
         )
 
+def parse_consultant_calendar(response_text: str, year: int, week_type: int) -> list[dict]:
+    """Парсит HTML для получения календарных дней
+
+    Парсит HTML-страницу, полученную от Консультанта, и ищет в ней календарные дни,
+    после чего составляет список таких календарных дней
+
+    Args:
+        response_text (str): HTML-страница Консультанта
+        year (int): Год запрашиваемого календаря
+        week_type (int): Тип рабочей недели
+
+    Returns:
+        list[dict]: Сформированный список календарных дней
+
+    Raises:
+        HTTPException: В непредвиденной ситуации
+
+    Examples:
+        >>>correct_external_days = parse_consultant_calendar("...", 2025, 5)
+    """
+
+    return project_calendar_days(parse_consultant_days(response_text), year, week_type)
+
+def parse_hhru_calendar(response_text: str, year: int, week_type: int) -> list[dict]:
+    """Парсит HTML для получения календарных дней
+
+    Парсит HTML-страницу, полученную от hh.ru, и ищет в ней календарные дни,
+    после чего составляет список таких календарных дней
+
+    Args:
+        response_text (str): HTML-страница hh.ru
+        year (int): Год запрашиваемого календаря
+        week_type (int): Тип рабочей недели
+
+    Returns:
+        list[dict]: Сформированный список календарных дней
+
+    Raises:
+        HTTPException: В непредвиденной ситуации
+
+    Examples:
+        >>>correct_external_days = parse_hhru_calendar("...", 2025, 5)
+    """
+
+    return project_calendar_days(parse_hhru_days(response_text), year, week_type)
+
 def get_statistic(correct_external_days: list[dict]) -> dict:
     """Формирует статистику
 
@@ -0,0 +1,496 @@
+from core.logger import setup_logger
+from core.config import settings
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from httpx import AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import async_session_maker
+from repo import CalendarDayRepository, ImportJobRepository
+from model import CalendarDay, ImportJob
+from schemas.schemas import CalendarDayInput, ProductionCalendar, ReadyCalendarDay
+from services.calendar_day_utils import assemble_day, parse_date
+from services.external import ExternalService, EXTERNAL_FIRST_YEAR, external_years
+from services.external_cache import parsed_calendar_cache
+from services.external_utils import project_calendar_days
+from page_archive import page_archive
+from fastapi import HTTPException, status
+
+logger = setup_logger("services.jobs")
+
+JOB_INSERT_PRODUCTION_CALENDAR = "insert_production_calendar"
+JOB_EXTERNAL_SYNC = "external_sync"
+JOB_REPARSE_ARCHIVE = "reparse_archive"
+
+class JobRunner:
+    """Исполнитель фоновых задач
+
+    Класс описывает внутрипроцессную очередь фоновых задач на asyncio с ограниченным числом воркеров.
+    Сами задачи хранятся в таблице import_job, поэтому после перезапуска сервера
+    незавершённые задачи возобновляются из неё. Кроме того, раз в rescan_interval секунд таблица просматривается
+    повторно: так подхватываются задачи, брошенные упавшим воркером уже после старта остальных воркеров
+
+    Args:
+        workers (int): Кол-во одновременно выполняемых задач
+        chunk_size (int): Кол-во дней, записываемых в БД за одну транзакцию
+        stale_timeout (int): Время (сек.) без обновления прогресса, после которого задача считается брошенной
+        rescan_interval (int): Период (сек.) повторного просмотра таблицы задач, 0 - только при старте
+
+    Examples:
+        >>>job_runner = JobRunner(2, 100, 300, 60)
+        >>>await job_runner.start(http_client)
+    """
+
+    def __init__(self, workers: int, chunk_size: int, stale_timeout: int, rescan_interval: int) -> None:
+        """Конструктор класса
+
+        Создаёт экземпляр исполнителя фоновых задач, сами воркеры запускаются методом start
+
+        Args:
+            self (Self@JobRunner): Экземпляр класса
+            workers (int): Кол-во одновременно выполняемых задач
+            chunk_size (int): Кол-во дней, записываемых в БД за одну транзакцию
+            stale_timeout (int): Время (сек.) без обновления прогресса, после которого задача считается брошенной
+            rescan_interval (int): Период (сек.) повторного просмотра таблицы задач, 0 - только при старте
+        """
+
+        self._workers_count = workers
+        self._chunk_size = chunk_size
+        self._stale_timeout = timedelta(seconds=stale_timeout)
+        self._rescan_interval = rescan_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: list[asyncio.Task] = []
+        self._rescan_task: Optional[asyncio.Task] = None
+        self._queued: set[int] = set()
+        self._running: set[int] = set()
+        self._http_client: Optional[AsyncClient] = None
+
+    def _stale_before(self) -> datetime:
+        """Граница устаревания прогресса задачи
+
+        Args:
+            self (Self@JobRunner): Экземпляр класса
+
+        Returns:
+            datetime: Момент времени, раньше которого прогресс задачи считается устаревшим
+        """
+
+        return datetime.now(timezone.utc) - self._stale_timeout
+
+    async def _scan(self) -> int:
+        """Ставит в очередь ожидающие и брошенные задачи из таблицы
+
+        Задачи, которые уже стоят в очереди или выполняются этим процессом, повторно не ставятся
+
+        Args:
+            self (Self@JobRunner): Экземпляр класса
+
+        Returns:
+            int: Кол-во поставленных в очередь задач
+        """
+
+        async with async_session_maker() as session:
+            job_ids = await ImportJobRepository(session).get_resumable_job_ids(self._stale_before())
+        new_job_ids = [job_id for job_id in job_ids if job_id not in self._queued and job_id not in self._running]
+        for job_id in new_job_ids:
+            self.enqueue(job_id)
+        return len(new_job_ids)
+
+    async def _rescan_loop(self) -> None:
+        """Цикл повторного просмотра таблицы задач
+
+        Брошенную задачу захватит тот воркер, который первым увидит её после истечения stale_timeout
+
+        Args:
+            self (Self@JobRunner): Экземпляр класса
+        """
+
+        while True:
+            await asyncio.sleep(self._rescan_interval)
+            try:
+                resumed = await self._scan()
+                if resumed:
+                    logger.info(f"Возобновлено ожидающих и брошенных фоновых задач: {resumed}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"При поиске брошенных фоновых задач произошла ошибка: {str(e)}", exc_info=True)
+
+    async def start(self, http_client: AsyncClient) -> None:
+        """Запускает воркеры
+
+        Запускает воркеры, ставит в очередь все незавершённые задачи из таблицы
+        и запускает её повторный просмотр раз в rescan_interval секунд
+        Предполагается использование только при старте сервера
+
+        Args:
+            self (Self@JobRunner): Экземпляр класса
+            http_client (AsyncClient): Общий HTTP-клиент для запросов к внешним источникам
+
+        Raises:
+            Exception: В непредвиденной ситуации
+        """
+
+        try:
+            self._http_client = http_client
+            self._queue = asyncio.Queue()
+            self._workers = [
+                asyncio.create_task(self._worker(), name=f"job-worker-{number}")
+                for number in range(self._workers_count)
+            ]
+            resumed = await self._scan()
+            if self._rescan_interval:
+                self._rescan_task = asyncio.create_task(self._rescan_loop(), name="job-rescan")
+            logger.info(f"Запущено {self._workers_count} воркеров фоновых задач, возобновлено задач: {resumed}")
+        except Exception as e:
+            desc = f"При запуске воркеров фоновых задач произошла ошибка: {str(e)}"
+            logger.error(desc, exc_info=True)
+            raise e
+
+    async def stop(self) -> None:
+        """Останавливает воркеры
+
+        Останавливает воркеры, а выполнявшиеся задачи возвращает в статус pending,
+        чтобы они сразу возобновились при следующем запуске
+        Предполагается использование только при остановке сервера
+
+        Args:
+            self (Self@JobRunner): Экземпляр класса
+        """
+
+        running = set(self._running)
+        tasks = self._workers + ([self._rescan_task] if self._rescan_task is not None else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._rescan_task = None
+        self._queue = None
+        self._queued.clear()
+        if running:
+            try:
+                async with async_session_maker() as session:
+                    repo = ImportJobRepository(session)
+                    for job_id in running:
+                        await repo.update_job(job_id, status="pending")
+                logger.info(f"Прерванные задачи возвращены в очередь: {sorted(running)}")
+            except Exception as e:
+                logger.error(f"При возврате прерванных задач в очередь произошла ошибка: {str(e)}", exc_info=True)
+
+    def enqueue(self, job_id: int) -> None:
+        """Ставит задачу в очередь
+
+        Args:
+            self (Self@JobRunner): Экземпляр класса
+            job_id (int): Id задачи
+
+        Raises:
+            HTTPException: Если воркеры не запущены
+        """
+
+        if self._queue is None:
+            desc = "Воркеры фоновых задач не запущены"
+            logger.error(desc)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=desc
+            )
+        self._queued.add(job_id)
+        self._queue.put_nowait(job_id)
+
+    async def _worker(self) -> None:
+        """Цикл воркера
+
+        Бесконечно забирает id задач из очереди и выполняет их
+
+        Args:
+            self (Self@JobRunner): Экземпляр класса
+        """
+
+        while True:
+            job_id = await self._queue.get()
+            self._queued.discard(job_id)
+            try:
+                await self._run_job(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"При выполнении фоновой задачи id={job_id} произошла ошибка: {str(e)}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    async def _update(self, job_id: int, **values) -> None:
+        """Обновляет задачу в отдельной короткой сессии
+
+        Args:
+            self (Self@JobRunner): Экземпляр класса
+            job_id (int): Id задачи
+            **values: Обновляемые поля задачи
+        """
+
+        async with async_session_maker() as session:
+            await ImportJobRepository(session).update_job(job_id, **values)
+
+    async def _run_job(self, job_id: int) -> None:
+        """Выполняет задачу
+
+        Захватывает задачу и выполняет её в зависимости от типа, после чего сохраняет результат или ошибку
+
+        Args:
+            self (Self@JobRunner): Экземпляр класса
+            job_id (int): Id задачи
+        """
+
+        async with async_session_maker() as session:
+            job = await ImportJobRepository(session).claim_job(job_id, self._stale_before())
+        if job is None:
+            logger.info(f"Фоновая задача id={job_id} уже выполняется или завершена")
+            return
+        self._running.add(job_id)
+        try:
+            logger.info(f"Выполняем фоновую задачу: {job}")
+            if job.kind == JOB_INSERT_PRODUCTION_CALENDAR:
+                production_calendar = ProductionCalendar.model_validate(job.payload)
+                result = await self._write_days(job_id, production_calendar.days)
+            elif job.kind == JOB_EXTERNAL_SYNC:
+                result = await self._run_external_sync(job)
+            elif job.kind == JOB_REPARSE_ARCHIVE:
+                result = await self._run_reparse_archive(job)
+            else:
+                raise ValueError(f"Неизвестный тип задачи kind={job.kind}")
+            await self._update(job_id, status="done", result=result, finished_at=datetime.now(timezone.utc))
+            logger.info(f"Фоновая задача id={job_id} успешно выполнена: {result}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            desc = f"При выполнении фоновой задачи id={job_id} произошла ошибка: {str(e)}"
+            logger.error(desc, exc_info=True)
+            await self._update(job_id, status="failed", error=desc, finished_at=datetime.now(timezone.utc))
+        finally:
+            self._running.discard(job_id)
+
+    async def _run_external_sync(self, job: ImportJob) -> dict[str, int]:
+        """Синхронизирует календарь с внешним источником
+
+        Получает календарь за год из внешнего источника и записывает его в БД
+
+        Args:
+            self (Self@JobRunner): Экземпляр класса
+            job (ImportJob): Задача синхронизации
+
+        Returns:
+            dict[str, int]: Кол-во вставленных, обновлённых и неизменённых дней
+        """
+
+        year = job.payload["year"]
+        week_type = job.payload["week_type"]
+        async with async_session_maker() as session: #сессия не используется при получении календаря, соединение не занимается
+            calendar = await ExternalService(session, self._http_client).parse_external_calendar(year, week_type, False)
+        ready_days = [ReadyCalendarDay(**day) for day in calendar["days"]]
+        await self._update(job.id, rows_total=len(ready_days))
+        return await self._write_days(job.id, ready_days)
+
+    async def _run_reparse_archive(self, job: ImportJob) -> dict:
+        """Пересобирает календари из архива страниц
+
+        Перепарсивает архив текущими парсерами без обращения к внешним источникам, обновляет кэш распарсенных
+        календарей и записывает в БД только изменившиеся дни
+
+        Args:
+            self (Self@JobRunner): Экземпляр класса
+            job (ImportJob): Задача перепарсинга архива
+
+        Returns:
+            dict: Кол-во вставленных, обновлённых и неизменённых дней и источник календаря каждого года
+        """
+
+        week_type = job.payload["week_type"]
+        raw_calendars = await page_archive.reparse(job.payload.get("years"))
+        ready_days: list[ReadyCalendarDay] = []
+        for year, raw_calendar in sorted(raw_calendars.items()):
+            parsed_calendar_cache.put(year, raw_calendar)
+            ready_days.extend(ReadyCalendarDay(**day) for day in project_calendar_days(raw_calendar[1], year, week_type))
+        await self._update(job.id, rows_total=len(ready_days))
+        counts = await self._write_days(job.id, ready_days)
+        return {**counts, "sources": {str(year): source for year, (source, _) in sorted(raw_calendars.items())}}
+
+    async def _write_days(self, job_id: int, ready_days: list[ReadyCalendarDay]) -> dict[str, int]:
+        """Записывает дни в БД частями
+
+        Собирает модели календарных дней, после чего записывает их в БД частями по chunk_size,
+        каждую часть в своей короткой транзакции, обновляя прогресс задачи
+
+        Args:
+            self (Self@JobRunner): Экземпляр класса
+            job_id (int): Id задачи
+            ready_days (list[ReadyCalendarDay]): Список готовых дней
+
+        Returns:
+            dict[str, int]: Кол-во вставленных, обновлённых и неизменённых дней
+        """
+
+        list_correct_days: list[CalendarDay] = []
+        for index, day in enumerate(ready_days, start=1):
+            day_data = CalendarDayInput(date=parse_date(day.date), type_id=day.type_id)
+            list_correct_days.append(assemble_day(day_data, day.note))
+            if index % self._chunk_size == 0:
+                await self._update(job_id, rows_validated=index)
+        await self._update(job_id, rows_total=len(ready_days), rows_validated=len(ready_days))
+        counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+        for start in range(0, len(list_correct_days), self._chunk_size):
+            chunk = list_correct_days[start:start + self._chunk_size]
+            async with async_session_maker() as session:
+                chunk_counts = await CalendarDayRepository(session).insert_production_calendar(chunk)
+            for key in counts:
+                counts[key] += chunk_counts[key]
+            await self._update(job_id, rows_written=start + len(chunk))
+        return counts
+
+job_runner = JobRunner(settings.JOB_WORKERS, settings.JOB_CHUNK_SIZE, settings.JOB_STALE_TIMEOUT, settings.JOB_RESCAN_INTERVAL)
+
+class JobService:
+    """Сервис бизнес-логики фоновых задач
+
+    Класс описывает методы постановки фоновых задач в очередь и получения их статуса
+
+    Args:
+        session (AsyncSession): Асинхронная сессия для выполнения запросов к БД
+
+    Examples:
+        >>>job_service = JobService(session)
+    """
+
+    def __init__(self, session: AsyncSession) -> None:
+        """Конструктор класса
+
+        Создаёт экземпляр класса для работы с фоновыми задачами
+
+        Args:
+            self (Self@JobService): Экземпляр класса
+            session (AsyncSession): Асинхронная сессия для выполнения запросов к БД
+        """
+
+        self._repo = ImportJobRepository(session)
+
+    async def submit_insert_production_calendar(self, production_calendar: ProductionCalendar) -> dict:
+        """Ставит в очередь вставку производственного календаря
+
+        Args:
+            self (Self@JobService): Экземпляр класса
+            production_calendar (ProductionCalendar): Производственный календарь
+
+        Returns:
+            dict: Id и статус созданной задачи
+
+        Raises:
+            Exception: В непредвиденной ситуации
+
+        Examples:
+            >>>job = await job_service.submit_insert_production_calendar({..., days: [...]})
+        """
+
+        try:
+            payload = production_calendar.model_dump(mode="json")
+            job = await self._repo.create_job(JOB_INSERT_PRODUCTION_CALENDAR, payload, len(production_calendar.days))
+            job_runner.enqueue(job.id)
+            return {"job_id": job.id, "status": job.status}
+        except Exception as e:
+            raise e
+
+    async def submit_external_sync(self, year: int, week_type: int) -> dict:
+        """Ставит в очередь синхронизацию с внешним источником
+
+        Args:
+            self (Self@JobService): Экземпляр класса
+            year (int): Год синхронизируемого календаря
+            week_type (int): Тип рабочей недели
+
+        Returns:
+            dict: Id и статус созданной задачи
+
+        Raises:
+            HTTPException: Если год не поддерживается внешними источниками
+            Exception: В непредвиденной ситуации
+
+        Examples:
+            >>>job = await job_service.submit_external_sync(2025, 5)
+        """
+
+        try:
+            if year not in external_years():
+                desc = f"Год должен быть от {EXTERNAL_FIRST_YEAR} и до следующего включительно, но получен {year}"
+                logger.warning(desc)
+                raise HTTPException(
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    detail=desc
+                )
+            job = await self._repo.create_job(JOB_EXTERNAL_SYNC, {"year": year, "week_type": week_type}, 0)
+            job_runner.enqueue(job.id)
+            return {"job_id": job.id, "status": job.status}
+        except Exception as e:
+            raise e
+
+    async def submit_reparse_archive(self, week_type: int, years: Optional[list[int]]) -> dict:
+        """Ставит в очередь перепарсинг архива страниц
+
+        Args:
+            self (Self@JobService): Экземпляр класса
+            week_type (int): Тип рабочей недели
+            years (Optional[list[int]]): Перепарсиваемые годы, по умолчанию все годы архива
+
+        Returns:
+            dict: Id и статус созданной задачи
+
+        Raises:
+            Exception: В непредвиденной ситуации
+
+        Examples:
+            >>>job = await job_service.submit_reparse_archive(5, [2020, 2024])
+        """
+
+        try:
+            job = await self._repo.create_job(JOB_REPARSE_ARCHIVE, {"week_type": week_type, "years": years}, 0)
+            job_runner.enqueue(job.id)
+            return {"job_id": job.id, "status": job.status}
+        except Exception as e:
+            raise e
+
+    async def get_job_status(self, job_id: int) -> dict:
+        """Получает статус и прогресс задачи
+
+        Args:
+            self (Self@JobService): Экземпляр класса
+            job_id (int): Id задачи
+
+        Returns:
+            dict: Статус, прогресс, время выполнения и результат задачи
+
+        Raises:
+            Exception: В непредвиденной ситуации
+
+        Examples:
+            >>>job_status = await job_service.get_job_status(1)
+        """
+
+        try:
+            job = await self._repo.get_job(job_id)
+            elapsed = None
+            if job.started_at:
+                finished_at = job.finished_at or datetime.now(timezone.utc)
+                elapsed = round((finished_at - job.started_at).total_seconds(), 3)
+            return {
+                "job_id": job.id,
+                "kind": job.kind,
+                "status": job.status,
+                "rows_total": job.rows_total,
+                "rows_validated": job.rows_validated,
+                "rows_written": job.rows_written,
+                "elapsed": elapsed,
+                "created_at": job.created_at.isoformat(),
+                "started_at": job.started_at.isoformat() if job.started_at else None,
+                "finished_at": job.finished_at.isoformat() if job.finished_at else None,
+                "result": job.result,
+                "error": job.error
+            }
+        except Exception as e:
+            raise e
@@ -0,0 +1,194 @@
+from core.logger import setup_logger
+from core.config import settings
+import asyncio
+import random
+import time
+from datetime import datetime
+from typing import Optional
+from httpx import AsyncClient
+from database import async_session_maker, engine
+from sqlalchemy import text
+from schemas.schemas import ProductionCalendar
+from services.external import ExternalService, external_years
+
+logger = setup_logger("services.sync")
+
+SYNC_LOCK_KEY = 0x63616C73796E63 #ключ advisory-блокировки синхронизации ("calsync")
+
+class SyncScheduler:
+    """Планировщик синхронизации с внешними источниками
+
+    Класс описывает фоновую задачу, которая раз в interval секунд (плюс случайная добавка до jitter секунд)
+    получает из внешних источников календари всех поддерживаемых лет (2017 - следующий год) и записывает их в БД
+    с перезаписью только изменившихся дней. Одновременно синхронизируется не больше concurrency лет,
+    старт каждого года сдвигается на случайную задержку, чтобы не нагружать источники пачкой запросов.
+    Синхронизацию выполняет только один процесс кластера: тот, кто взял advisory-блокировку PostgreSQL,
+    остальные воркеры всех хостов пропускают свой запуск
+
+    Args:
+        interval (int): Период (сек.) синхронизации
+        jitter (float): Максимальная случайная добавка (сек.) к периоду и к старту синхронизации года
+        concurrency (int): Кол-во одновременно синхронизируемых лет
+        week_type (int): Тип рабочей недели записываемого календаря
+
+    Examples:
+        >>>sync_scheduler = SyncScheduler(21600, 60.0, 2, 5)
+        >>>sync_scheduler.start(http_client)
+    """
+
+    def __init__(self, interval: int, jitter: float, concurrency: int, week_type: int) -> None:
+        """Конструктор класса
+
+        Создаёт экземпляр планировщика, сама фоновая задача запускается методом start
+
+        Args:
+            self (Self@SyncScheduler): Экземпляр класса
+            interval (int): Период (сек.) синхронизации
+            jitter (float): Максимальная случайная добавка (сек.) к периоду и к старту синхронизации года
+            concurrency (int): Кол-во одновременно синхронизируемых лет
+            week_type (int): Тип рабочей недели записываемого календаря
+        """
+
+        self._interval = interval
+        self._jitter = jitter
+        self._concurrency = concurrency
+        self._week_type = week_type
+        self._task: Optional[asyncio.Task] = None
+        self._http_client: Optional[AsyncClient] = None
+        self.last_run: Optional[dict] = None
+
+    def start(self, http_client: AsyncClient) -> None:
+        """Запускает фоновую задачу синхронизации
+
+        Предполагается использование только при старте сервера
+
+        Args:
+            self (Self@SyncScheduler): Экземпляр класса
+            http_client (AsyncClient): Общий HTTP-клиент для запросов к внешним источникам
+        """
+
+        self._http_client = http_client
+        self._task = asyncio.create_task(self._loop(), name="external-sync")
+        logger.info(f"Планировщик синхронизации запущен (interval={self._interval}, concurrency={self._concurrency})")
+
+    async def stop(self) -> None:
+        """Останавливает фоновую задачу синхронизации
+
+        Предполагается использование только при остановке сервера
+
+        Args:
+            self (Self@SyncScheduler): Экземпляр класса
+        """
+
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            logger.info("Планировщик синхронизации остановлен")
+
+    async def _loop(self) -> None:
+        """Цикл планировщика
+
+        Первая синхронизация запускается после случайной задержки, чтобы воркеры сервера не стартовали её одновременно
+
+        Args:
+            self (Self@SyncScheduler): Экземпляр класса
+        """
+
+        await asyncio.sleep(random.uniform(0, self._jitter))
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"При синхронизации с внешними источниками произошла ошибка: {str(e)}", exc_info=True)
+            await asyncio.sleep(self._interval + random.uniform(0, self._jitter))
+
+    async def run_once(self) -> Optional[dict]:
+        """Синхронизирует все поддерживаемые годы, если синхронизацию не выполняет другой процесс
+
+        На время синхронизации берётся сессионная advisory-блокировка SYNC_LOCK_KEY на отдельном соединении
+        в режиме AUTOCOMMIT (без долгой открытой транзакции). Если процесс аварийно завершится,
+        PostgreSQL снимет блокировку вместе с его соединением
+
+        Args:
+            self (Self@SyncScheduler): Экземпляр класса
+
+        Returns:
+            Optional[dict]: Результат синхронизации каждого года и общее время,
+                либо None, если синхронизацию уже выполняет другой процесс
+        """
+
+        async with engine.connect() as connection:
+            connection = await connection.execution_options(isolation_level="AUTOCOMMIT")
+            if not await connection.scalar(text("SELECT pg_try_advisory_lock(:key)"), {"key": SYNC_LOCK_KEY}):
+                logger.info("Синхронизацию с внешними источниками выполняет другой процесс, запуск пропущен")
+                return None
+            try:
+                return await self._sync_all()
+            finally:
+                await connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SYNC_LOCK_KEY})
+
+    async def _sync_all(self) -> dict:
+        """Синхронизирует все поддерживаемые годы
+
+        Args:
+            self (Self@SyncScheduler): Экземпляр класса
+
+        Returns:
+            dict: Результат синхронизации каждого года и общее время
+        """
+
+        started = time.perf_counter()
+        semaphore = asyncio.Semaphore(self._concurrency)
+        years = list(external_years())
+        results = await asyncio.gather(*(self._sync_year(year, semaphore) for year in years))
+        totals = {"inserted": 0, "updated": 0, "unchanged": 0, "failed": 0}
+        for result in results:
+            if "error" in result:
+                totals["failed"] += 1
+                continue
+            for key in ("inserted", "updated", "unchanged"):
+                totals[key] += result[key]
+        self.last_run = {
+            "finished_at": datetime.now().isoformat(),
+            "elapsed": round(time.perf_counter() - started, 3),
+            "totals": totals,
+            "years": dict(zip(years, results))
+        }
+        logger.info(f"Синхронизация с внешними источниками завершена за {self.last_run['elapsed']} сек.: {totals}")
+        return self.last_run
+
+    async def _sync_year(self, year: int, semaphore: asyncio.Semaphore) -> dict:
+        """Синхронизирует календарь одного года
+
+        Получает календарь из внешних источников, дожидаясь обновления устаревшего календаря в кэше,
+        и записывает в БД только изменившиеся дни
+
+        Args:
+            self (Self@SyncScheduler): Экземпляр класса
+            year (int): Год календаря
+            semaphore (asyncio.Semaphore): Семафор, ограничивающий кол-во одновременно синхронизируемых лет
+
+        Returns:
+            dict: Кол-во вставленных, обновлённых и неизменённых дней, либо ошибка
+        """
+
+        await asyncio.sleep(random.uniform(0, self._jitter))
+        async with semaphore:
+            try:
+                async with async_session_maker() as session: #соединение занимается только на время записи
+                    external_service = ExternalService(session, self._http_client)
+                    calendar = await external_service.parse_external_calendar(year, self._week_type, False, wait_fresh=True)
+                    counts = await external_service.insert_production_calendar(ProductionCalendar.model_validate(calendar))
+                logger.info(f"Календарь year={year} синхронизирован: {counts}")
+                return counts
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                desc = str(getattr(e, "detail", e))
+                logger.warning(f"Не удалось синхронизировать календарь year={year}: {desc}")
+                return {"error": desc}
+
+sync_scheduler = SyncScheduler(settings.SYNC_INTERVAL, settings.SYNC_JITTER, settings.SYNC_CONCURRENCY, settings.SYNC_WEEK_TYPE)
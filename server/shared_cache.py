@@ -0,0 +1,472 @@
+from core.logger import setup_logger
+from core.config import settings
+from schemas.schemas import CalendarDayInDB
+from pydantic import TypeAdapter
+from typing import Any, Callable, Optional
+from urllib.parse import urlsplit
+import asyncio
+import json
+import time
+
+logger = setup_logger("shared_cache")
+
+YEAR_BLOCK = TypeAdapter(list[CalendarDayInDB])
+
+class RespError(Exception):
+    """Ошибка, которую вернул сервер по протоколу Redis"""
+
+class RespClient:
+    """Минимальный клиент протокола Redis (RESP2)
+
+    Класс держит небольшой пул соединений и выполняет по одной команде на соединение за раз.
+    Соединение, на котором команда завершилась ошибкой, таймаутом или отменой, закрывается,
+    так как в нём может остаться непрочитанный ответ
+
+    Args:
+        url (str): Адрес вида redis://[:password@]host:port[/db]
+        pool_size (int): Максимальное кол-во соединений
+        timeout (float): Таймаут (сек.) подключения и выполнения команды
+
+    Examples:
+        >>>client = RespClient("redis://localhost:6379/0", 4, 0.2)
+        >>>await client.command("SET", "key", b"value", "PX", 1000)
+    """
+
+    def __init__(self, url: str, pool_size: int, timeout: float) -> None:
+        """Конструктор класса
+
+        Создаёт клиент без соединений, соединения устанавливаются при первых командах
+
+        Args:
+            self (Self@RespClient): Экземпляр класса
+            url (str): Адрес вида redis://[:password@]host:port[/db]
+            pool_size (int): Максимальное кол-во соединений
+            timeout (float): Таймаут (сек.) подключения и выполнения команды
+        """
+
+        parts = urlsplit(url)
+        self._host = parts.hostname or "localhost"
+        self._port = parts.port or 6379
+        self._password = parts.password
+        self._db = int(parts.path.lstrip("/") or 0)
+        self._timeout = timeout
+        self._slots = asyncio.Semaphore(pool_size)
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+
+    @staticmethod
+    def _encode(args: tuple) -> bytes:
+        """Кодирует команду массивом bulk-строк
+
+        Args:
+            args (tuple): Команда и её аргументы (str, bytes или int)
+
+        Returns:
+            bytes: Команда в формате RESP
+        """
+
+        chunks = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            value = arg if isinstance(arg, bytes) else str(arg).encode("utf-8")
+            chunks.append(b"$%d\r\n%s\r\n" % (len(value), value))
+        return b"".join(chunks)
+
+    async def _read_reply(self, reader: asyncio.StreamReader) -> Any:
+        """Читает один ответ сервера
+
+        Args:
+            self (Self@RespClient): Экземпляр класса
+            reader (asyncio.StreamReader): Поток чтения соединения
+
+        Returns:
+            Any: str, int, bytes, None или список
+
+        Raises:
+            RespError: Если сервер вернул ошибку
+            ConnectionError: Если соединение закрыто, в том числе посреди ответа, или ответ не распознан
+        """
+
+        try:
+            return await self._parse_reply(reader)
+        except asyncio.IncompleteReadError:
+            raise ConnectionError("Соединение закрыто сервером посреди ответа") from None
+        except ValueError as e: #длина или число ответа не распознаны
+            raise ConnectionError(f"Ответ сервера не распознан: {str(e)}") from None
+
+    async def _parse_reply(self, reader: asyncio.StreamReader) -> Any:
+        """Разбирает один ответ сервера
+
+        Args:
+            self (Self@RespClient): Экземпляр класса
+            reader (asyncio.StreamReader): Поток чтения соединения
+
+        Returns:
+            Any: str, int, bytes, None или список
+
+        Raises:
+            RespError: Если сервер вернул ошибку
+            ConnectionError: Если соединение закрыто или тип ответа неизвестен
+            asyncio.IncompleteReadError: Если соединение закрыто посреди bulk-строки
+            ValueError: Если длина или число ответа не распознаны
+        """
+
+        line = await reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("Соединение закрыто сервером")
+        prefix, payload = line[:1], line[1:-2]
+        if prefix == b"+":
+            return payload.decode("utf-8")
+        if prefix == b"-":
+            raise RespError(payload.decode("utf-8"))
+        if prefix == b":":
+            return int(payload)
+        if prefix == b"$":
+            length = int(payload)
+            if length < 0:
+                return None
+            return (await reader.readexactly(length + 2))[:-2]
+        if prefix == b"*":
+            length = int(payload)
+            if length < 0:
+                return None
+            return [await self._parse_reply(reader) for _ in range(length)]
+        raise ConnectionError(f"Неизвестный ответ сервера: {line[:32]!r}")
+
+    async def _connect(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """Устанавливает новое соединение с авторизацией и выбором БД
+
+        Args:
+            self (Self@RespClient): Экземпляр класса
+
+        Returns:
+            tuple[asyncio.StreamReader, asyncio.StreamWriter]: Потоки соединения
+
+        Raises:
+            RespError: Если сервер отклонил AUTH или SELECT, соединение при этом закрывается
+        """
+
+        reader, writer = await asyncio.open_connection(self._host, self._port)
+        setup = []
+        if self._password:
+            setup.append(("AUTH", self._password))
+        if self._db:
+            setup.append(("SELECT", self._db))
+        try:
+            for args in setup:
+                writer.write(self._encode(args))
+                await writer.drain()
+                await self._read_reply(reader)
+        except BaseException:
+            writer.close()
+            raise
+        return reader, writer
+
+    async def _execute(self, args: tuple) -> Any:
+        """Выполняет команду на свободном соединении пула
+
+        Args:
+            self (Self@RespClient): Экземпляр класса
+            args (tuple): Команда и её аргументы
+
+        Returns:
+            Any: Ответ сервера
+        """
+
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else await self._connect()
+            reader, writer = connection
+            try:
+                writer.write(self._encode(args))
+                await writer.drain()
+                reply = await self._read_reply(reader)
+            except BaseException:
+                writer.close()
+                raise
+            self._idle.append(connection)
+            return reply
+
+    async def command(self, *args) -> Any:
+        """Выполняет команду с таймаутом
+
+        Args:
+            self (Self@RespClient): Экземпляр класса
+            *args: Команда и её аргументы (str, bytes или int)
+
+        Returns:
+            Any: Ответ сервера
+
+        Raises:
+            RespError: Если сервер вернул ошибку
+            TimeoutError: Если команда не выполнена за timeout секунд
+            OSError: Если соединение не установлено или потеряно
+        """
+
+        return await asyncio.wait_for(self._execute(args), self._timeout)
+
+    async def close(self) -> None:
+        """Закрывает простаивающие соединения
+
+        Args:
+            self (Self@RespClient): Экземпляр класса
+        """
+
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+class SharedCache:
+    """Общий для всех узлов кэш (L2) по протоколу Redis
+
+    Класс хранит в Redis (или совместимом сервере) заранее сериализованные блоки дней БД за год и статистику
+    целых лет. Ключи содержат версию года из таблицы calendar_year_version, поэтому изменение календаря
+    не требует удалять ключи: после изменения узлы обращаются к ключам новой версии, а старые истекают по ttl.
+    Блоки больше max_item_bytes не сохраняются. Ошибка или таймаут сервера считаются промахом, после чего
+    кэш не используется retry_seconds секунд, чтобы недоступный сервер не замедлял запросы.
+    Значение, которое не удалось разобрать (повреждённое или записанное чужим приложением), тоже считается промахом
+    и перезаписывается после загрузки из БД
+
+    Args:
+        url (Optional[str]): Адрес сервера вида redis://host:port/db, None - кэш выключен
+        prefix (str): Префикс ключей
+        ttl (int): Время (сек.) жизни ключей
+        max_item_bytes (int): Максимальный размер (байт) одного сохраняемого значения
+        timeout (float): Таймаут (сек.) команды
+        pool_size (int): Максимальное кол-во соединений
+        retry_seconds (float): Время (сек.) отключения кэша после ошибки сервера
+        stats_every (int): Кол-во обращений, через которое в лог пишется доля попаданий, 0 - не писать
+
+    Examples:
+        >>>shared_cache = SharedCache("redis://localhost:6379/0", "calendar", 86400, 262144, 0.2, 4, 5.0, 1000)
+        >>>db_days = await shared_cache.get_year_days(2025, 7)
+    """
+
+    def __init__(
+        self,
+        url: Optional[str],
+        prefix: str,
+        ttl: int,
+        max_item_bytes: int,
+        timeout: float,
+        pool_size: int,
+        retry_seconds: float,
+        stats_every: int
+    ) -> None:
+        """Конструктор класса
+
+        Args:
+            self (Self@SharedCache): Экземпляр класса
+            url (Optional[str]): Адрес сервера вида redis://host:port/db, None - кэш выключен
+            prefix (str): Префикс ключей
+            ttl (int): Время (сек.) жизни ключей
+            max_item_bytes (int): Максимальный размер (байт) одного сохраняемого значения
+            timeout (float): Таймаут (сек.) команды
+            pool_size (int): Максимальное кол-во соединений
+            retry_seconds (float): Время (сек.) отключения кэша после ошибки сервера
+            stats_every (int): Кол-во обращений, через которое в лог пишется доля попаданий, 0 - не писать
+        """
+
+        self._client = RespClient(url, pool_size, timeout) if url else None
+        self._prefix = prefix
+        self._ttl_ms = ttl * 1000
+        self._max_item_bytes = max_item_bytes
+        self._retry_seconds = retry_seconds
+        self._stats_every = stats_every
+        self._disabled_until = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
+        self.skipped = 0
+        self.corrupted = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Флаг доступности кэша (адрес задан и сервер недавно не отвечал ошибкой)"""
+
+        return self._client is not None and time.monotonic() >= self._disabled_until
+
+    def stats(self) -> dict:
+        """Статистика кэша
+
+        Args:
+            self (Self@SharedCache): Экземпляр класса
+
+        Returns:
+            dict: Кол-во попаданий, промахов, ошибок, несохранённых из-за размера и нераспознанных значений,
+                прочитанных и записанных байт и доля попаданий
+        """
+
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "skipped": self.skipped,
+            "corrupted": self.corrupted,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+    def _failed(self, command: str, e: BaseException) -> None:
+        """Учитывает ошибку сервера и временно отключает кэш
+
+        Args:
+            self (Self@SharedCache): Экземпляр класса
+            command (str): Команда
+            e (BaseException): Ошибка
+        """
+
+        self.errors += 1
+        self._disabled_until = time.monotonic() + self._retry_seconds
+        logger.warning(f"Общий кэш недоступен ({command}: {type(e).__name__} {str(e)}), отключён на {self._retry_seconds} сек.")
+
+    async def _get(self, key: str) -> Optional[bytes]:
+        """Получает значение по ключу
+
+        Args:
+            self (Self@SharedCache): Экземпляр класса
+            key (str): Ключ без префикса
+
+        Returns:
+            Optional[bytes]: Значение, None - промах или ошибка
+        """
+
+        if not self.enabled:
+            return None
+        try:
+            value = await self._client.command("GET", f"{self._prefix}:{key}")
+        except (OSError, asyncio.TimeoutError, RespError) as e:
+            self._failed("GET", e)
+            return None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.bytes_read += len(value)
+        if self._stats_every and (self.hits + self.misses) % self._stats_every == 0:
+            logger.info(f"Общий кэш: {self.stats()}")
+        return value
+
+    async def _set(self, key: str, value: bytes) -> None:
+        """Сохраняет значение по ключу с ttl
+
+        Args:
+            self (Self@SharedCache): Экземпляр класса
+            key (str): Ключ без префикса
+            value (bytes): Значение
+        """
+
+        if not self.enabled:
+            return
+        if len(value) > self._max_item_bytes:
+            self.skipped += 1
+            return
+        try:
+            await self._client.command("SET", f"{self._prefix}:{key}", value, "PX", self._ttl_ms)
+            self.bytes_written += len(value)
+        except (OSError, asyncio.TimeoutError, RespError) as e:
+            self._failed("SET", e)
+
+    async def _get_decoded(self, key: str, decode: Callable[[bytes], Any]) -> Any:
+        """Получает и разбирает значение по ключу
+
+        Нераспознанное значение учитывается как промах, а не как попадание
+
+        Args:
+            self (Self@SharedCache): Экземпляр класса
+            key (str): Ключ без префикса
+            decode (Callable[[bytes], Any]): Разбор значения
+
+        Returns:
+            Any: Разобранное значение, None - промах, ошибка или нераспознанное значение
+        """
+
+        value = await self._get(key)
+        if value is None:
+            return None
+        try:
+            return decode(value)
+        except ValueError as e: #ValidationError pydantic и JSONDecodeError - наследники ValueError
+            self.hits -= 1
+            self.misses += 1
+            self.corrupted += 1
+            logger.warning(f"Значение общего кэша по ключу {key} не распознано и считается промахом: {str(e)[:200]}")
+            return None
+
+    async def get_year_days(self, year: int, version: int) -> Optional[list[CalendarDayInDB]]:
+        """Получает блок дней БД за год
+
+        Args:
+            self (Self@SharedCache): Экземпляр класса
+            year (int): Год
+            version (int): Версия года
+
+        Returns:
+            Optional[list[CalendarDayInDB]]: Дни года, None - блока нет
+        """
+
+        return await self._get_decoded(f"days:{year}:{version}", YEAR_BLOCK.validate_json)
+
+    async def put_year_days(self, year: int, version: int, db_days: list[CalendarDayInDB]) -> None:
+        """Сохраняет блок дней БД за год
+
+        Args:
+            self (Self@SharedCache): Экземпляр класса
+            year (int): Год
+            version (int): Версия года
+            db_days (list[CalendarDayInDB]): Дни года
+        """
+
+        await self._set(f"days:{year}:{version}", YEAR_BLOCK.dump_json(db_days))
+
+    async def get_year_statistic(self, year: int, week_type: int, version: int) -> Optional[dict]:
+        """Получает статистику целого года
+
+        Args:
+            self (Self@SharedCache): Экземпляр класса
+            year (int): Год
+            week_type (int): Тип недели календаря (5- или 6-дневная)
+            version (int): Версия года
+
+        Returns:
+            Optional[dict]: Статистика года, None - статистики нет
+        """
+
+        return await self._get_decoded(f"stat:{year}:{week_type}:{version}", json.loads)
+
+    async def put_year_statistic(self, year: int, week_type: int, version: int, statistic: dict) -> None:
+        """Сохраняет статистику целого года
+
+        Args:
+            self (Self@SharedCache): Экземпляр класса
+            year (int): Год
+            week_type (int): Тип недели календаря (5- или 6-дневная)
+            version (int): Версия года
+            statistic (dict): Статистика года
+        """
+
+        await self._set(f"stat:{year}:{week_type}:{version}", json.dumps(statistic, ensure_ascii=False).encode("utf-8"))
+
+    async def close(self) -> None:
+        """Закрывает соединения
+
+        Предполагается использование только при остановке сервера
+
+        Args:
+            self (Self@SharedCache): Экземпляр класса
+        """
+
+        if self._client is not None:
+            await self._client.close()
+
+shared_cache = SharedCache(
+    settings.SHARED_CACHE_URL,
+    settings.SHARED_CACHE_PREFIX,
+    settings.SHARED_CACHE_TTL,
+    settings.SHARED_CACHE_MAX_ITEM_BYTES,
+    settings.SHARED_CACHE_TIMEOUT,
+    settings.SHARED_CACHE_POOL_SIZE,
+    settings.SHARED_CACHE_RETRY_SECONDS,
+    settings.SHARED_CACHE_STATS_EVERY
+)
@@ -0,0 +1,96 @@
+from core.logger import setup_logger
+from typing import Any, Awaitable, Callable, Hashable
+import asyncio
+
+logger = setup_logger("single_flight")
+
+flights: list["SingleFlight"] = [] #все группы для метрик
+
+class SingleFlight:
+    """Объединение одинаковых одновременных запросов
+
+    Класс гарантирует, что для одного ключа в каждый момент выполняется не больше одного вычисления:
+    первый запрос (ведущий) выполняет его, а одинаковые запросы, пришедшие во время выполнения, ждут его результат
+    или ошибку. Если ведущий запрос отменён (например, клиент отключился), один из ожидающих становится ведущим
+
+    Args:
+        name (str): Имя группы запросов для логов и статистики
+
+    Examples:
+        >>>period_flight = SingleFlight("period")
+        >>>result = await period_flight.do(key, lambda: compute())
+    """
+
+    def __init__(self, name: str) -> None:
+        """Конструктор класса
+
+        Args:
+            self (Self@SingleFlight): Экземпляр класса
+            name (str): Имя группы запросов для логов и статистики
+        """
+
+        self.name = name
+        self._in_flight: dict[Hashable, asyncio.Future] = {}
+        self._waiters: dict[Hashable, int] = {}
+        self.executed = 0
+        self.coalesced = 0
+        flights.append(self)
+
+    def stats(self) -> dict[str, int]:
+        """Статистика объединения запросов
+
+        Args:
+            self (Self@SingleFlight): Экземпляр класса
+
+        Returns:
+            dict[str, int]: Кол-во выполненных вычислений, объединённых (ожидавших чужое вычисление) запросов
+                и вычислений, выполняющихся сейчас
+        """
+
+        return {"executed": self.executed, "coalesced": self.coalesced, "in_flight": len(self._in_flight)}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Выполняет вычисление или дожидается такого же выполняющегося
+
+        Args:
+            self (Self@SingleFlight): Экземпляр класса
+            key (Hashable): Нормализованные параметры запроса
+            func (Callable[[], Awaitable[Any]]): Вычисление
+
+        Returns:
+            Any: Результат вычисления
+
+        Raises:
+            Exception: Ошибка вычисления (одна и та же для ведущего и всех ожидающих)
+        """
+
+        while key in self._in_flight:
+            future = self._in_flight[key]
+            self._waiters[key] += 1
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled(): #отменён сам ожидающий запрос
+                    raise
+                #отменён ведущий запрос, пробуем выполнить вычисление сами
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        self._waiters[key] = 0
+        try:
+            result = await func()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception() #ошибка передаётся ожидающим, без них asyncio не должен ругаться на непрочитанную ошибку
+            raise
+        finally:
+            self.executed += 1
+            del self._in_flight[key]
+            waiters = self._waiters.pop(key)
+            if waiters:
+                logger.info(f"Запрос {self.name} key={key} выполнен один раз для {waiters + 1} одинаковых запросов")
@@ -0,0 +1,374 @@
+from core.logger import setup_logger
+from core.config import settings
+from core.consts import DAY_TYPES, WEEK_DAYS
+from database import async_session_maker
+from model import CalendarDay
+from schemas.schemas import CalendarDayInDB
+from services.calendar_cache import calendar_cache
+from sqlalchemy import select, text
+from datetime import date, datetime, MINYEAR, MAXYEAR
+from fastapi import HTTPException, status
+from typing import Optional
+import asyncio
+import bisect
+import fcntl
+import mmap
+import os
+import struct
+import time
+
+logger = setup_logger("snapshot")
+
+SNAPSHOT_MAGIC = b"CALSNAP1"
+SNAPSHOT_HEADER = struct.Struct("=8sIqdIIII") #magic, порядок байт, версия, время начала чтения БД, первый день, кол-во дней, кол-во заметок, смещение заметок
+SNAPSHOT_BYTE_ORDER = 0x01020304
+DAY_TYPE_TEXTS: list[str] = list(DAY_TYPES.values())
+
+def _encode_day(type_id: int, type_text: str, week_day: str) -> int:
+    """Кодирует день БД в один байт
+
+    Биты 0-1 - type_id (1-3), биты 2-3 - номер type_text в DAY_TYPES (1-3), биты 4-6 - номер week_day в WEEK_DAYS.
+    Нулевой байт означает, что дня в БД нет
+
+    Args:
+        type_id (int): Id типа дня
+        type_text (str): Описание типа дня
+        week_day (str): Сокращённое наименование дня
+
+    Returns:
+        int: Байт дня
+    """
+
+    return type_id | ((DAY_TYPE_TEXTS.index(type_text) + 1) << 2) | (WEEK_DAYS.index(week_day) << 4)
+
+class CalendarSnapshot:
+    """Бинарный снимок дней собственного календаря, общий для всех воркеров хоста
+
+    Класс описывает файл снимка и работу с ним. Файл состоит из заголовка (версия календаря, время начала чтения БД,
+    первый день и кол-во дней), массива байтов дней (по одному байту на каждый день всего поддерживаемого диапазона,
+    см. _encode_day) и раздела заметок (номера дней, смещения и длины заметок и сами заметки в UTF-8)
+    Каждый воркер отображает файл в память только для чтения (mmap), поэтому страницы файла хранятся в кэше ОС
+    один раз на хост, а дни периода читаются прямо из отображения, без запросов к БД
+
+    Снимок пересоздаётся после каждого изменения календаря: один воркер хоста (под файловой блокировкой) читает дни
+    из БД, пишет новый файл рядом и атомарно подменяет им старый (os.replace), остальные воркеры отображают новый файл.
+    Снимок используется для периода, только если чтение БД для него началось позже последнего сброса затронутых лет
+    в кэше воркера (services/calendar_cache.py), иначе дни получаются через кэш лет.
+    Если БД недоступна, снимок используется в любом случае, а ответ помечается устаревшим
+
+    Args:
+        path (str): Путь файла снимка
+
+    Examples:
+        >>>calendar_snapshot = CalendarSnapshot("cache/calendar.snapshot")
+        >>>db_days = calendar_snapshot.get_period(date(2025, 1, 1), date(2025, 12, 31))
+    """
+
+    def __init__(self, path: str) -> None:
+        """Конструктор класса
+
+        Создаёт экземпляр без отображённого файла, файл отображается при подключении слушателя уведомлений
+
+        Args:
+            self (Self@CalendarSnapshot): Экземпляр класса
+            path (str): Путь файла снимка
+        """
+
+        self._path = path
+        self._mmap: Optional[mmap.mmap] = None
+        self._header: Optional[tuple] = None
+        self._valid_since = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._periodic_task: Optional[asyncio.Task] = None
+        self._dirty = False
+        self.served = 0
+        self.refreshes = 0
+
+    @property
+    def version(self) -> int:
+        """Версия календаря отображённого снимка, 0 - снимок не отображён"""
+
+        return self._header[2] if self._header else 0
+
+    def _map(self) -> bool:
+        """Отображает текущий файл снимка в память
+
+        Предыдущее отображение не закрывается явно: его ещё могут читать выполняющиеся запросы,
+        оно закроется сборщиком мусора
+
+        Args:
+            self (Self@CalendarSnapshot): Экземпляр класса
+
+        Returns:
+            bool: True - файл отображён, False - файла нет или он повреждён
+        """
+
+        try:
+            with open(self._path, "rb") as snapshot_file:
+                snapshot_mmap = mmap.mmap(snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+            header = SNAPSHOT_HEADER.unpack_from(snapshot_mmap, 0)
+            if header[0] != SNAPSHOT_MAGIC or header[1] != SNAPSHOT_BYTE_ORDER:
+                raise ValueError("Неизвестный формат файла")
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"Не удалось отобразить снимок {self._path}: {str(e)}")
+            return False
+        self._mmap, self._header = snapshot_mmap, header
+        self._valid_since = header[3]
+        return True
+
+    def _is_current(self, year_start: int, year_end: int) -> bool:
+        """Проверяет, что снимок не устарел для лет периода
+
+        Args:
+            self (Self@CalendarSnapshot): Экземпляр класса
+            year_start (int): Первый год периода
+            year_end (int): Последний год периода
+
+        Returns:
+            bool: True - снимок можно использовать
+        """
+
+        return self._mmap is not None and calendar_cache.trusted and self._valid_since > calendar_cache.stale_since(year_start, year_end)
+
+    @property
+    def read_at(self) -> Optional[datetime]:
+        """Время чтения БД для отображённого снимка, None - снимок не отображён"""
+
+        return datetime.fromtimestamp(self._header[3]).astimezone() if self._header else None
+
+    def get_period(self, date_start: date, date_end: date, allow_stale: bool = False) -> Optional[list[CalendarDayInDB]]:
+        """Получает дни БД по периоду из снимка
+
+        Дни собираются без валидации (id у них всегда 0, в ответах id не выводится)
+
+        Args:
+            self (Self@CalendarSnapshot): Экземпляр класса
+            date_start (date): Дата начала периода
+            date_end (date): Дата конца периода
+            allow_stale (bool): Использовать снимок, даже если он мог устареть (БД недоступна)
+
+        Returns:
+            Optional[list[CalendarDayInDB]]: Список календарных дней периода, None - снимок нельзя использовать
+
+        Raises:
+            HTTPException: Если дней в периоде нет
+        """
+
+        if self._mmap is None or not (allow_stale or self._is_current(date_start.year, date_end.year)):
+            return None
+        snapshot_mmap, header = self._mmap, self._header
+        _, _, _, _, first_ordinal, day_count, note_count, notes_offset = header
+        start = date_start.toordinal() - first_ordinal
+        end = date_end.toordinal() - first_ordinal + 1
+        if start < 0 or end > day_count:
+            return None #период выходит за диапазон снимка
+        view = memoryview(snapshot_mmap)
+        days_view = view[SNAPSHOT_HEADER.size:SNAPSHOT_HEADER.size + day_count]
+        note_days = view[notes_offset:notes_offset + 4 * note_count].cast("I")
+        note_offsets = view[notes_offset + 4 * note_count:notes_offset + 8 * note_count].cast("I")
+        note_lengths = view[notes_offset + 8 * note_count:notes_offset + 12 * note_count].cast("I")
+        notes_blob = notes_offset + 12 * note_count
+        note_position = bisect.bisect_left(note_days, start)
+        period_days: list[CalendarDayInDB] = []
+        for index in range(start, end):
+            code = days_view[index]
+            if not code:
+                continue
+            note = None
+            if note_position < note_count and note_days[note_position] == index: #заметки есть только у дней БД, указатель не отстаёт
+                note_start = notes_blob + note_offsets[note_position]
+                note = bytes(view[note_start:note_start + note_lengths[note_position]]).decode("utf-8")
+                note_position += 1
+            period_days.append(CalendarDayInDB.model_construct(
+                id=0,
+                date=date.fromordinal(first_ordinal + index),
+                type_id=code & 0b11,
+                type_text=DAY_TYPE_TEXTS[((code >> 2) & 0b11) - 1],
+                note=note,
+                week_day=WEEK_DAYS[(code >> 4) & 0b111]
+            ))
+        self.served += 1
+        if not period_days:
+            desc = f"Календарные дни по периоду date_start={date_start}, date_end={date_end} отсутствуют"
+            logger.warning(desc)
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=desc
+            )
+        return period_days
+
+    def _write(self, version: int, read_started_at: float, db_days: list[tuple]) -> int:
+        """Синхронно пишет новый файл снимка и атомарно подменяет им старый
+
+        Args:
+            self (Self@CalendarSnapshot): Экземпляр класса
+            version (int): Версия календаря
+            read_started_at (float): Время (unix) начала чтения дней из БД
+            db_days (list[tuple]): Дни БД вида (дата, type_id, type_text, note, week_day)
+
+        Returns:
+            int: Размер файла (байт)
+        """
+
+        first_day = min([date(2017, 1, 1)] + [db_day[0] for db_day in db_days])
+        last_day = max([date(datetime.now().year + 1, 12, 31)] + [db_day[0] for db_day in db_days])
+        first_ordinal = first_day.toordinal()
+        day_count = last_day.toordinal() - first_ordinal + 1
+        days = bytearray(day_count)
+        note_days, note_offsets, note_lengths, notes_blob = [], [], [], bytearray()
+        for day_date, type_id, type_text, note, week_day in db_days:
+            index = day_date.toordinal() - first_ordinal
+            days[index] = _encode_day(type_id, type_text, week_day)
+            if note is not None:
+                encoded_note = note.encode("utf-8")
+                note_days.append(index)
+                note_offsets.append(len(notes_blob))
+                note_lengths.append(len(encoded_note))
+                notes_blob += encoded_note
+        notes_offset = SNAPSHOT_HEADER.size + day_count
+        notes_offset += -notes_offset % 4 #массивы заметок выровнены по 4 байта
+        header = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_BYTE_ORDER, version, read_started_at, first_ordinal, day_count, len(note_days), notes_offset)
+        tmp_path = f"{self._path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as snapshot_file:
+            snapshot_file.write(header)
+            snapshot_file.write(days)
+            snapshot_file.write(bytes(notes_offset - SNAPSHOT_HEADER.size - day_count))
+            for values in (note_days, note_offsets, note_lengths):
+                snapshot_file.write(struct.pack(f"={len(values)}I", *values))
+            snapshot_file.write(notes_blob)
+            snapshot_file.flush()
+            os.fsync(snapshot_file.fileno())
+            size = snapshot_file.tell()
+        os.replace(tmp_path, self._path)
+        return size
+
+    async def _regenerate(self) -> None:
+        """Пересоздаёт снимок, если его ещё не пересоздал другой воркер хоста
+
+        Args:
+            self (Self@CalendarSnapshot): Экземпляр класса
+        """
+
+        os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+        lock_file = open(f"{self._path}.lock", "wb")
+        try:
+            await asyncio.to_thread(fcntl.flock, lock_file.fileno(), fcntl.LOCK_EX)
+            if self._map() and self._is_current(MINYEAR, MAXYEAR):
+                logger.info(f"Снимок уже пересоздан другим воркером (version={self.version})")
+                return
+            read_started_at = time.time()
+            async with async_session_maker() as session:
+                version = await session.scalar(text("SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM calendar_version_seq"))
+                result = await session.execute(select(
+                    CalendarDay.date,
+                    CalendarDay.type_id,
+                    CalendarDay.type_text,
+                    CalendarDay.note,
+                    CalendarDay.week_day
+                ))
+                db_days = [tuple(row) for row in result.all()]
+            size = await asyncio.to_thread(self._write, version, read_started_at, db_days)
+            self._map()
+            self.refreshes += 1
+            logger.info(f"Снимок пересоздан (version={version}, дней в БД {len(db_days)}, {size} байт)")
+        finally:
+            await asyncio.to_thread(fcntl.flock, lock_file.fileno(), fcntl.LOCK_UN)
+            lock_file.close()
+
+    async def _refresh_loop(self) -> None:
+        """Пересоздаёт снимок, пока во время пересоздания приходят новые изменения
+
+        Args:
+            self (Self@CalendarSnapshot): Экземпляр класса
+        """
+
+        try:
+            while self._dirty:
+                self._dirty = False
+                try:
+                    await self._regenerate()
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.warning(f"Не удалось пересоздать снимок: {str(e)}")
+        finally:
+            self._refresh_task = None
+
+    def schedule_refresh(self) -> None:
+        """Запускает пересоздание снимка в фоне
+
+        Изменения, пришедшие во время пересоздания, объединяются в одно следующее пересоздание
+
+        Args:
+            self (Self@CalendarSnapshot): Экземпляр класса
+        """
+
+        self._dirty = True
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop(), name="calendar-snapshot")
+
+    def start(self, interval: int) -> None:
+        """Отображает существующий снимок и запускает его периодическое пересоздание
+
+        Существующий снимок отображается сразу при старте, чтобы им можно было обслуживать чтение,
+        если БД станет недоступна раньше, чем подключится слушатель уведомлений. Периодическое пересоздание
+        обновляет снимок, даже если уведомления не приходят (например, кэш лет выключен); актуальный снимок
+        при этом не перечитывается из БД
+        Предполагается использование только при старте сервера
+
+        Args:
+            self (Self@CalendarSnapshot): Экземпляр класса
+            interval (int): Период (сек.) пересоздания снимка
+        """
+
+        if self._map():
+            logger.info(f"Отображён существующий снимок (version={self.version}, прочитан {self.read_at})")
+        self._periodic_task = asyncio.create_task(self._periodic_loop(interval), name="calendar-snapshot-periodic")
+
+    async def _periodic_loop(self, interval: int) -> None:
+        """Цикл периодического пересоздания снимка
+
+        Args:
+            self (Self@CalendarSnapshot): Экземпляр класса
+            interval (int): Период (сек.) пересоздания снимка
+        """
+
+        while True:
+            await asyncio.sleep(interval)
+            self.schedule_refresh()
+
+    def on_connected(self, version: int) -> None:
+        """Отображает снимок после подключения слушателя уведомлений
+
+        Уведомления до подключения воркер не получал, поэтому существующий снимок принимается,
+        только если его версия совпадает с текущей версией календаря в БД, иначе он пересоздаётся
+
+        Args:
+            self (Self@CalendarSnapshot): Экземпляр класса
+            version (int): Текущая версия календаря в БД
+        """
+
+        if self._map() and self.version == version:
+            self._valid_since = time.time()
+            logger.info(f"Отображён существующий снимок (version={version})")
+        else:
+            self.schedule_refresh()
+
+    async def stop(self) -> None:
+        """Останавливает пересоздание снимка
+
+        Предполагается использование только при остановке сервера
+
+        Args:
+            self (Self@CalendarSnapshot): Экземпляр класса
+        """
+
+        for task in (self._periodic_task, self._refresh_task):
+            if task is not None:
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+        self._periodic_task = None
+
+calendar_snapshot = CalendarSnapshot(settings.SNAPSHOT_PATH)
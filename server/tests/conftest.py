@@ -0,0 +1,23 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+#настройки без .env: модули сервера читают их при импорте, но тесты не обращаются ни к БД, ни к источникам
+TEST_SETTINGS: dict[str, str] = {
+    "POSTGRESQL_HOST": "localhost",
+    "POSTGRESQL_PORT": "5432",
+    "POSTGRESQL_USER": "calendar_admin",
+    "POSTGRESQL_PASSWORD": "admin",
+    "POSTGRESQL_DB": "calendar",
+    "APP_NAME": "main:app",
+    "APP_HOST": "127.0.0.1",
+    "APP_PORT": "8000",
+    "APP_DEBUG": "False",
+    "API_TOKEN": "test_token",
+    "CONSULTANT_CALENDAR_URL": "http://127.0.0.1:8081",
+    "HHRU_CALENDAR_URL": "http://127.0.0.1:8081",
+    "ADMIN_PANEL_URL": "http://127.0.0.1:3000"
+}
+for name, value in TEST_SETTINGS.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,50 @@
+from benchmarks.corpus import consultant_year_strs, hhru_year_strs, corpus_pages, load_page, load_golden, load_manifest, ORIGIN_CAPTURED
+from services.external_utils import parse_consultant_days, parse_consultant_days_full, parse_hhru_days, parse_hhru_days_full
+import pytest
+
+PARSERS = {
+    "consultant": (parse_consultant_days, parse_consultant_days_full),
+    "hhru": (parse_hhru_days, parse_hhru_days_full)
+}
+PAGES = list(corpus_pages())
+
+def test_corpus_covers_all_years():
+    """В корпусе без пропусков есть страницы обоих источников до последнего сохранённого года, включая редакции 2020b и 2024b"""
+
+    last_year = max(int(year_str[:4]) for _, year_str in PAGES)
+    expected = {("consultant", year_str) for year_str in consultant_year_strs(last_year)} | {("hhru", year_str) for year_str in hhru_year_strs(last_year)}
+    assert {("consultant", "2020b"), ("consultant", "2024b")} <= expected
+    assert expected <= set(PAGES)
+
+@pytest.mark.parametrize(("source", "year_str"), PAGES, ids=[f"{source}-{year_str}" for source, year_str in PAGES])
+def test_parsers_match_golden(source, year_str):
+    """Рабочий и полный парсеры выдают для каждой страницы корпуса эталонный список дней"""
+
+    response_text = load_page(source, year_str)
+    golden = load_golden(source, year_str)
+    assert golden is not None, f"Нет эталона {source}/{year_str}"
+    for parser in PARSERS[source]:
+        assert parser(response_text) == golden
+
+def test_manifest_covers_corpus():
+    """Происхождение (синтетическая или скачанная) записано для каждой страницы корпуса"""
+
+    manifest = load_manifest()
+    assert {f"{source}/{year_str}" for source, year_str in PAGES} <= set(manifest)
+
+@pytest.mark.parametrize("source", list(PARSERS))
+def test_checked_captured_page(source):
+    """В корпусе есть скачанная с сайта источника страница со сверенным вручную эталоном
+
+    Пока такой страницы нет, тест пропускается с причиной в отчёте (pytest -rs): синтетические страницы
+    не доказывают, что парсеры разбирают настоящую разметку источника
+    """
+
+    checked = [
+        key for key, entry in load_manifest().items()
+        if key.startswith(f"{source}/") and entry.get("origin") == ORIGIN_CAPTURED and entry.get("golden_checked")
+    ]
+    if not checked:
+        pytest.skip(f"Нет скачанной страницы {source} со сверенным эталоном: python -m benchmarks.capture_fixtures, затем --mark-checked")
+    for key in checked:
+        assert (source, key.split("/", 1)[1]) in PAGES
@@ -0,0 +1,39 @@
+from core.config import settings
+from services.external import ExternalService
+from fastapi import HTTPException
+from httpx import HTTPStatusError, Request, Response
+from datetime import datetime
+import asyncio
+import pytest
+
+def load_with_error(monkeypatch, year: int, error: Exception) -> Exception:
+    """Получает календарь года, когда все источники завершаются заданной ошибкой, и возвращает итоговую ошибку"""
+
+    async def fetch_source(self, external_interface, source, year, timeout):
+        raise error
+
+    monkeypatch.setattr(ExternalService, "_fetch_source", fetch_source)
+    monkeypatch.setattr(settings, "EXTERNAL_FETCH_MODE", "fallback")
+    with pytest.raises(Exception) as exc_info:
+        asyncio.run(ExternalService(http_client=None)._load_raw_calendar(year))
+    return exc_info.value
+
+def not_found() -> HTTPStatusError:
+    """Ответ источника 404"""
+
+    request = Request("GET", "http://source.test/")
+    return HTTPStatusError("404 Not Found", request=request, response=Response(404, request=request))
+
+def test_unpublished_next_year(monkeypatch):
+    """Нет страницы или дней на странице следующего года - 422, а не ошибка источника"""
+
+    next_year = datetime.now().year + 1
+    for error in (not_found(), HTTPException(status_code=502, detail="no days")):
+        exc = load_with_error(monkeypatch, next_year, error)
+        assert isinstance(exc, HTTPException) and exc.status_code == 422
+
+def test_missing_current_year_is_source_error(monkeypatch):
+    """Для уже наступившего года ошибка источника отдаётся как есть"""
+
+    error = not_found()
+    assert load_with_error(monkeypatch, datetime.now().year, error) is error
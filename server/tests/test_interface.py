@@ -0,0 +1,47 @@
+from core.config import settings
+import interface
+from interface import CircuitBreaker, ExternalInterface, get_host_semaphore
+from httpx import AsyncClient, MockTransport, Response
+import asyncio
+
+class RecordingBreaker(CircuitBreaker):
+    """Автомат, запоминающий задержки успешных запросов"""
+
+    def __init__(self) -> None:
+        super().__init__("consultant", 10, 4, 0.5, 8.0, 30.0)
+        self.latencies: list[float] = []
+
+    def record_success(self, seconds: float) -> None:
+        self.latencies.append(seconds)
+        super().record_success(seconds)
+
+def handler(request) -> Response:
+    """Перенаправляет /old на /new и отвечает страницей"""
+
+    if request.url.path == "/old":
+        return Response(302, headers={"Location": "/new"})
+    return Response(200, text="<html></html>")
+
+def test_breaker_latency_excludes_host_semaphore_wait(monkeypatch):
+    """Ожидание семафора хоста не попадает в задержку запроса, которую видит автомат"""
+
+    breaker = RecordingBreaker()
+    monkeypatch.setitem(interface.circuit_breakers, "consultant", breaker)
+    monkeypatch.setattr(settings, "PAGE_CACHE_ENABLED", False)
+    monkeypatch.setattr(settings, "ARCHIVE_ENABLED", False)
+    monkeypatch.setattr(settings, "HTTP_MAX_CONNECTIONS_PER_HOST", 1)
+    host = "semaphore-wait.test"
+
+    async def main() -> None:
+        async with AsyncClient(transport=MockTransport(handler)) as client:
+            external_interface = ExternalInterface(client)
+            semaphore = get_host_semaphore(host)
+            await semaphore.acquire()
+            task = asyncio.create_task(external_interface._get_page("consultant", f"http://{host}/old", "2025", None, follow_redirects=True))
+            await asyncio.sleep(0.3)
+            semaphore.release()
+            assert await task == "<html></html>"
+
+    asyncio.run(main())
+    assert len(breaker.latencies) == 1
+    assert breaker.latencies[0] < 0.2
@@ -0,0 +1,50 @@
+from services import jobs
+from services.jobs import JobRunner
+import asyncio
+
+class FakeJobRepository:
+    """Репозиторий задач, отдающий заданные id ожидающих и брошенных задач"""
+
+    resumable: list[int] = []
+
+    def __init__(self, session) -> None:
+        pass
+
+    async def get_resumable_job_ids(self, stale_before) -> list[int]:
+        return list(self.resumable)
+
+    async def update_job(self, job_id: int, **values) -> None:
+        pass
+
+def test_rescan_resumes_job_abandoned_after_start(monkeypatch):
+    """Задача, брошенная после старта воркеров, ставится в очередь повторным просмотром, но не дважды"""
+
+    monkeypatch.setattr(jobs, "ImportJobRepository", FakeJobRepository)
+    monkeypatch.setattr(FakeJobRepository, "resumable", [])
+    started: list[int] = []
+
+    async def main() -> None:
+        job_runner = JobRunner(1, 100, 300, 0)
+        gate = asyncio.Event()
+
+        async def run_job(job_id: int) -> None:
+            job_runner._running.add(job_id)
+            started.append(job_id)
+            await gate.wait()
+            job_runner._running.discard(job_id)
+
+        monkeypatch.setattr(job_runner, "_run_job", run_job)
+        await job_runner.start(None)
+        job_runner._rescan_interval = 0.05
+        job_runner._rescan_task = asyncio.create_task(job_runner._rescan_loop())
+        FakeJobRepository.resumable = [1, 2]
+        await asyncio.sleep(0.2)
+        assert started == [1]
+        assert job_runner._queued == {2}
+        assert await job_runner._scan() == 0
+        gate.set()
+        await asyncio.sleep(0.1)
+        await job_runner.stop()
+
+    asyncio.run(main())
+    assert started[:2] == [1, 2]
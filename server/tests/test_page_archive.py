@@ -0,0 +1,27 @@
+from page_archive import PageArchive
+import os
+
+def body_files(directory: str) -> set[str]:
+    """Тела версий страницы consultant/2025 в архиве"""
+
+    page_dir = os.path.join(directory, "consultant", "2025")
+    return {name for name in os.listdir(page_dir) if name.endswith(".html.gz")}
+
+def test_reverted_page_is_indexed_again(tmp_path):
+    """Страница, вернувшаяся к прежней версии (A→B→A), снова становится последней, а повтор версии не записывается"""
+
+    page_archive = PageArchive(str(tmp_path), 1, 20)
+    hashes = [page_archive._store("consultant", "2025", "url", text) for text in ("A", "B", "A", "A")]
+    assert hashes[3] is None
+    assert [version["sha256"] for version in page_archive.versions("consultant", "2025")] == hashes[:3]
+    assert len(body_files(str(tmp_path))) == 2
+
+def test_retention_keeps_last_versions(tmp_path):
+    """Хранятся только последние max_versions смен версии, тела вытесненных версий удаляются"""
+
+    page_archive = PageArchive(str(tmp_path), 1, 3)
+    hashes = [page_archive._store("consultant", "2025", "url", text) for text in ("A", "B", "C", "B", "D")]
+    versions = page_archive.versions("consultant", "2025")
+    assert [version["sha256"] for version in versions] == hashes[2:]
+    assert body_files(str(tmp_path)) == {f"{content_hash}.html.gz" for content_hash in set(hashes[2:])}
+    assert page_archive.latest_pages()[("consultant", "2025")].endswith(f"{hashes[4]}.html.gz")
@@ -0,0 +1,42 @@
+from benchmarks.corpus import corpus_pages, load_page, load_golden
+from benchmarks.parser_diff import PARSERS
+from benchmarks.synthetic_fixtures import UNRECOGNIZED_YEAR_STR
+from core.config import settings
+from services import external_utils
+from services.external_utils import parse_consultant_days, parse_hhru_days
+import pytest
+
+PAGES = list(corpus_pages())
+PROD_PARSERS = {"consultant": parse_consultant_days, "hhru": parse_hhru_days}
+
+@pytest.mark.parametrize(("source", "year_str"), PAGES, ids=[f"{source}-{year_str}" for source, year_str in PAGES])
+def test_fast_parser_matches_full(source, year_str):
+    """Быстрый парсер выдаёт на каждой странице корпуса тот же непустой список дней, что и полный"""
+
+    response_text = load_page(source, year_str)
+    fast_parser, full_parser = PARSERS[source]
+    fast_days = fast_parser(response_text)
+    assert fast_days
+    assert fast_days == full_parser(response_text)
+
+@pytest.mark.parametrize("source", list(PARSERS))
+def test_unrecognized_page_falls_back_to_full_parser(source, monkeypatch):
+    """Страницу, разметку которой быстрый парсер не распознал, рабочий парсер с PARSE_FAST_PATH разбирает полным парсером"""
+
+    monkeypatch.setattr(settings, "PARSE_FAST_PATH", True)
+    response_text = load_page(source, UNRECOGNIZED_YEAR_STR)
+    fast_parser, full_parser = PARSERS[source]
+    golden = load_golden(source, UNRECOGNIZED_YEAR_STR)
+    assert fast_parser(response_text) == []
+    assert full_parser(response_text) == golden
+    assert PROD_PARSERS[source](response_text) == golden
+
+@pytest.mark.parametrize("source", list(PARSERS))
+def test_full_parser_is_default(source, monkeypatch):
+    """Без PARSE_FAST_PATH рабочий парсер не вызывает быстрый"""
+
+    def fail(response_text):
+        raise AssertionError("быстрый парсер вызван без PARSE_FAST_PATH")
+
+    monkeypatch.setattr(external_utils, f"parse_{source}_days_fast", fail)
+    assert PROD_PARSERS[source](load_page(source, "2025")) == load_golden(source, "2025")
@@ -0,0 +1,48 @@
+from database import db_health
+from model import CalendarDay
+from repo import CalendarDayRepository
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError, OperationalError
+from datetime import date
+import asyncio
+import pytest
+
+class FailingSession:
+    """Сессия, в которой flush завершается заданной ошибкой"""
+
+    def __init__(self, error: Exception) -> None:
+        self.info: dict = {}
+        self._error = error
+
+    def add(self, instance) -> None:
+        pass
+
+    async def flush(self) -> None:
+        raise self._error
+
+    async def rollback(self) -> None:
+        pass
+
+def create_day(error: Exception) -> HTTPException:
+    """Создаёт день в сессии с ошибкой и возвращает полученное HTTPException"""
+
+    repo = CalendarDayRepository(FailingSession(error))
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(repo.create_day(CalendarDay(date=date(2025, 1, 1), type_id=1)))
+    return exc_info.value
+
+def test_create_day_connection_error(monkeypatch):
+    """Потеря соединения при создании дня - 503 и деградированный режим, а не 400"""
+
+    monkeypatch.setattr(db_health, "down_since", None)
+    exc = create_day(OperationalError("INSERT", {}, ConnectionResetError("connection reset")))
+    assert exc.status_code == 503
+    assert db_health.down_since is not None
+
+def test_create_day_bad_data(monkeypatch):
+    """Ошибка данных при создании дня - 400, деградированный режим не включается"""
+
+    monkeypatch.setattr(db_health, "down_since", None)
+    exc = create_day(IntegrityError("INSERT", {}, ValueError("duplicate key")))
+    assert exc.status_code == 400
+    assert db_health.down_since is None
@@ -0,0 +1,174 @@
+from benchmarks.fake_redis import FakeRedis
+from core.consts import DAY_TYPES, WEEK_DAYS
+from schemas.schemas import CalendarDayInDB
+from shared_cache import SharedCache
+from datetime import date, timedelta
+import asyncio
+
+YEAR = 2025
+VERSION = 7
+DB_DAYS = [
+    CalendarDayInDB(id=offset + 1, date=date(YEAR, 1, 1) + timedelta(days=offset), type_id=1, type_text=DAY_TYPES[1], note=None, week_day=WEEK_DAYS[offset % 7])
+    for offset in range(10)
+]
+STATISTIC = {"work_days": 247, "weekends": 118, "holidays": 14}
+
+def run_with_cache(scenario, ttl: int = 60, max_item_bytes: int = 262144, retry_seconds: float = 5.0) -> None:
+    """Запускает сценарий с общим кэшем поверх локального FakeRedis
+
+    Args:
+        scenario (Callable): Корутина-функция, принимающая FakeRedis, SharedCache и порт сервера
+        ttl (int): Время (сек.) жизни ключей
+        max_item_bytes (int): Максимальный размер (байт) одного сохраняемого значения
+        retry_seconds (float): Время (сек.) отключения кэша после ошибки сервера
+    """
+
+    async def main() -> None:
+        fake_redis = FakeRedis()
+        port = await fake_redis.start()
+        cache = SharedCache(f"redis://127.0.0.1:{port}/0", "test", ttl, max_item_bytes, 0.5, 2, retry_seconds, 0)
+        try:
+            await scenario(fake_redis, cache, port)
+        finally:
+            await cache.close()
+            await fake_redis.stop()
+
+    asyncio.run(main())
+
+def test_round_trip():
+    """Записанные дни и статистика года читаются обратно без изменений, отсутствующий ключ - промах"""
+
+    async def scenario(fake_redis, cache, port):
+        assert await cache.get_year_days(YEAR, VERSION) is None
+        await cache.put_year_days(YEAR, VERSION, DB_DAYS)
+        await cache.put_year_statistic(YEAR, 5, VERSION, STATISTIC)
+        assert await cache.get_year_days(YEAR, VERSION) == DB_DAYS
+        assert await cache.get_year_statistic(YEAR, 5, VERSION) == STATISTIC
+        assert await cache.get_year_days(YEAR, VERSION + 1) is None
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["errors"]) == (2, 2, 0)
+        assert stats["bytes_read"] == stats["bytes_written"] > 0
+
+    run_with_cache(scenario)
+
+def test_ttl():
+    """Ключи истекают через ttl"""
+
+    async def scenario(fake_redis, cache, port):
+        await cache.put_year_statistic(YEAR, 5, VERSION, STATISTIC)
+        assert await cache.get_year_statistic(YEAR, 5, VERSION) == STATISTIC
+        await asyncio.sleep(1.1)
+        assert await cache.get_year_statistic(YEAR, 5, VERSION) is None
+
+    run_with_cache(scenario, ttl=1)
+
+def test_size_budget():
+    """Значение больше max_item_bytes не отправляется на сервер"""
+
+    async def scenario(fake_redis, cache, port):
+        await cache.put_year_days(YEAR, VERSION, DB_DAYS)
+        await cache.put_year_statistic(YEAR, 5, VERSION, STATISTIC)
+        assert await cache.get_year_days(YEAR, VERSION) is None
+        assert await cache.get_year_statistic(YEAR, 5, VERSION) == STATISTIC
+        assert cache.stats()["skipped"] == 1
+        assert fake_redis.commands.get("SET") == 1
+
+    run_with_cache(scenario, max_item_bytes=512)
+
+def test_error_back_off():
+    """После ошибки сервера кэш не используется retry_seconds секунд, затем снова обращается к серверу"""
+
+    async def scenario(fake_redis, cache, port):
+        await cache.put_year_statistic(YEAR, 5, VERSION, STATISTIC)
+        await fake_redis.stop()
+        assert await cache.get_year_statistic(YEAR, 5, VERSION) is None
+        assert cache.stats()["errors"] == 1
+        assert not cache.enabled
+        await fake_redis.start(port=port)
+        assert await cache.get_year_statistic(YEAR, 5, VERSION) is None
+        assert fake_redis.commands.get("GET", 0) == 0
+        await asyncio.sleep(0.25)
+        assert cache.enabled
+        await cache.put_year_statistic(YEAR, 5, VERSION, STATISTIC)
+        assert await cache.get_year_statistic(YEAR, 5, VERSION) == STATISTIC
+        assert cache.stats()["errors"] == 1
+
+    run_with_cache(scenario, retry_seconds=0.2)
+
+def test_corrupted_value_is_miss():
+    """Нераспознанное значение считается промахом и не отключает кэш"""
+
+    async def scenario(fake_redis, cache, port):
+        fake_redis.data[f"test:days:{YEAR}:{VERSION}".encode()] = (b'[{"id": "foreign"}]', None)
+        fake_redis.data[f"test:stat:{YEAR}:5:{VERSION}".encode()] = (b"\x80not json", None)
+        assert await cache.get_year_days(YEAR, VERSION) is None
+        assert await cache.get_year_statistic(YEAR, 5, VERSION) is None
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["corrupted"], stats["errors"]) == (0, 2, 2, 0)
+        assert cache.enabled
+        await cache.put_year_days(YEAR, VERSION, DB_DAYS)
+        assert await cache.get_year_days(YEAR, VERSION) == DB_DAYS
+
+    run_with_cache(scenario)
+
+def run_with_raw_server(reply: bytes, address: str, scenario) -> list[bytes]:
+    """Запускает сценарий с общим кэшем поверх сервера, отвечающего на первую команду заданными байтами
+
+    После ответа сервер закрывает свою сторону соединения и ждёт, пока его закроет клиент
+
+    Args:
+        reply (bytes): Ответ сервера
+        address (str): Адрес сервера без схемы с подстановкой {port}
+        scenario (Callable): Корутина-функция, принимающая SharedCache
+
+    Returns:
+        list[bytes]: Первая строка полученной команды и b"closed", если клиент закрыл соединение
+    """
+
+    received: list[bytes] = []
+
+    async def handle(reader, writer):
+        received.append(await reader.readline())
+        writer.write(reply)
+        writer.write_eof()
+        await writer.drain()
+        try:
+            await asyncio.wait_for(reader.read(), 1.0)
+            received.append(b"closed")
+        finally:
+            writer.close()
+
+    async def main() -> None:
+        server = await asyncio.start_server(handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        cache = SharedCache(f"redis://{address.format(port=port)}", "test", 60, 262144, 0.5, 2, 5.0, 0)
+        try:
+            await scenario(cache)
+            await asyncio.sleep(0.05)
+        finally:
+            await cache.close()
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(main())
+    return received
+
+async def expect_error_miss(cache) -> None:
+    """Чтение возвращает промах, ошибка сервера учтена и кэш отключён"""
+
+    assert await cache.get_year_statistic(YEAR, 5, VERSION) is None
+    assert cache.stats()["errors"] == 1
+    assert not cache.enabled
+
+def test_broken_reply_is_miss():
+    """Разрыв посреди bulk-строки и нераспознанная длина ответа считаются ошибкой сервера, а не исключением"""
+
+    for reply in (b"$100\r\npartial", b"$abc\r\n", b"*x\r\n"):
+        received = run_with_raw_server(reply, "127.0.0.1:{port}/0", expect_error_miss)
+        assert received == [b"*2\r\n", b"closed"]
+
+def test_rejected_auth_closes_connection():
+    """Отклонённый AUTH считается ошибкой сервера, а соединение закрывается"""
+
+    received = run_with_raw_server(b"-WRONGPASS invalid password\r\n", ":secret@127.0.0.1:{port}/0", expect_error_miss)
+    assert received == [b"*2\r\n", b"closed"]